@@ -1,7 +1,14 @@
-import random
+import argparse
 import csv
+import io
+import itertools
+import json
+import os
+import random
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from collections import defaultdict
 
 # Categorias e descrições realistas
 categorias = {
@@ -1166,104 +1173,289 @@ pesos_categorias = {
     "TRP": 8     # Transporte - frequente
 }
 
-def gerar_data_aleatoria():
-    inicio = datetime(2020, 1, 1)
-    fim = datetime(2025, 6, 1)
-    return inicio + timedelta(days=random.randint(0, (fim - inicio).days))
+ARQUIVO_SAIDA = "transacoes_completas.csv"
+CABECALHO = ["data", "descricao", "categoria", "Valor"]
+
+# Linhas sorteadas por vez em cada shard (as categorias saem em bloco com random.choices)
+BLOCO = 10000
+# No modo numpy cada bloco é gerado coluna a coluna
+BLOCO_NUMPY = 100000
+MODOS = ("python", "numpy")
+FORMATOS = ("csv", "npy")
+
+# Formato npy: um diretório com meta.json e um .npy por coluna (lido por training/data.py).
+# Descrição e categoria são gravadas como códigos dos dicionários do meta.json.
+META_COLUNAS = "meta.json"
+COLUNAS_NPY = {"data": "datetime64[D]", "descricao": "int32", "categoria": "int8", "valor": "float64"}
+
+DATA_INICIO = datetime(2020, 1, 1)
+DATA_FIM = datetime(2025, 6, 1)
+
+faixas_valor = {
+    "ABS": (50, 1000),
+    "AGU": (50, 500),
+    "APL": (1, 1000),
+    "ASS": (10, 300),
+    "BAR": (30, 2000),
+    "CAS": (150, 4200),
+    "CRD": (150, 15000),
+    "EDU": (100, 3000),
+    "IMP": (20, 500),
+    "JUR": (1, 1000),
+    "LAZ": (50, 20000),
+    "LOJ": (50, 2000),
+    "MAN": (100, 5000),
+    "MER": (80, 2000),
+    "PED": (30, 1000),
+    "PET": (30, 1000),
+    "SAL": (1500, 10000),
+    "SAU": (80, 1500),
+    "SEG": (200, 3000),
+    "TAR": (5, 100),
+    "TRP": (5, 60)
+}
+
+# Tabelas calculadas uma vez: datas já formatadas, pesos acumulados e descrições obrigatórias
+DATAS = [(DATA_INICIO + timedelta(days=dia)).strftime("%Y-%m-%d") for dia in range((DATA_FIM - DATA_INICIO).days + 1)]
+CATEGORIAS = list(pesos_categorias)
+PESOS_ACUMULADOS = [sum(list(pesos_categorias.values())[:i + 1]) for i in range(len(CATEGORIAS))]
+DESCRICOES_OBRIGATORIAS = [(categoria, descricao) for categoria, descricoes in categorias.items()
+                           for descricao in dict.fromkeys(descricoes)]
+DESCRICOES = [(categoria, descricao) for categoria in CATEGORIAS for descricao in categorias[categoria]]
+DICIONARIO_DESCRICOES = list(dict.fromkeys(descricao for _, descricao in DESCRICOES))
+
+def gerar_data_aleatoria(rng=random):
+    return DATA_INICIO + timedelta(days=rng.randint(0, (DATA_FIM - DATA_INICIO).days))
+
+def gerar_valor(categoria, rng=random):
+    minimo, maximo = faixas_valor.get(categoria, (20, 200))
+    return round(rng.uniform(minimo, maximo), 2)
+
+def linha_csv(*campos):
+    # Campos como o csv.writer os grava (aspas quando necessário), sem o fim de linha
+    buffer = io.StringIO()
+    csv.writer(buffer, delimiter=";").writerow(campos)
+    return buffer.getvalue()[:-2]
+
+def tamanho_shard(total, shard, shards):
+    return total // shards + (1 if shard < total % shards else 0)
+
+def gerar_transacoes(total=2000, seed=42, shard=0, shards=1):
+    # Gera as linhas de um shard sob demanda, sem guardar o conjunto em memória.
+    # Cada shard tem o próprio gerador (seed, shard, shards): o resultado não depende do número de processos.
+    # Cada descrição aparece ao menos uma vez: as obrigatórias são distribuídas entre os shards
+    # e ocupam posições sorteadas dentro do shard.
+    total = max(total, len(DESCRICOES_OBRIGATORIAS))
+    rng = random.Random(f"{seed}/{shard}/{shards}")
+    linhas = tamanho_shard(total, shard, shards)
+    obrigatorias = DESCRICOES_OBRIGATORIAS[shard::shards]
+    posicoes = dict(zip(rng.sample(range(linhas), len(obrigatorias)), obrigatorias))
+
+    total_datas = len(DATAS)
+    for inicio in range(0, linhas, BLOCO):
+        sorteadas = rng.choices(CATEGORIAS, cum_weights=PESOS_ACUMULADOS, k=min(BLOCO, linhas - inicio))
+        for posicao, categoria in enumerate(sorteadas, inicio):
+            obrigatoria = posicoes.get(posicao)
+            if obrigatoria:
+                categoria, descricao = obrigatoria
+            else:
+                descricao = rng.choice(categorias[categoria])
+            minimo, maximo = faixas_valor.get(categoria, (20, 200))
+            yield [DATAS[rng.randrange(total_datas)], descricao, categoria, round(rng.uniform(minimo, maximo), 2)]
+
+def gerar_transacoes_completas(total=2000, seed=42):
+    # Conjunto completo em um único shard (mantido para uso interativo)
+    return list(gerar_transacoes(total, seed))
+
+def gerar_colunas(total=2000, seed=42, shard=0, shards=1, bloco=BLOCO_NUMPY):
+    # Modo vetorizado: mesmas distribuições de gerar_transacoes (outra sequência de sorteios),
+    # com cada bloco gerado de uma vez por numpy.random.Generator.
+    # Retorna blocos (datas datetime64, índice em DESCRICOES, índice em CATEGORIAS, valores).
+    import numpy as np
+
+    total = max(total, len(DESCRICOES_OBRIGATORIAS))
+    rng = np.random.default_rng([seed, shard, shards])
+    linhas = tamanho_shard(total, shard, shards)
 
-def gerar_valor(categoria):
-    faixa = {
-        "ABS": (50, 1000),
-        "AGU": (50, 500),
-        "APL": (1, 1000),
-        "ASS": (10, 300),
-        "BAR": (30, 2000),
-        "CAS": (150, 4200),
-        "CRD": (150, 15000),
-        "EDU": (100, 3000),
-        "IMP": (20, 500),
-        "JUR": (1, 1000),
-        "LAZ": (50, 20000),
-        "LOJ": (50, 2000),
-        "MAN": (100, 5000),
-        "MER": (80, 2000),
-        "PED": (30, 1000),
-        "PET": (30, 1000),
-        "SAL": (1500, 10000),
-        "SAU": (80, 1500),
-        "SEG": (200, 3000),
-        "TAR": (5, 100),
-        "TRP": (5, 60)
-    }
-    minimo, maximo = faixa.get(categoria, (20, 200))
-    return round(random.uniform(minimo, maximo), 2)
+    # Descrições de todas as categorias em um único array (repetidas contam em dobro, como em rng.choice)
+    inicio_categoria = np.array([DESCRICOES.index((categoria, categorias[categoria][0])) for categoria in CATEGORIAS])
+    quantidade = np.array([len(categorias[categoria]) for categoria in CATEGORIAS])
+    minimo = np.array([faixas_valor.get(categoria, (20, 200))[0] for categoria in CATEGORIAS], dtype=float)
+    maximo = np.array([faixas_valor.get(categoria, (20, 200))[1] for categoria in CATEGORIAS], dtype=float)
+    probabilidades = np.array([pesos_categorias[categoria] for categoria in CATEGORIAS], dtype=float)
+    probabilidades /= probabilidades.sum()
+    indice_categoria = {categoria: i for i, categoria in enumerate(CATEGORIAS)}
 
-def gerar_transacoes_completas():
-    # Primeiro: garantir que cada descrição apareça pelo menos uma vez
-    transacoes_obrigatorias = []
-    descricoes_utilizadas = defaultdict(set)
-    
-    for categoria, descricoes in categorias.items():
-        for descricao in descricoes:
-            data = gerar_data_aleatoria().strftime("%Y-%m-%d")
-            valor = gerar_valor(categoria)
-            transacoes_obrigatorias.append([data, descricao, categoria, valor])
-            descricoes_utilizadas[categoria].add(descricao)
-    
-    # Segundo: gerar transações adicionais com distribuição ponderada
-    transacoes_adicionais = []
-    total_transacoes = 2000
-    transacoes_restantes = total_transacoes - len(transacoes_obrigatorias)
-    
-    # Criar lista de categorias baseada nos pesos para seleção ponderada
-    categorias_pesadas = []
-    for categoria, peso in pesos_categorias.items():
-        categorias_pesadas.extend([categoria] * peso)
-    
-    for _ in range(transacoes_restantes):
-        categoria = random.choice(categorias_pesadas)
-        
-        # Escolher entre descrições não utilizadas ou aleatórias
-        descricoes_nao_utilizadas = list(set(categorias[categoria]) - descricoes_utilizadas[categoria])
-        
-        if descricoes_nao_utilizadas and random.random() < 0.3:  # 30% de chance de pegar uma não utilizada
-            descricao = random.choice(descricoes_nao_utilizadas)
-            descricoes_utilizadas[categoria].add(descricao)
+    # Obrigatórias: posições sorteadas no shard, em ordem para localizar as de cada bloco
+    obrigatorias = DESCRICOES_OBRIGATORIAS[shard::shards]
+    posicoes = rng.choice(linhas, size=len(obrigatorias), replace=False)
+    ordem = np.argsort(posicoes)
+    posicoes = posicoes[ordem]
+    obrigatorias_descricao = np.array([DESCRICOES.index(item) for item in obrigatorias], dtype=np.int64)[ordem]
+    obrigatorias_categoria = np.array([indice_categoria[categoria] for categoria, _ in obrigatorias], dtype=np.int64)[ordem]
+
+    dias = (DATA_FIM - DATA_INICIO).days + 1
+    for inicio in range(0, linhas, bloco):
+        tamanho = min(bloco, linhas - inicio)
+        categoria = rng.choice(len(CATEGORIAS), size=tamanho, p=probabilidades)
+        descricao = inicio_categoria[categoria] + (rng.random(tamanho) * quantidade[categoria]).astype(np.int64)
+        a, b = np.searchsorted(posicoes, [inicio, inicio + tamanho])
+        categoria[posicoes[a:b] - inicio] = obrigatorias_categoria[a:b]
+        descricao[posicoes[a:b] - inicio] = obrigatorias_descricao[a:b]
+        valores = np.round(minimo[categoria] + rng.random(tamanho) * (maximo[categoria] - minimo[categoria]), 2)
+        datas = np.datetime64(DATA_INICIO.date()) + rng.integers(0, dias, tamanho)
+        yield datas, descricao, categoria, valores
+
+def gravar_shard(caminho, total, seed, shard, shards, modo="python"):
+    # Grava um shard e calcula a cobertura de descrições na mesma passagem
+    cobertura = defaultdict(set)
+    contagem = Counter()
+    with open(caminho, mode="w", newline="", encoding="utf-8") as arquivo:
+        writer = csv.writer(arquivo, delimiter=";")
+        writer.writerow(CABECALHO)
+        if modo == "numpy":
+            import numpy as np
+
+            # Linhas montadas por tabelas de texto já prontas (data, "descrição;categoria", reais e
+            # centavos), com o mesmo texto do csv.writer no modo python
+            datas_texto = np.array([f"{data};" for data in DATAS], dtype=object)
+            descricoes_texto = np.array([f"{linha_csv(descricao, categoria)};" for categoria, descricao in DESCRICOES], dtype=object)
+            reais_texto = np.array([str(reais) for reais in range(max(maximo for _, maximo in faixas_valor.values()) + 1)], dtype=object)
+            centavos_texto = np.array([repr(centavos / 100)[1:] for centavos in range(100)], dtype=object)
+            por_descricao = np.zeros(len(DESCRICOES), dtype=np.int64)
+            for datas, descricao, categoria, valores in gerar_colunas(total, seed, shard, shards):
+                dias = (datas - np.datetime64(DATA_INICIO.date())).astype(np.int64)
+                reais, centavos = np.divmod(np.rint(valores * 100).astype(np.int64), 100)
+                colunas = (datas_texto[dias].tolist(), descricoes_texto[descricao].tolist(),
+                           reais_texto[reais].tolist(), centavos_texto[centavos].tolist())
+                arquivo.write("".join(map("".join, zip(*colunas, itertools.repeat("\r\n", len(dias))))))
+                por_descricao += np.bincount(descricao, minlength=len(DESCRICOES))
+            cobertura, contagem = cobertura_por_descricao(por_descricao)
         else:
-            descricao = random.choice(categorias[categoria])
-        
-        data = gerar_data_aleatoria().strftime("%Y-%m-%d")
-        valor = gerar_valor(categoria)
-        transacoes_adicionais.append([data, descricao, categoria, valor])
-    
-    # Combinar e embaralhar todas as transações
-    todas_transacoes = transacoes_obrigatorias + transacoes_adicionais
-    random.shuffle(todas_transacoes)
-    
-    return todas_transacoes
+            for transacao in gerar_transacoes(total, seed, shard, shards):
+                writer.writerow(transacao)
+                cobertura[transacao[2]].add(transacao[1])
+                contagem[transacao[2]] += 1
+    return caminho, cobertura, contagem
+
+def cobertura_por_descricao(por_descricao):
+    # Cobertura e contagem por categoria a partir das ocorrências de cada índice de DESCRICOES
+    cobertura = defaultdict(set)
+    contagem = Counter()
+    for i in por_descricao.nonzero()[0]:
+        categoria, descricao = DESCRICOES[i]
+        cobertura[categoria].add(descricao)
+        contagem[categoria] += int(por_descricao[i])
+    return cobertura, contagem
+
+def blocos_transacoes(total, seed, shard, shards, bloco=BLOCO):
+    # Linhas do modo python agrupadas em blocos de colunas, no mesmo formato de gerar_colunas
+    import numpy as np
+
+    indice_descricao = {item: i for i, item in reversed(list(enumerate(DESCRICOES)))}
+    indice_categoria = {categoria: i for i, categoria in enumerate(CATEGORIAS)}
+    transacoes = gerar_transacoes(total, seed, shard, shards)
+    while True:
+        lote = list(itertools.islice(transacoes, bloco))
+        if not lote:
+            return
+        yield (np.array([data for data, _, _, _ in lote], dtype="datetime64[D]"),
+               np.array([indice_descricao[(categoria, descricao)] for _, descricao, categoria, _ in lote], dtype=np.int64),
+               np.array([indice_categoria[categoria] for _, _, categoria, _ in lote], dtype=np.int64),
+               np.array([valor for _, _, _, valor in lote], dtype=np.float64))
+
+def preparar_colunas(saida, linhas, **meta):
+    # Cria os .npy com o tamanho final (os shards escrevem cada um a sua faixa) e o meta.json
+    import numpy as np
+
+    os.makedirs(saida, exist_ok=True)
+    arquivos = []
+    for nome, dtype in COLUNAS_NPY.items():
+        arquivos.append(os.path.join(saida, f"{nome}.npy"))
+        np.lib.format.open_memmap(arquivos[-1], mode="w+", dtype=dtype, shape=(linhas,)).flush()
+    with open(os.path.join(saida, META_COLUNAS), mode="w", encoding="utf-8") as arquivo:
+        json.dump(dict(meta, linhas=linhas, colunas={nome: f"{nome}.npy" for nome in COLUNAS_NPY},
+                       dicionarios={"descricao": DICIONARIO_DESCRICOES, "categoria": CATEGORIAS}),
+                  arquivo, ensure_ascii=False, indent=2)
+    return arquivos
 
-# Gerar e salvar o CSV
-with open("transacoes_completas.csv", mode="w", newline="", encoding="utf-8") as arquivo: #utf-8
-    writer = csv.writer(arquivo, delimiter=";")
-    writer.writerow(["data", "descricao", "categoria", "Valor"])
-    
-    for transacao in gerar_transacoes_completas():
-        writer.writerow(transacao)
-        
-# Verificar cobertura de descrições
-with open("transacoes_completas.csv", mode="r", encoding="utf-8") as arquivo:
-    reader = csv.reader(arquivo, delimiter=";")
-    next(reader)  # Pular cabeçalho
-    transacoes_geradas = list(reader)
+def gravar_shard_colunas(saida, inicio, total, seed, shard, shards, modo="python"):
+    # Escreve as linhas do shard a partir de `inicio` nos .npy (memory-map) e calcula a cobertura
+    import numpy as np
 
-descricoes_geradas = defaultdict(set)
-for _, descricao, categoria, _ in transacoes_geradas:
-    descricoes_geradas[categoria].add(descricao)
+    colunas = {nome: np.load(os.path.join(saida, f"{nome}.npy"), mmap_mode="r+") for nome in COLUNAS_NPY}
+    codigo_descricao = np.array([DICIONARIO_DESCRICOES.index(descricao) for _, descricao in DESCRICOES], dtype=np.int32)
+    por_descricao = np.zeros(len(DESCRICOES), dtype=np.int64)
+    blocos = gerar_colunas if modo == "numpy" else blocos_transacoes
+    for datas, descricao, categoria, valores in blocos(total, seed, shard, shards):
+        fim = inicio + len(datas)
+        colunas["data"][inicio:fim] = datas
+        colunas["descricao"][inicio:fim] = codigo_descricao[descricao]
+        colunas["categoria"][inicio:fim] = categoria
+        colunas["valor"][inicio:fim] = valores
+        por_descricao += np.bincount(descricao, minlength=len(DESCRICOES))
+        inicio = fim
+    for coluna in colunas.values():
+        coluna.flush()
+    return (saida, *cobertura_por_descricao(por_descricao))
 
-print("Descrições não geradas por categoria:")
-for categoria in categorias:
-    faltantes = set(categorias[categoria]) - descricoes_geradas.get(categoria, set())
-    if faltantes:
-        print(f"{categoria}: {len(faltantes)} faltantes")
+def caminhos_shards(saida, shards):
+    if shards == 1:
+        return [saida]
+    os.makedirs(saida, exist_ok=True)
+    return [os.path.join(saida, f"transacoes_{shard:05d}.csv") for shard in range(shards)]
+
+def gerar_dataset(total=2000, seed=42, shards=1, jobs=None, saida=ARQUIVO_SAIDA, modo="python", formato="csv"):
+    # Gera os shards em um pool de processos e junta a cobertura de cada um
+    if formato == "npy":
+        linhas = max(total, len(DESCRICOES_OBRIGATORIAS))
+        inicios = list(itertools.accumulate((tamanho_shard(linhas, shard, shards) for shard in range(shards)), initial=0))
+        caminhos = preparar_colunas(saida, linhas, seed=seed, shards=shards, modo=modo)
+        tarefa = gravar_shard_colunas
+        argumentos = [(saida, inicios[shard], total, seed, shard, shards, modo) for shard in range(shards)]
+    else:
+        caminhos = caminhos_shards(saida, shards)
+        tarefa = gravar_shard
+        argumentos = [(caminho, total, seed, shard, shards, modo) for shard, caminho in enumerate(caminhos)]
+    jobs = min(jobs or os.cpu_count() or 1, shards)
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            resultados = list(pool.map(tarefa, *zip(*argumentos)))
     else:
-        print(f"{categoria}: TODAS descrições geradas")
\ No newline at end of file
+        resultados = [tarefa(*argumento) for argumento in argumentos]
+
+    cobertura = defaultdict(set)
+    contagem = Counter()
+    for _, cobertura_shard, contagem_shard in resultados:
+        for categoria, descricoes in cobertura_shard.items():
+            cobertura[categoria] |= descricoes
+        contagem.update(contagem_shard)
+    faltantes = {categoria: set(descricoes) - cobertura.get(categoria, set()) for categoria, descricoes in categorias.items()}
+    return {"arquivos": caminhos, "linhas": sum(contagem.values()), "contagem": contagem, "faltantes": faltantes}
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera o CSV sintético de transações categorizadas")
+    parser.add_argument("--linhas", type=int, default=2000, help="Total de transações (mínimo: uma por descrição)")
+    parser.add_argument("--seed", type=int, default=42, help="Semente (mesma semente e shards: mesmos arquivos)")
+    parser.add_argument("--shards", type=int, default=1, help="Quantidade de arquivos de saída")
+    parser.add_argument("--jobs", type=int, help="Processos usados (padrão: todos os núcleos)")
+    parser.add_argument("--saida", help="Arquivo (1 shard) ou diretório dos shards ou das colunas (npy)")
+    parser.add_argument("--modo", choices=MODOS, default="python", help="numpy: colunas inteiras por bloco (requer numpy)")
+    parser.add_argument("--formato", choices=FORMATOS, default="csv", help="npy: um .npy por coluna com dicionários (requer numpy)")
+    args = parser.parse_args()
+    saida = args.saida or (os.path.splitext(ARQUIVO_SAIDA)[0] if args.formato == "npy" else ARQUIVO_SAIDA)
+
+    inicio = time.perf_counter()
+    resultado = gerar_dataset(args.linhas, args.seed, args.shards, args.jobs, saida, args.modo, args.formato)
+    print(f"{resultado['linhas']} transações em {len(resultado['arquivos'])} arquivo(s) ({time.perf_counter() - inicio:.1f}s)")
+
+    # Verificar cobertura de descrições
+    print("Descrições não geradas por categoria:")
+    for categoria, faltantes in resultado["faltantes"].items():
+        if faltantes:
+            print(f"{categoria}: {len(faltantes)} faltantes")
+        else:
+            print(f"{categoria}: TODAS descrições geradas")
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,7 @@ from schemas.schema import (
     TransactionsSchema, 
     TransactionsSearchSchema, 
     TransactionsUpdateSchema,
+    TransactionsBulkSchema,
     TransactionsClass
 ) 
 
@@ -28,6 +29,7 @@ from constants.message import CONNECTION_ERROR_LOG, API_TIMEOUT_MSG
 from constants.message import CONNECTION_ERROR_MSG, CONTENT_TYPE_JSON
 from constants.url import CATEGORY_API_URL, BANK_API_URL, RESOURCE_API_URL
 from constants.url import BRANCH_API_URL, ACCOUNT_API_URL, TRANSACTION_API_URL
+from constants.url import TRANSACTION_BULK_TIMEOUT
 from constants.authentication import API2_TOKEN
 
 import logging, requests
@@ -145,7 +147,7 @@ def error_handling(f):
 #**************************************************************************************************
 #* Helper function for API redirection                                                            *
 #**************************************************************************************************
-def redirect_to_api(method, url, headers=None):
+def redirect_to_api(method, url, headers=None, timeout=10):
     """
     Auxilia a função no redirecionamento para diferentes métodos.
     """
@@ -161,12 +163,14 @@ def redirect_to_api(method, url, headers=None):
 
     logger.debug(f"Cabeçalhos enviados: {headers}")
     
+    # Os parâmetros da query string (ex.: paginação) são repassados sem alteração
     response = requests.request(
         method=method,
         url=url,
+        params=list(request.args.items(multi=True)),
         json=data,
         headers=headers, 
-        timeout=10
+        timeout=timeout
     )
     response.raise_for_status()
     logger.debug(f"Resposta da API externa: {response.json()}")
@@ -389,9 +393,19 @@ def delete_account(body: AccountsSearchSchema):
 def transaction():
     """
     Redireciona as requisições GET para a API Transaction.
+    Paginação: ?limit=100&after_id=<next_cursor da página anterior>.
     """
     return redirect_to_api('GET', TRANSACTION_API_URL)
 
+@app.get('/transaction/summary', tags=[transaction_tag])
+@error_handling
+def transaction_summary():
+    """
+    Redireciona as requisições GET do resumo (totais por mês, categoria e tipo) para a API Transaction.
+    Período: ?year=2025&month=1.
+    """
+    return redirect_to_api('GET', f"{TRANSACTION_API_URL}/summary")
+
 @app.post('/transaction', tags=[transaction_tag])
 @error_handling
 def post_transaction(body: TransactionsSchema):
@@ -400,6 +414,14 @@ def post_transaction(body: TransactionsSchema):
     """
     return redirect_to_api('POST', TRANSACTION_API_URL)
 
+@app.post('/transaction/bulk', tags=[transaction_tag])
+@error_handling
+def post_transaction_bulk(body: TransactionsBulkSchema):
+    """
+    Redireciona as inserções em lote para a API Transaction (resultado de cada transação na resposta).
+    """
+    return redirect_to_api('POST', f"{TRANSACTION_API_URL}/bulk", timeout=TRANSACTION_BULK_TIMEOUT)
+
 @app.delete('/transaction', tags=[transaction_tag])
 @error_handling
 def delete_transaction(body: TransactionsSearchSchema):
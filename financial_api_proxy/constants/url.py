@@ -4,4 +4,7 @@ BANK_API_URL = "http://localhost:5002/bank"
 RESOURCE_API_URL = "http://localhost:5003/resource"
 BRANCH_API_URL = "http://localhost:5004/branch"
 ACCOUNT_API_URL = "http://localhost:5005/account"
-TRANSACTION_API_URL = "http://localhost:5006/transaction"
\ No newline at end of file
+TRANSACTION_API_URL = "http://localhost:5006/transaction"
+
+# Tempo limite (segundos) de POST /transaction/bulk: lotes grandes são classificados e gravados numa requisição
+TRANSACTION_BULK_TIMEOUT = 120
\ No newline at end of file
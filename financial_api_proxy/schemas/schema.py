@@ -255,6 +255,12 @@ class TransactionsUpdateSchema(BaseModel):
     transaction_value:  Optional[float] = Field(None, examples=[EXEMPLE_VALUE])
     transaction_status:  Optional[str] = Field(None, min_length=1, max_length=1, examples=[EXEMPLE_STATUS])
 
+class TransactionsBulkSchema(BaseModel):
+    """ 
+    Define como um lote de transações deve ser enviado (cada item como TransactionsSchema). 
+    """
+
+    transactions: List[dict] = Field(..., min_length=1, max_length=20000)
 
 class TransactionsClass(BaseModel):
     """ 
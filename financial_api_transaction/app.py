@@ -1,38 +1,87 @@
 import logging, requests
+import csv
+import io
+import json
+import os
+import sys
+import time
+import calendar
 import joblib
 import pickle
 import numpy as np
 
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.preprocessing import LabelEncoder
-from keras.preprocessing.sequence import pad_sequences
-from keras.models import load_model
-from keras.layers import Dense
 from functools import wraps
 from datetime import date, datetime
 from typing import Optional
 
-from flask import Flask, jsonify, request, redirect
+from flask import Flask, Response, jsonify, request, redirect, stream_with_context
 from flask_openapi3.blueprint import APIBlueprint 
 from flask_openapi3.openapi import OpenAPI
 from flask_openapi3.models.info import Info
 from flask_openapi3.models.tag import Tag
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from pydantic import ValidationError
+from sqlalchemy import func, insert, select, update
 from sqlalchemy.exc import IntegrityError, DataError
 
 from models import Session
-from models.table import Transactions
+from models.table import Transactions, CategoryFeedback, transaction_filters
 from schemas.table import (TransactionsViewSchema, 
                            TransactionsDelSchema, 
                            TransactionsSchema, 
                            TransactionsUpdateSchema, 
                            TransactionsSearchSchema, 
                            ListTransactionsSchema,
-                           TransactionsClass
+                           TransactionsPageSchema,
+                           TransactionsExportSchema,
+                           TransactionsSummaryQuerySchema,
+                           TransactionsSummarySchema,
+                           TransactionsBulkSchema,
+                           TransactionsBulkViewSchema,
+                           TransactionsClass,
+                           TransactionsClassBatchSchema,
+                           TransactionsClassBatchViewSchema
 )
 from schemas.error import ErrorSchema
+from schemas.classifier import ModelVersionSchema, ModelVersionsViewSchema
 from collections import Counter
+from classifier import PredictionCache, CascadeStats, InferenceExecutor, artifacts_fingerprint, run_cascade
+from classifier import NumpyCNN, ModelRegistry, ModelVersions, MicroBatcher, load_tokenizer, encode_sequences
+from classifier import FeatureExtractor, COMPACT_DIR, load_artifact, export_directory, OnlineLearner
+from constants.classifier import (MODELS_DIR,
+                                  MANIFEST_CHECK_INTERVAL_SECONDS,
+                                  MODEL_WARMUP,
+                                  ARTIFACT_FORMAT,
+                                  CNN_BACKEND,
+                                  VOTE_MODE,
+                                  CASCADE_LOG_EVERY,
+                                  STUDENT_CONFIDENCE,
+                                  INFERENCE_POOL_SIZE,
+                                  INFERENCE_TIMEOUT_SECONDS,
+                                  INFERENCE_TIMEOUTS,
+                                  INFERENCE_PROCESS_POOL_SIZE,
+                                  CLASSIFIER_BACKEND,
+                                  SIDECAR_SOCKET,
+                                  SIDECAR_TIMEOUT_SECONDS,
+                                  SIDECAR_CHECK_INTERVAL_SECONDS,
+                                  SIDECAR_MAX_FAILURES,
+                                  MICROBATCH_ENABLED,
+                                  MICROBATCH_MAX_SIZE,
+                                  MICROBATCH_MAX_WAIT_MS,
+                                  ONLINE_LEARNING,
+                                  ONLINE_INTERVAL_SECONDS,
+                                  ONLINE_MIN_FEEDBACK,
+                                  ONLINE_MAX_FEEDBACK,
+                                  ONLINE_SAMPLE_WEIGHT,
+                                  ONLINE_KEEP_VERSIONS,
+                                  CACHE_MAX_SIZE,
+                                  CACHE_TTL_SECONDS,
+                                  CACHE_CHECK_INTERVAL_SECONDS
+)
+from constants.transaction import TRANSACTION_YIELD_PER, TRANSACTION_EXPORT_FORMATS, TRANSACTION_BULK_CHUNK
 
 # Cria um logger
 logger = logging.getLogger(__name__) 
@@ -61,6 +110,7 @@ app = OpenAPI(__name__, info=info)
 
 # Constantes
 ERRO_DE_INTEGRIDADE = "Erro de integridade"
+CNN_BATCH_SIZE = 256  # Linhas por chamada do Keras na classificação em lote
 CORS(app)  # Configuração segura do CORS
 
 # Configuração do JWT para autenticação
@@ -71,26 +121,250 @@ jwt = JWTManager(app)
 transaction_api = APIBlueprint('transaction_api', __name__)
 
 # Modelo de predição
-modelo1 = joblib.load('./models/logistic_regression_model.pkl')
-modelo2 = joblib.load('./models/random_forest_model.pkl')
-modelo3 = joblib.load('./models/naive_bayes_model.pkl')
-modelo4 = load_model('./models/cnn_model.h5')
-modelo4.compile(
-    optimizer ='adam',
-    loss = 'categorical_crossentropy', #'binary_crossentropy' dependendo do seu caso
-    metrics = ['accuracy']
+def load_cnn(path):
+    """Carrega a CNN com o backend configurado"""
+    if CNN_BACKEND == "numpy":
+        # Forward da CNN em NumPy: o processo não importa keras/tensorflow
+        modelo = NumpyCNN.load(path)
+        if not modelo.has_weights:
+            logger.warning("cnn_model.h5 não contém pesos treinados; a CNN vai se abster da votação")
+        return modelo
+
+    from keras.models import load_model
+    modelo = load_model(path)
+    modelo.compile(
+        optimizer ='adam',
+        loss = 'categorical_crossentropy', #'binary_crossentropy' dependendo do seu caso
+        metrics = ['accuracy']
+    )
+    return modelo
+
+def load_pickle(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+def build_registry(directory):
+    """
+    Cria o registro com os artefatos de uma versão. Os artefatos são carregados sob demanda
+    (ou pela thread de aquecimento), assim os endpoints que não classificam atendem antes
+    do fim do carregamento.
+    """
+    path = lambda name: os.path.join(directory, name)
+    loaders = None
+    if ARTIFACT_FORMAT == "compact":
+        compact_dir = os.path.join(directory, COMPACT_DIR)
+        if os.path.isdir(compact_dir):
+            # Arrays mapeados em memória: carregamento imediato e páginas compartilhadas entre workers
+            compact = lambda name: lambda: load_artifact(os.path.join(compact_dir, name))
+            loaders = {
+                "modelo1":     compact('logistic_regression_model'),
+                "vectorizer1": compact('logistic_regression_vectorizer'),
+                "modelo2":     compact('random_forest_model'),
+                "vectorizer2": compact('random_forest_vectorizer'),
+                "modelo3":     compact('naive_bayes_model'),
+                "vectorizer3": compact('naive_bayes_vectorizer'),
+                "vectorizer4": compact('cnn_tokenizer'),
+                "encoder":     compact('cnn_label_encoder'),
+                "modelo4":     lambda: load_cnn(path('cnn_model.h5'))
+            }
+        else:
+            logger.warning(f"{compact_dir} não encontrado; usando os arquivos .pkl")
+
+    if loaders is None:
+        loaders = {
+            "modelo1":     lambda: joblib.load(path('logistic_regression_model.pkl')),
+            "vectorizer1": lambda: joblib.load(path('logistic_regression_vectorizer.pkl')),
+            "modelo2":     lambda: joblib.load(path('random_forest_model.pkl')),
+            "vectorizer2": lambda: joblib.load(path('random_forest_vectorizer.pkl')),
+            "modelo3":     lambda: joblib.load(path('naive_bayes_model.pkl')),
+            "vectorizer3": lambda: joblib.load(path('naive_bayes_vectorizer.pkl')),
+            # O tokenizer é lido sem o Keras (mesmo resultado de texts_to_sequences)
+            "vectorizer4": lambda: load_tokenizer(path('cnn_tokenizer.pkl')),
+            "encoder":     lambda: load_pickle(path('cnn_label_encoder.pkl')),
+            "modelo4":     lambda: load_cnn(path('cnn_model.h5'))
+        }
+
+    # Modelo aluno (python -m training --distill): só nas versões em que foi gerado
+    if os.path.exists(path('student_model.pkl')):
+        loaders["student"] = lambda: joblib.load(path('student_model.pkl'))
+    return ModelRegistry(loaders, logger=logger)
+
+def smoke_test(registry):
+    """Predição de teste com cada modelo de uma nova versão antes de ativá-la"""
+    description = ["pay auto posto"]
+    registry.get("modelo1").predict(registry.get("vectorizer1").transform(description))
+    registry.get("modelo2").predict(registry.get("vectorizer2").transform(description))
+    registry.get("modelo3").predict(description)
+    padded = encode_sequences(registry.get("vectorizer4"), description, maxlen=100)
+    pred = registry.get("modelo4").predict(padded, verbose=0)
+    registry.get("encoder").inverse_transform(np.argmax(pred, axis=1))
+    if "student" in registry:
+        registry.get("student").predict_proba(description)
+
+# Versões dos artefatos (models/<versão>/) e versão ativa
+model_versions = ModelVersions(MODELS_DIR, build_registry, smoke_test=smoke_test, logger=logger)
+
+modelo1 = model_versions.proxy("modelo1")
+modelo2 = model_versions.proxy("modelo2")
+modelo3 = model_versions.proxy("modelo3")
+modelo4 = model_versions.proxy("modelo4")
+vectorizer1 = model_versions.proxy("vectorizer1")
+vectorizer2 = model_versions.proxy("vectorizer2")
+vectorizer3 = model_versions.proxy("vectorizer3")
+vectorizer4 = model_versions.proxy("vectorizer4")
+encoder = model_versions.proxy("encoder")
+
+# No modo sidecar os modelos ficam apenas no processo classificador
+if MODEL_WARMUP == "background" and CLASSIFIER_BACKEND == "local":
+    model_versions.current.start_warmup()
+
+# Cada worker repete as trocas de versão gravadas no manifest pelos demais (ativação, rollback,
+# aprendizado incremental); no modo sidecar há um único processo com os modelos
+if CLASSIFIER_BACKEND == "local" and MANIFEST_CHECK_INTERVAL_SECONDS > 0:
+    model_versions.watch_manifest(MANIFEST_CHECK_INTERVAL_SECONDS)
+
+# Cache das categorias previstas, invalidado quando os artefatos da versão ativa mudam
+prediction_cache = PredictionCache(
+    maxsize = CACHE_MAX_SIZE,
+    ttl = CACHE_TTL_SECONDS,
+    fingerprint = lambda: artifacts_fingerprint(model_versions.active_dir,
+                                                subdirs=(COMPACT_DIR,) if ARTIFACT_FORMAT == "compact" else ()),
+    check_interval = CACHE_CHECK_INTERVAL_SECONDS
 )
-vectorizer1 = joblib.load('./models/logistic_regression_vectorizer.pkl') 
-vectorizer2 = joblib.load('./models/random_forest_vectorizer.pkl')
-vectorizer3 = joblib.load('./models/naive_bayes_vectorizer.pkl')
-
-with open('./models/cnn_tokenizer.pkl', 'rb') as f:
-    vectorizer4 = pickle.load(f)
-with open('./models/cnn_label_encoder.pkl', 'rb') as f:
-    encoder = pickle.load(f)
+
+# Extração de atributos compartilhada: vectorizers idênticos (LR e RF) transformam uma única vez
+feature_extractor = FeatureExtractor()
+
+# Estatísticas da votação em cascata (etapa que decidiu cada resultado)
+cascade_stats = CascadeStats(["lr+nb", "rf", "cnn"], logger=logger, log_every=CASCADE_LOG_EVERY)
+
+# Estatísticas do modo student (descrições respondidas pelo aluno e pelo ensemble)
+student_stats = CascadeStats(["student", "ensemble"], logger=logger, log_every=CASCADE_LOG_EVERY)
+
+def process_models(directory):
+    """Modelos executados no pool de processos: (modelo, vectorizer) do Randon Forest"""
+    return {"rf": (os.path.join(directory, 'random_forest_model.pkl'),
+                   os.path.join(directory, 'random_forest_vectorizer.pkl'))}
+
+# Executor das predições em paralelo (criado apenas no modo "parallel")
+inference_executor = None
+if VOTE_MODE == "parallel":
+    inference_executor = InferenceExecutor(
+        max_workers = INFERENCE_POOL_SIZE,
+        timeout = INFERENCE_TIMEOUT_SECONDS,
+        timeouts = INFERENCE_TIMEOUTS,
+        process_models = process_models(model_versions.active_dir),
+        process_workers = INFERENCE_PROCESS_POOL_SIZE,
+        logger = logger
+    )
+
+def on_model_swap(versions):
+    """Após a troca de versão: esvazia o cache e recarrega o pool de processos"""
+    prediction_cache.invalidate()
+    if inference_executor:
+        inference_executor.reload_process_models(process_models(versions.active_dir))
+
+model_versions.on_swap.append(on_model_swap)
+
+# Processo classificador compartilhado (CLASSIFIER_BACKEND=sidecar): o worker web envia as
+# descrições por socket Unix e o supervisor reinicia o processo se ele parar de responder
+sidecar_client = None
+sidecar_supervisor = None
+if CLASSIFIER_BACKEND == "sidecar":
+    # Importado apenas neste modo: socket Unix e fcntl não existem no Windows
+    from classifier.sidecar import SidecarClient, SidecarSupervisor
+
+    sidecar_client = SidecarClient(SIDECAR_SOCKET, timeout=SIDECAR_TIMEOUT_SECONDS)
+    # O cache do worker segue a versão informada pelo processo classificador (classificação,
+    # PING do supervisor, ativação e rollback), não os artefatos vistos por este worker
+    sidecar_client.on_version_change.append(lambda version: prediction_cache.invalidate())
+    sidecar_supervisor = SidecarSupervisor(
+        [sys.executable, "-m", "classifier.sidecar", "--socket", SIDECAR_SOCKET, "--handler", "app:SidecarHandler"],
+        sidecar_client,
+        check_interval = SIDECAR_CHECK_INTERVAL_SECONDS,
+        max_failures = SIDECAR_MAX_FAILURES,
+        env = {"CLASSIFIER_BACKEND": "local"},
+        cwd = os.path.dirname(os.path.abspath(__file__)),
+        logger = logger
+    )
+    sidecar_supervisor.start()
+
+# Administração das versões: local ou repassada ao processo classificador
+model_admin = sidecar_client or model_versions
+
+class FeedbackStore:
+    """Correções de categoria pendentes (tabela category_feedback) para o aprendizado incremental"""
+
+    def __init__(self):
+        # Correções reservadas por versão, devolvidas por release() se a versão falhar
+        self._claimed = {}
+
+    def pending(self):
+        session = Session()
+        try:
+            return session.query(CategoryFeedback).filter(CategoryFeedback.learned_version.is_(None)).count()
+        finally:
+            session.close()
+
+    def claim(self, version, limit):
+        """
+        Reserva as correções pendentes para a versão (UPDATE condicional: só um processo as recebe)
+        e retorna apenas as linhas que este UPDATE alterou (RETURNING)
+        """
+        session = Session()
+        try:
+            ids = [feedback_id for feedback_id, in session.query(CategoryFeedback.feedback_id)
+                   .filter(CategoryFeedback.learned_version.is_(None))
+                   .order_by(CategoryFeedback.feedback_id).limit(limit)]
+            rows = session.execute(
+                update(CategoryFeedback)
+                .where(CategoryFeedback.feedback_id.in_(ids), CategoryFeedback.learned_version.is_(None))
+                .values(learned_version=version)
+                .returning(CategoryFeedback.feedback_id, CategoryFeedback.transaction_description,
+                           CategoryFeedback.corrected_category)
+                .execution_options(synchronize_session=False)).all()
+            session.commit()
+            rows = sorted(rows)
+            self._claimed[version] = [feedback_id for feedback_id, _, _ in rows]
+            return [(description, category) for _, description, category in rows]
+        finally:
+            session.close()
+
+    def release(self, version):
+        """Devolve as correções reservadas por claim() para uma versão que não foi publicada"""
+        ids = self._claimed.pop(version, [])
+        if not ids:
+            return
+        session = Session()
+        try:
+            session.query(CategoryFeedback).filter(
+                CategoryFeedback.feedback_id.in_(ids),
+                CategoryFeedback.learned_version == version
+            ).update({"learned_version": None}, synchronize_session=False)
+            session.commit()
+        finally:
+            session.close()
+
+# Aprendizado incremental: executado onde os modelos estão carregados (no modo sidecar, no processo classificador)
+online_learner = None
+if ONLINE_LEARNING and CLASSIFIER_BACKEND == "local":
+    online_learner = OnlineLearner(
+        model_versions,
+        FeedbackStore(),
+        interval = ONLINE_INTERVAL_SECONDS,
+        min_feedback = ONLINE_MIN_FEEDBACK,
+        max_feedback = ONLINE_MAX_FEEDBACK,
+        sample_weight = ONLINE_SAMPLE_WEIGHT,
+        keep_versions = ONLINE_KEEP_VERSIONS,
+        # No formato compacto a nova versão também precisa dos arrays .npy
+        after_build = export_directory if ARTIFACT_FORMAT == "compact" else None,
+        logger = logger
+    )
+    online_learner.start()
         
 #define tags
 documentation_tag = Tag(name="Documentação", description="Seleção de documentação: Swager")
+admin_tag         = Tag(name="Administração", description="Versões dos modelos de classificação")
 home_tag          = Tag(name="Inicial", description="Página Inicial")
 transaction_tag   = Tag(name="Transações", description="Adição, visualização e remoção de categories da base")
 
@@ -105,7 +379,7 @@ if __name__ == '__main__':
 #**************************************************************************************************
 @app.before_request
 def validate_token():
-    if request.endpoint in ['documentation', 'static']:  # Exclui rotas públicas
+    if request.endpoint in ['documentation', 'static', 'readiness']:  # Exclui rotas públicas
         return
     
     try:
@@ -171,6 +445,35 @@ def documentation():
     """
     return redirect('/openapi')
     
+#**************************************************************************************************
+#* READY                                                                                          *
+#**************************************************************************************************
+@app.get('/ready', tags=[documentation_tag])
+def readiness():
+    """
+    Informa se os modelos de classificação terminaram de carregar (estado e tempo de cada um).
+    """
+    if sidecar_client is not None:
+        status = sidecar_client.ping() or {}
+        ready = status.get("ready", False)
+        return jsonify({
+            "ready": ready,
+            "version": status.get("active"),
+            "models": status.get("models", {}),
+            "sidecar": sidecar_supervisor.status()
+        }), 200 if ready else 503
+
+    ready = model_versions.is_ready()
+    status = {
+        "ready": ready,
+        "version": model_versions.active_version,
+        "models": model_versions.current.status()
+    }
+    if inference_executor is not None:
+        # Modelos cuja última chamada estourou o prazo e ainda ocupa um worker do pool
+        status["stuck_models"] = inference_executor.stuck()
+    return jsonify(status), 200 if ready else 503
+
 #**************************************************************************************************
 #* GET                                                                                            *
 #**************************************************************************************************
@@ -178,21 +481,38 @@ def documentation():
           responses={"200": ListTransactionsSchema, "404": ErrorSchema})
 
 @with_session
-def get_transaction(session):
+def get_transaction(query: TransactionsPageSchema, session):
     """
-    Faz a busca por todos os itens cadastrado na base de dado.
+    Faz a busca dos itens cadastrados na base de dados, uma página por vez, com filtros opcionais
+    (datas, conta, agência, categoria, recurso, tipo e status).
+    A próxima página é pedida com after_id igual ao next_cursor da resposta (null na última página);
+    order=desc lista das mais recentes para as mais antigas.
     """
     logger.debug(f"Requisição recebida: {request.method} {request.path}")
 
     try:
-        transactions = session.query(Transactions).order_by(Transactions.transaction_id).all()
-        
+        # Paginação por chave: o índice da chave primária leva direto ao início da página,
+        # sem OFFSET; uma linha a mais indica se existe a próxima página
+        descending = query.order == "desc"
+        consulta = session.query(Transactions).filter(*transaction_filters(query.model_dump())) \
+            .order_by(Transactions.transaction_id.desc() if descending else Transactions.transaction_id)
+        if query.after_id is not None:
+            consulta = consulta.filter(Transactions.transaction_id < query.after_id if descending
+                                       else Transactions.transaction_id > query.after_id)
+        transactions = [transaction.to_dict()
+                        for transaction in consulta.limit(query.limit + 1).yield_per(TRANSACTION_YIELD_PER)]
+
+        next_cursor = None
+        if len(transactions) > query.limit:
+            transactions.pop()
+            next_cursor = transactions[-1]["transaction_id"]
+
         if not transactions:
             logger.debug(f"Não há transações cadastradas {request.method} {request.path}")
-            return jsonify({"transaction": []}), 200
+            return jsonify({"transaction": [], "next_cursor": None}), 200
 
         logger.debug(f"{len(transactions)} transações econtradas {request.method} {request.path}")
-        return jsonify({"transaction": [transaction.to_dict() for transaction in transactions]}), 200
+        return jsonify({"transaction": transactions, "next_cursor": next_cursor}), 200
 
     except DataError as e:
         logger.error(f"Erro de dados: {str(e)}")
@@ -206,6 +526,115 @@ def get_transaction(session):
         logger.error(f"Erro no servidor: {str(e)}") 
         return jsonify({"message": f"Erro no servidor: {str(e)}"}), 500
 
+#**************************************************************************************************
+#* SUMMARY                                                                                        *
+#**************************************************************************************************
+def summary_period(criteria, year, month=None):
+    """Restringe as datas dos filtros ao ano (ou ao mês do ano) informado"""
+    start = date(year, month or 1, 1)
+    end = date(year, month or 12, calendar.monthrange(year, month or 12)[1])
+    criteria["transaction_date_from"] = max(d for d in (criteria.get("transaction_date_from"), start) if d)
+    criteria["transaction_date_to"] = min(d for d in (criteria.get("transaction_date_to"), end) if d)
+    return criteria
+
+@app.get('/transaction/summary', tags=[transaction_tag],
+          responses={"200": TransactionsSummarySchema, "500": ErrorSchema})
+
+@with_session
+def summary_transaction(query: TransactionsSummaryQuerySchema, session):
+    """
+    Totais e quantidades de transações por mês, categoria e tipo (D/C), calculados no banco,
+    para o ano (year) ou o mês (year e month) e os mesmos filtros de GET /transaction.
+    """
+    logger.debug(f"Requisição recebida: {request.method} {request.path}")
+
+    criteria = query.model_dump(exclude={"year", "month"})
+    if query.year is not None:
+        criteria = summary_period(criteria, query.year, query.month)
+
+    try:
+        # Um único GROUP BY; o período usa o índice de transaction_date
+        month = func.strftime('%Y-%m', Transactions.transaction_date).label("month")
+        rows = session.query(month, Transactions.category_id, Transactions.transaction_type,
+                             func.sum(Transactions.transaction_value), func.count()) \
+            .filter(*transaction_filters(criteria)) \
+            .group_by(month, Transactions.category_id, Transactions.transaction_type) \
+            .order_by(month, Transactions.category_id, Transactions.transaction_type).all()
+
+        summary, totals = [], {}
+        for month, category_id, transaction_type, total, count in rows:
+            summary.append({"month": month, "category_id": category_id, "transaction_type": transaction_type,
+                            "total": round(total, 2), "count": count})
+            by_type = totals.setdefault(transaction_type, {"total": 0.0, "count": 0})
+            by_type["total"] = round(by_type["total"] + total, 2)
+            by_type["count"] += count
+
+        logger.debug(f"{len(summary)} grupos no resumo {request.method} {request.path}")
+        return jsonify({"summary": summary, "totals": totals}), 200
+
+    except Exception as e:
+        logger.error(f"Erro no servidor: {str(e)}")
+        return jsonify({"message": f"Erro no servidor: {str(e)}"}), 500
+
+#**************************************************************************************************
+#* EXPORT                                                                                         *
+#**************************************************************************************************
+def ndjson_chunk(rows, columns):
+    """Um objeto JSON por linha (datas no formato AAAA-MM-DD)"""
+    return "".join(json.dumps(dict(zip(columns, row)), default=date.isoformat, ensure_ascii=False) + "\n"
+                   for row in rows)
+
+def csv_chunk(rows, columns=None):
+    """Linhas CSV (sem as colunas, enviadas uma vez no início)"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+@app.get('/transaction/export', tags=[transaction_tag], responses={"500": ErrorSchema})
+def export_transactions(query: TransactionsExportSchema):
+    """
+    Exporta todas as transações (com os mesmos filtros de GET /transaction) em NDJSON ou CSV.
+    A resposta é enviada à medida que as linhas são lidas do banco, sem montar a lista inteira.
+    """
+    logger.debug(f"Requisição recebida: {request.method} {request.path}")
+
+    columns = [column.name for column in Transactions.__table__.columns]
+    session = Session()
+    try:
+        # Cursor do banco lido em blocos de TRANSACTION_YIELD_PER linhas (tuplas, sem objetos ORM)
+        result = session.execute(
+            select(*Transactions.__table__.columns)
+            .where(*transaction_filters(query.model_dump()))
+            .order_by(Transactions.transaction_id)
+            .execution_options(stream_results=True, yield_per=TRANSACTION_YIELD_PER))
+    except Exception as e:
+        session.close()
+        logger.error(f"Erro no servidor: {str(e)}")
+        return jsonify({"message": f"Erro no servidor: {str(e)}"}), 500
+
+    encode = ndjson_chunk if query.format == "ndjson" else csv_chunk
+
+    def stream():
+        # O cabeçalho do CSV sai antes da primeira leitura do cursor
+        if query.format == "csv":
+            yield csv_chunk([columns])
+        exported = 0
+        try:
+            for rows in result.partitions():
+                exported += len(rows)
+                yield encode(rows, columns)
+        except Exception as e:
+            # O status 200 já foi enviado: a exportação termina incompleta
+            logger.error(f"Exportação interrompida após {exported} transações: {str(e)}")
+        logger.debug(f"{exported} transações exportadas {request.method} {request.path}")
+
+    mimetype, extension = TRANSACTION_EXPORT_FORMATS[query.format]
+    response = Response(stream_with_context(stream()), mimetype=mimetype,
+                        headers={"Content-Disposition": f"attachment; filename=transactions.{extension}"})
+    # A sessão é fechada ao fim do envio, também quando o cliente desconecta
+    response.call_on_close(session.close)
+    return response
+
 #**************************************************************************************************
 #* POST                                                                                           *
 #**************************************************************************************************
@@ -258,7 +687,7 @@ def add_transaction(body: TransactionsSchema, session):
 
         try:
             desc_text = transaction_data["transaction_description"]
-            category_id = vote_category(desc_text)
+            category_id, model_version = classify_transaction_description(desc_text)
 
         except Exception as e:
             logger.error(f"Erro no modelo de predição: {str(e)}")
@@ -280,7 +709,8 @@ def add_transaction(body: TransactionsSchema, session):
             resource_id = transaction_data["resource_id"],
             transaction_type = transaction_data["transaction_type"],
             transaction_value = transaction_value,
-            transaction_status = transaction_data["transaction_status"]
+            transaction_status = transaction_data["transaction_status"],
+            model_version = model_version
         )
        
         # Adiciona um item ao banco de dados
@@ -300,10 +730,105 @@ def add_transaction(body: TransactionsSchema, session):
         logger.error(f"Erro inesperado: {str(e)}")
         return jsonify({"status": "Falha", "message": f"Erro no servidor: {str(e)}"}), 500
 
+#**************************************************************************************************
+#* BULK                                                                                           *
+#**************************************************************************************************
+def bulk_result(index, transaction_id, status, category_id=None, message=None):
+    return {"index": index, "transaction_id": transaction_id, "status": status,
+            "category_id": category_id, "message": message}
+
+def validate_bulk(rows):
+    """
+    Valida cada transação do lote com TransactionsSchema, numa única passagem.
+    Retorna ([(índice, transação válida)], {índice: resultado das inválidas}).
+    """
+    valid, results, seen = [], {}, set()
+    for index, row in enumerate(rows):
+        try:
+            transaction = TransactionsSchema.model_validate(row)
+        except ValidationError as e:
+            message = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+            results[index] = bulk_result(index, row.get("transaction_id"), "Falha", message=message)
+            continue
+        if transaction.transaction_id in seen:
+            results[index] = bulk_result(index, transaction.transaction_id, "Falha",
+                                         message="transaction_id repetido no lote")
+            continue
+        seen.add(transaction.transaction_id)
+        valid.append((index, transaction))
+    return valid, results
+
+@app.post('/transaction/bulk', tags=[transaction_tag],
+          responses={"200": TransactionsBulkViewSchema, "400": ErrorSchema})
+
+@with_session
+def add_transactions_bulk(body: TransactionsBulkSchema, session):
+    """
+    Adiciona várias transações de uma vez: as descrições são classificadas numa única votação
+    em lote e as linhas gravadas com executemany, com um commit a cada TRANSACTION_BULK_CHUNK.
+    Retorna o resultado de cada transação na ordem do envio.
+    """
+    start = time.perf_counter()
+    valid, results = validate_bulk(body.transactions)
+
+    # Transações já cadastradas não interrompem o lote: são recusadas individualmente
+    ids = [transaction.transaction_id for _, transaction in valid]
+    existing = set()
+    for first in range(0, len(ids), TRANSACTION_BULK_CHUNK):
+        existing.update(session.scalars(select(Transactions.transaction_id)
+                                        .where(Transactions.transaction_id.in_(ids[first:first + TRANSACTION_BULK_CHUNK]))))
+    pending = []
+    for index, transaction in valid:
+        if transaction.transaction_id in existing:
+            results[index] = bulk_result(index, transaction.transaction_id, "Falha", message="Transação já cadastrada")
+        else:
+            pending.append((index, transaction))
+
+    # Uma votação em lote para as descrições distintas, com a mesma versão dos modelos
+    classified, model_version = {}, None
+    if pending:
+        descriptions = list(dict.fromkeys(transaction.transaction_description for _, transaction in pending))
+        try:
+            classified = dict(zip(descriptions, classify_micro_batch(descriptions)))
+        except Exception as e:
+            logger.error(f"Erro no modelo de predição: {str(e)}")
+            return jsonify({
+                "status": "Falha",
+                "message": "Erro ao processar descrições com modelo de predição"
+            }), 400
+        model_version = classified[descriptions[0]][1]
+
+    for first in range(0, len(pending), TRANSACTION_BULK_CHUNK):
+        chunk = pending[first:first + TRANSACTION_BULK_CHUNK]
+        rows = [dict(transaction.model_dump(),
+                     transaction_date=transaction.transaction_date.date(),
+                     transaction_expiration_date=transaction.transaction_expiration_date.date(),
+                     category_id=classified[transaction.transaction_description][0],
+                     model_version=model_version)
+                for _, transaction in chunk]
+        status, message = "Sucesso", None
+        try:
+            session.execute(insert(Transactions), rows)
+            session.commit()
+        except (IntegrityError, DataError) as e:
+            # Inserção concorrente ou dado recusado pelo banco: só este bloco é desfeito
+            session.rollback()
+            logger.error(f"Erro ao gravar o bloco de {len(rows)} transações: {str(e)}")
+            status, message = "Falha", "Erro de duplicidade ou restrição de chave."
+        for (index, transaction), row in zip(chunk, rows):
+            results[index] = bulk_result(index, transaction.transaction_id, status, row["category_id"], message)
+
+    results = [results[index] for index in range(len(body.transactions))]
+    inserted = sum(result["status"] == "Sucesso" for result in results)
+    logger.debug(f"{inserted} de {len(results)} transações gravadas em lote em "
+                 f"{time.perf_counter() - start:.2f}s")
+    return jsonify({"inserted": inserted, "failed": len(results) - inserted,
+                    "model_version": model_version, "results": results}), 200
+
 def predict_category(description, modelo, vectorizer):
     """Faz a predição da categoria para os modelos regressão logística e Randon Forest"""
     try:
-        X = vectorizer.transform([description])
+        X = feature_extractor.transform(vectorizer, [description])
         predicao = modelo.predict(X)
         return predicao[0]
     
@@ -316,7 +841,7 @@ def predict_category_nb(description, modelo):
     try:
         if not isinstance(description, str):
             description = str(description)
-        predicao = modelo.predict([description])
+        predicao = feature_extractor.predict(modelo, [description])
         return predicao[0]
     except Exception as e:
         logger.error(f"Erro ao fazer predição com Naive Bayes: {str(e)}")
@@ -324,8 +849,7 @@ def predict_category_nb(description, modelo):
     
 def predict_category_cnn(description, modelo, tokenizer, encoder, maxlen=100):
     try:
-        seq = tokenizer.texts_to_sequences([description])
-        padded = pad_sequences(seq, maxlen=maxlen)
+        padded = encode_sequences(tokenizer, [description], maxlen=maxlen)
         pred = modelo.predict(padded)
         pred_index = np.argmax(pred)
         pred_label = encoder.inverse_transform([pred_index])[0]
@@ -333,9 +857,61 @@ def predict_category_cnn(description, modelo, tokenizer, encoder, maxlen=100):
     except Exception as e:
         logger.error(f"Erro na predição com CNN: {str(e)}")
         return None
-    
+
+def predict_category_batch(descriptions, modelo, vectorizer):
+    """Faz a predição em lote para os modelos regressão logística e Randon Forest"""
+    try:
+        X = feature_extractor.transform(vectorizer, descriptions)
+        return list(modelo.predict(X))
+
+    except Exception as e:
+        logger.error(f"Erro ao fazer predição em lote com regressão logística/Randon Forest: {str(e)}")
+        return [None] * len(descriptions)
+
+def predict_category_nb_batch(descriptions, modelo):
+    """Faz a predição em lote usando Naive Bayes"""
+    try:
+        predicoes = feature_extractor.predict(modelo, [str(description) for description in descriptions])
+        return list(predicoes)
+    except Exception as e:
+        logger.error(f"Erro ao fazer predição em lote com Naive Bayes: {str(e)}")
+        return [None] * len(descriptions)
+
+def predict_category_cnn_batch(descriptions, modelo, tokenizer, encoder, maxlen=100):
+    """Faz a predição em lote com a CNN: um único tensor com todas as descrições"""
+    try:
+        padded = encode_sequences(tokenizer, descriptions, maxlen=maxlen)
+        pred = modelo.predict(padded, batch_size=CNN_BATCH_SIZE, verbose=0)
+        pred_index = np.argmax(pred, axis=1)
+        return list(encoder.inverse_transform(pred_index))
+    except Exception as e:
+        logger.error(f"Erro na predição em lote com CNN: {str(e)}")
+        return [None] * len(descriptions)
+
+def count_votes(predictions):
+    """Retorna a categoria escolhida por mais de dois modelos ou CND (None é abstenção)"""
+    vote = Counter(prediction for prediction in predictions if prediction is not None)
+    if not vote:
+        return "CND"
+    category_more_comum, contagem = vote.most_common(1)[0]
+    if contagem > 2:
+        return category_more_comum
+    return "CND"  # Nenhum consenso
+
 def vote_category(description):
     """Faz a predição da categoria com votação entre três modelos"""
+    # Cada matriz de atributos distinta é calculada uma vez e compartilhada entre os modelos
+    with feature_extractor.scope([description]):
+        if VOTE_MODE == "cascade":
+            return vote_category_cascade(description)
+        if VOTE_MODE == "parallel":
+            return vote_category_parallel(description, inference_executor)
+        if VOTE_MODE == "student":
+            return vote_category_student(description)
+        return vote_category_full(description)
+
+def vote_category_full(description):
+    """Votação com os quatro modelos em sequência"""
     try:
 
         # Obtém as predições dos três modelos
@@ -344,19 +920,275 @@ def vote_category(description):
         pred3 = predict_category_nb(description, modelo3)
         pred4 = predict_category_cnn(description, modelo4, vectorizer4, encoder)
 
-        # Conta quantas vezes cada categoria apareceu
-        vote = Counter([pred1, pred2, pred3, pred4])
-        category_more_comum, contagem = vote.most_common(1)[0]
-
-        # Verifica se ao menos dois modelos concordaram
-        if contagem > 2:
-            return category_more_comum
-        else:
-            return "CND"  # Nenhum consenso
+        # Conta os votos e verifica se ao menos três modelos concordaram
+        return count_votes([pred1, pred2, pred3, pred4])
     except Exception as e:
         logger.error(f"Erro de predição: {str(e)}.")
         return "CND"
 
+def vote_category_cascade(description):
+    """
+    Votação em cascata: executa primeiro os modelos baratos (LR e NB, depois RF)
+    e só chama a CNN quando o resultado ainda está em aberto.
+    O resultado é o mesmo da votação completa.
+    """
+    try:
+        stages = [
+            ("lr+nb", [lambda: predict_category(description, modelo1, vectorizer1),
+                       lambda: predict_category_nb(description, modelo3)]),
+            ("rf",    [lambda: predict_category(description, modelo2, vectorizer2)]),
+            ("cnn",   [lambda: predict_category_cnn(description, modelo4, vectorizer4, encoder)])
+        ]
+        return run_cascade(stages, cascade_stats)
+    except Exception as e:
+        logger.error(f"Erro de predição em cascata: {str(e)}.")
+        return "CND"
+
+def vote_category_parallel(description, executor):
+    """
+    Executa as quatro predições em paralelo. Um modelo que não responde dentro
+    do seu prazo conta como abstenção e não bloqueia a requisição.
+    """
+    try:
+        # As threads do executor usam a mesma versão de modelos e as mesmas matrizes da requisição
+        registry = model_versions.registry()
+        features = feature_extractor.current()
+        def pinned(task):
+            def run():
+                with model_versions.pinned(registry), feature_extractor.attach(features):
+                    return task()
+            return run
+
+        tasks = {
+            "lr":  lambda: predict_category(description, modelo1, vectorizer1),
+            "rf":  lambda: predict_category(description, modelo2, vectorizer2),
+            "nb":  lambda: predict_category_nb(description, modelo3),
+            "cnn": lambda: predict_category_cnn(description, modelo4, vectorizer4, encoder)
+        }
+        tasks = {name: pinned(task) for name, task in tasks.items()}
+        process_tasks = {}
+        if executor.runs_in_process("rf"):
+            del tasks["rf"]
+            process_tasks["rf"] = description
+
+        predictions = executor.run(tasks, process_tasks)
+        return count_votes(predictions.values())
+    except Exception as e:
+        logger.error(f"Erro de predição em paralelo: {str(e)}.")
+        return "CND"
+
+def active_student():
+    """Modelo aluno da versão em uso (None se a versão não tem student_model.pkl)"""
+    registry = model_versions.registry()
+    return registry.get("student") if "student" in registry else None
+
+def student_predictions(descriptions):
+    """Categoria do aluno para cada descrição, ou None quando a confiança fica abaixo do limiar"""
+    try:
+        student = active_student()
+        if student is None:
+            return [None] * len(descriptions)
+        proba = student.predict_proba(descriptions)
+        best = np.argmax(proba, axis=1)
+        confident = proba[np.arange(len(best)), best] >= STUDENT_CONFIDENCE
+        return [str(student.classes_[index]) if ok else None for index, ok in zip(best, confident)]
+    except Exception as e:
+        logger.error(f"Erro de predição com o modelo aluno: {str(e)}")
+        return [None] * len(descriptions)
+
+def vote_category_student(description):
+    """
+    Modo student: o aluno destilado do ensemble responde quando está confiante;
+    as demais descrições (e as versões sem aluno) vão para a votação completa.
+    """
+    category = student_predictions([description])[0]
+    if category is not None:
+        student_stats.record("student")
+        return category
+    student_stats.record("ensemble")
+    return vote_category_full(description)
+
+def vote_category_student_batch(descriptions):
+    """Modo student em lote: só as descrições com baixa confiança do aluno vão para a votação em lote"""
+    categories = student_predictions(descriptions)
+    pending = [index for index, category in enumerate(categories) if category is None]
+    for category in categories:
+        student_stats.record("ensemble" if category is None else "student")
+    if pending:
+        for index, category in zip(pending, vote_category_batch_full([descriptions[i] for i in pending])):
+            categories[index] = category
+    return categories
+
+def vote_category_batch(descriptions):
+    """Faz a votação para várias descrições com uma única chamada por modelo"""
+    descriptions = [str(description) for description in descriptions]
+    if not descriptions:
+        return []
+    if VOTE_MODE == "student":
+        return vote_category_student_batch(descriptions)
+    return vote_category_batch_full(descriptions)
+
+def vote_category_batch_full(descriptions):
+    """Votação em lote com os quatro modelos"""
+    try:
+        # Cada modelo roda uma única vez sobre todas as descrições e cada matriz distinta é calculada uma vez
+        with feature_extractor.scope(descriptions):
+            preds1 = predict_category_batch(descriptions, modelo1, vectorizer1)
+            preds2 = predict_category_batch(descriptions, modelo2, vectorizer2)
+            preds3 = predict_category_nb_batch(descriptions, modelo3)
+            preds4 = predict_category_cnn_batch(descriptions, modelo4, vectorizer4, encoder)
+
+        # Votação linha a linha
+        return [count_votes(row) for row in zip(preds1, preds2, preds3, preds4)]
+    except Exception as e:
+        logger.error(f"Erro de predição em lote: {str(e)}.")
+        return ["CND"] * len(descriptions)
+
+def classify_description(description):
+    """Classifica uma descrição consultando antes o cache de predições"""
+    if sidecar_client is not None:
+        return prediction_cache.get_or_compute(description, lambda d: sidecar_client.classify([d])[0])
+    with model_versions.pinned():
+        return prediction_cache.get_or_compute(description, vote_category)
+
+def classify_descriptions(descriptions):
+    """Classifica várias descrições; apenas as ausentes do cache vão para a votação em lote"""
+    if sidecar_client is not None:
+        return prediction_cache.get_many_or_compute(descriptions, sidecar_client.classify)
+    with model_versions.pinned():
+        return prediction_cache.get_many_or_compute(descriptions, vote_category_batch)
+
+def classify_micro_batch(descriptions):
+    """Processa um micro-lote; retorna (categoria, versão dos modelos) para cada descrição"""
+    if sidecar_client is not None:
+        categories = classify_descriptions(descriptions)
+        return [(category, sidecar_client.version) for category in categories]
+    with model_versions.pinned() as version:
+        return [(category, version) for category in classify_descriptions(descriptions)]
+
+def classify_transaction_description(description):
+    """
+    Classifica a descrição de uma nova transação e retorna (categoria, versão dos modelos).
+    Com os micro-lotes ativos, inserções concorrentes são agrupadas numa única predição em lote.
+    """
+    if micro_batcher is not None:
+        return micro_batcher(description)
+    if sidecar_client is not None:
+        category = classify_description(description)
+        return category, sidecar_client.version
+    with model_versions.pinned() as version:
+        return classify_description(description), version
+
+class SidecarHandler:
+    """
+    Atende as requisições dos workers web no processo classificador
+    (python -m classifier.sidecar --handler app:SidecarHandler).
+    """
+
+    def classify(self, descriptions):
+        # Sempre com os modelos locais: este é o processo que os carrega
+        with model_versions.pinned() as version:
+            return prediction_cache.get_many_or_compute(descriptions, vote_category_batch), version
+
+    def status(self):
+        return dict(model_versions.status(), ready=model_versions.is_ready(), pid=os.getpid())
+
+    def activate(self, version):
+        model_versions.activate(version)
+        return self.status()
+
+    def rollback(self):
+        model_versions.rollback()
+        return self.status()
+
+# Micro-lotes para as inserções individuais (POST /transaction)
+micro_batcher = None
+if MICROBATCH_ENABLED:
+    micro_batcher = MicroBatcher(
+        lambda descriptions: classify_micro_batch(descriptions),
+        max_batch_size = MICROBATCH_MAX_SIZE,
+        max_wait_ms = MICROBATCH_MAX_WAIT_MS,
+        logger = logger
+    )
+
+#**************************************************************************************************
+#* CLASSIFY                                                                                       *
+#**************************************************************************************************
+@app.post('/transaction/classify/batch', tags=[transaction_tag],
+          responses={"200": TransactionsClassBatchViewSchema, "400": ErrorSchema})
+def classify_transactions_batch(body: TransactionsClassBatchSchema):
+    """
+    Classifica várias descrições de uma vez, com uma chamada de cada modelo para todo o lote.
+    """
+    descriptions = body.descriptions
+    logger.debug(f"Classificando {len(descriptions)} descrições em lote")
+
+    categories = classify_descriptions(descriptions)
+    return jsonify({
+        "classifications": [
+            {"transaction_description": description, "category_id": category}
+            for description, category in zip(descriptions, categories)
+        ]
+    }), 200
+
+@app.get('/transaction/classify/metrics', tags=[transaction_tag])
+def classify_metrics():
+    """
+    Retorna os contadores do classificador (cache, etapas da cascata, respostas do aluno, prazos estourados por modelo,
+    tamanho/espera dos micro-lotes, transformações de atributos evitadas e aprendizado incremental).
+    """
+    return jsonify({
+        "cache": prediction_cache.stats(),
+        "cascade": cascade_stats.stats(),
+        "student": student_stats.stats(),
+        "executor": inference_executor.stats() if inference_executor else {},
+        "microbatch": micro_batcher.stats() if micro_batcher else {},
+        "features": feature_extractor.stats(),
+        "sidecar": sidecar_supervisor.status() if sidecar_supervisor else {},
+        "online": online_learner.stats() if online_learner else {}
+    }), 200
+
+#**************************************************************************************************
+#* ADMIN                                                                                          *
+#**************************************************************************************************
+@app.get('/admin/models', tags=[admin_tag], responses={"200": ModelVersionsViewSchema})
+def get_model_versions():
+    """
+    Lista as versões de modelos disponíveis, a versão ativa e o estado da última ativação.
+    """
+    return jsonify(model_admin.status()), 200
+
+@app.post('/admin/models/activate', tags=[admin_tag],
+          responses={"202": ModelVersionsViewSchema, "404": ErrorSchema, "409": ErrorSchema})
+def activate_model_version(body: ModelVersionSchema):
+    """
+    Carrega uma versão em segundo plano e a ativa após uma predição de teste, sem reiniciar o serviço.
+    """
+    try:
+        model_admin.activate(body.version)
+    except ValueError as e:
+        logger.warning(str(e))
+        return jsonify({"message": str(e)}), 404
+    except RuntimeError as e:
+        logger.warning(str(e))
+        return jsonify({"message": str(e)}), 409
+
+    logger.info(f"Ativação da versão '{body.version}' iniciada")
+    return jsonify(model_admin.status()), 202
+
+@app.post('/admin/models/rollback', tags=[admin_tag],
+          responses={"200": ModelVersionsViewSchema, "409": ErrorSchema})
+def rollback_model_version():
+    """
+    Volta imediatamente para a versão anterior (mantida em memória).
+    """
+    try:
+        model_admin.rollback()
+    except RuntimeError as e:
+        logger.warning(str(e))
+        return jsonify({"message": str(e)}), 409
+    return jsonify(model_admin.status()), 200
+
 #**************************************************************************************************
 #* DELETE                                                                                         *
 #**************************************************************************************************
@@ -461,9 +1293,20 @@ def update_transaction(body: TransactionsUpdateSchema, session):
             "branch_id", "resource_id", "transaction_type",
             "transaction_value"
         ]
+        previous_category = transaction.category_id
         for field in fields_to_update:
             update_field(transaction, transaction_api, field)
 
+        # Correção de categoria feita pelo usuário: registrada para o aprendizado incremental
+        if transaction.category_id and transaction.category_id != previous_category:
+            session.add(CategoryFeedback(
+                transaction_id = transaction.transaction_id,
+                transaction_description = transaction.transaction_description,
+                corrected_category = transaction.category_id,
+                predicted_category = previous_category,
+                model_version = transaction.model_version
+            ))
+
         # Persistir as alterações na base de dados
         logger.debug(f"Transação com ID {transaction_api.transaction_id} atualizada com sucesso")
 
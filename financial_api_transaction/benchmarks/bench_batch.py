@@ -0,0 +1,39 @@
+"""
+Compara a classificação descrição a descrição (vote_category) com a
+classificação em lote (vote_category_batch).
+
+Uso (a partir da pasta financial_api_transaction):
+    python -m benchmarks.bench_batch 2000
+"""
+import sys
+import time
+
+from app import vote_category, vote_category_batch
+from benchmarks.data import load_descriptions
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    descriptions = load_descriptions(total)
+
+    # Aquece os modelos (primeira chamada do Keras compila o grafo)
+    vote_category_batch(descriptions[:10])
+    vote_category(descriptions[0])
+
+    inicio = time.perf_counter()
+    single = [vote_category(description) for description in descriptions]
+    tempo_single = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    batch = vote_category_batch(descriptions)
+    tempo_batch = time.perf_counter() - inicio
+
+    print(f"Descrições:          {total}")
+    print(f"Uma a uma:           {tempo_single:8.3f}s ({total / tempo_single:10.1f} desc/s)")
+    print(f"Em lote:             {tempo_batch:8.3f}s ({total / tempo_batch:10.1f} desc/s)")
+    print(f"Ganho:               {tempo_single / tempo_batch:8.1f}x")
+    print(f"Resultados iguais:   {single == batch}")
+
+
+if __name__ == '__main__':
+    main()
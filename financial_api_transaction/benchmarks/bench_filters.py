@@ -0,0 +1,138 @@
+"""
+Filtros de GET /transaction em um banco SQLite com 1 milhão de transações: plano de cada
+consulta (EXPLAIN QUERY PLAN) e tempo da primeira página com e sem os índices de models/table.py.
+
+Uso (a partir da pasta financial_api_transaction):
+    python -m benchmarks.bench_filters                          # 1.000.000 de linhas
+    python -m benchmarks.bench_filters 200000 --db /tmp/bench.sqlite3
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from datetime import date, timedelta
+
+import numpy as np
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from benchmarks.data import DATASET_PATH
+from models.table import Base, Transactions, transaction_filters
+from training.pipeline import load_dataset
+
+# Consultas comparadas (mesmos parâmetros de GET /transaction)
+CENARIOS = {
+    "conta + mês": {"account_id": 17, "transaction_date_from": date(2024, 3, 1), "transaction_date_to": date(2024, 3, 31)},
+    "categoria + trimestre": {"category_id": "SAU", "transaction_date_from": date(2024, 1, 1), "transaction_date_to": date(2024, 3, 31)},
+    "agência": {"branch_id": 42},
+    "recurso + tipo + semana": {"resource_id": "CRD", "transaction_type": "D",
+                                "transaction_date_from": date(2024, 6, 3), "transaction_date_to": date(2024, 6, 9)},
+    "vencidas": {"transaction_status": "V", "transaction_expiration_date_to": date(2020, 1, 31)},
+    "período": {"transaction_date_from": date(2025, 5, 1), "transaction_date_to": date(2025, 5, 2)}
+}
+PAGINA = 100
+REPETICOES = 5
+
+INICIO = date(2020, 1, 1)
+DIAS = 2000
+CONTAS, AGENCIAS = 1000, 200
+RECURSOS = ["CC", "CRD", "PIX", "BOL"]
+STATUS = ["P", "A", "C", "I", "V"]
+
+
+def gerar_banco(caminho, total, seed=42):
+    """Cria o banco com o esquema do serviço (sem índices) e insere as transações sintéticas"""
+    engine = create_engine(f"sqlite:///{caminho}")
+    Base.metadata.create_all(engine)
+    for index in Transactions.__table__.indexes:
+        index.drop(engine)
+
+    descricoes, categorias = load_dataset(DATASET_PATH)
+    rng = np.random.default_rng(seed)
+    datas = [(INICIO + timedelta(days=int(d))).isoformat() for d in range(DIAS + 60)]
+    bloco = 100000
+    with engine.begin() as conn:
+        for inicio in range(0, total, bloco):
+            n = min(bloco, total - inicio)
+            linha = rng.integers(0, len(descricoes), n)
+            dia = rng.integers(0, DIAS, n)
+            colunas = zip(
+                range(inicio + 1, inicio + n + 1),
+                (datas[d] for d in dia),
+                (datas[d + 30] for d in dia),
+                (descricoes[i] for i in linha),
+                (categorias[i] for i in linha),
+                rng.integers(1, CONTAS + 1, n).tolist(),
+                rng.integers(1, AGENCIAS + 1, n).tolist(),
+                (RECURSOS[i] for i in rng.integers(0, len(RECURSOS), n)),
+                (("D", "C")[i] for i in rng.integers(0, 2, n)),
+                np.round(rng.uniform(1, 5000, n), 2).tolist(),
+                (STATUS[i] for i in rng.integers(0, len(STATUS), n))
+            )
+            conn.exec_driver_sql(
+                'INSERT INTO "transaction" (transaction_id, transaction_date, transaction_expiration_date, '
+                'transaction_description, category_id, account_id, branch_id, resource_id, transaction_type, '
+                'transaction_value, transaction_status) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                list(colunas))
+    return engine
+
+
+def primeira_pagina(engine, criterios):
+    """SQL e parâmetros da primeira página de GET /transaction com os filtros"""
+    with Session(engine) as session:
+        consulta = session.query(Transactions).filter(*transaction_filters(criterios)) \
+            .order_by(Transactions.transaction_id).limit(PAGINA + 1)
+        compilada = consulta.statement.compile(engine)
+    parametros = [compilada.params[nome] for nome in compilada.positiontup]
+    return str(compilada), [p.isoformat() if isinstance(p, date) else p for p in parametros]
+
+
+def medir(engine, sql, parametros):
+    """(plano, linhas, tempo médio em ms)"""
+    with engine.connect() as conn:
+        plano = [linha[-1] for linha in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", tuple(parametros))]
+        linhas = len(conn.exec_driver_sql(sql, tuple(parametros)).fetchall())
+        inicio = time.perf_counter()
+        for _ in range(REPETICOES):
+            conn.exec_driver_sql(sql, tuple(parametros)).fetchall()
+        return plano, linhas, (time.perf_counter() - inicio) / REPETICOES * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plano e tempo dos filtros de GET /transaction")
+    parser.add_argument("linhas", type=int, nargs="?", default=1000000, help="Transações no banco de teste")
+    parser.add_argument("--db", help="Arquivo SQLite (padrão: temporário, removido no fim)")
+    args = parser.parse_args()
+
+    caminho = args.db or os.path.join(tempfile.mkdtemp(), "bench_filters.sqlite3")
+    if os.path.exists(caminho):
+        os.remove(caminho)
+    inicio = time.perf_counter()
+    engine = gerar_banco(caminho, args.linhas)
+    print(f"{args.linhas} transações em {caminho} ({time.perf_counter() - inicio:.1f}s)")
+
+    consultas = {nome: primeira_pagina(engine, criterios) for nome, criterios in CENARIOS.items()}
+    sem_indices = {nome: medir(engine, *consulta) for nome, consulta in consultas.items()}
+
+    inicio = time.perf_counter()
+    for index in Transactions.__table__.indexes:
+        index.create(engine)
+    print(f"Índices criados em {time.perf_counter() - inicio:.1f}s")
+    com_indices = {nome: medir(engine, *consulta) for nome, consulta in consultas.items()}
+
+    for nome in CENARIOS:
+        plano_sem, linhas, tempo_sem = sem_indices[nome]
+        plano_com, _, tempo_com = com_indices[nome]
+        print(f"\n{nome} ({linhas} linhas na página)")
+        print(f"  sem índices: {tempo_sem:9.2f} ms  {' | '.join(plano_sem)}")
+        print(f"  com índices: {tempo_com:9.2f} ms  {' | '.join(plano_com)}")
+
+    engine.dispose()
+    if not args.db:
+        os.remove(caminho)
+
+
+if __name__ == '__main__':
+    main()
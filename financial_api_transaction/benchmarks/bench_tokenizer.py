@@ -0,0 +1,60 @@
+"""
+Compara a tokenização da CNN: texts_to_sequences + pad_sequences do Keras
+com o SequenceEncoder (índices escritos direto na matriz int32).
+
+Uso (a partir da pasta financial_api_transaction):
+    python -m benchmarks.bench_tokenizer
+"""
+import pickle
+import time
+
+import numpy as np
+
+from benchmarks.data import load_descriptions
+from classifier import load_tokenizer, encode_sequences, pad_sequences
+
+TOKENIZER_PATH = './models/cnn_tokenizer.pkl'
+SIZES = (1, 100, 10000)
+MAXLEN = 100
+
+
+def keras_encoder():
+    """Tokenizer e pad_sequences do Keras; sem o Keras, a versão local equivalente"""
+    try:
+        from keras.preprocessing.sequence import pad_sequences as keras_pad_sequences
+        with open(TOKENIZER_PATH, 'rb') as f:
+            tokenizer = pickle.load(f)
+        return "Keras", lambda texts: keras_pad_sequences(tokenizer.texts_to_sequences(texts), maxlen=MAXLEN)
+    except ImportError:
+        tokenizer = load_tokenizer(TOKENIZER_PATH)
+        return "texts_to_sequences", lambda texts: pad_sequences(tokenizer.texts_to_sequences(texts), maxlen=MAXLEN)
+
+
+def best_time(function, texts, repeat):
+    """Menor tempo entre as repetições (em segundos)"""
+    tempos = []
+    for _ in range(repeat):
+        inicio = time.perf_counter()
+        function(texts)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def main():
+    nome, baseline = keras_encoder()
+    tokenizer = load_tokenizer(TOKENIZER_PATH)
+    fast = lambda texts: encode_sequences(tokenizer, texts, maxlen=MAXLEN)
+
+    print(f"{'Descrições':>10} {nome:>20} {'SequenceEncoder':>16} {'Ganho':>8}  Iguais")
+    for total in SIZES:
+        texts = load_descriptions(total)
+        iguais = np.array_equal(baseline(texts), fast(texts))
+        repeat = 200 if total <= 100 else 5
+        tempo_base = best_time(baseline, texts, repeat)
+        tempo_fast = best_time(fast, texts, repeat)
+        print(f"{total:>10} {tempo_base * 1000:>17.3f} ms {tempo_fast * 1000:>13.3f} ms "
+              f"{tempo_base / tempo_fast:>7.1f}x  {iguais}")
+
+
+if __name__ == '__main__':
+    main()
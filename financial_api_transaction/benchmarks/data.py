@@ -0,0 +1,12 @@
+import os
+
+from training.pipeline import CSV_PATH, load_dataset
+
+# CSV, diretório de shards ou de colunas .npy (ver training/data.py)
+DATASET_PATH = os.environ.get('BENCH_DATASET', CSV_PATH)
+
+
+def load_descriptions(total):
+    """Lê as descrições do dataset sintético, repetindo-as até atingir o total pedido"""
+    descriptions = load_dataset(DATASET_PATH)[0]
+    return (descriptions * (total // len(descriptions) + 1))[:total]
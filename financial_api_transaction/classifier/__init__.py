@@ -0,0 +1,11 @@
+from classifier.cache import PredictionCache, normalize_description, artifacts_fingerprint
+from classifier.cascade import CascadeStats, decided_outcome, run_cascade
+from classifier.executor import InferenceExecutor
+from classifier.cnn_numpy import NumpyCNN
+from classifier.tokenizer import Tokenizer, SequenceEncoder, load_tokenizer, pad_sequences, encode_sequences
+from classifier.registry import ModelRegistry, ModelNotReadyError, LazyArtifact
+from classifier.versions import ModelVersions, BASE_VERSION
+from classifier.microbatch import MicroBatcher
+from classifier.features import FeatureExtractor, vectorizer_fingerprint
+from classifier.compact import COMPACT_DIR, SortedVocabulary, export_artifact, export_directory, load_artifact
+from classifier.online import OnlineLearner, ONLINE_PREFIX, to_sgd
@@ -0,0 +1,163 @@
+import os
+import threading
+import time
+import unicodedata
+import hashlib
+
+from collections import OrderedDict
+
+
+def normalize_description(description):
+    """
+    Normaliza a descrição para uso como chave do cache:
+    remove acentos, ignora maiúsculas/minúsculas e espaços repetidos.
+    """
+    text = unicodedata.normalize('NFKD', str(description))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.casefold().split())
+
+
+def artifacts_fingerprint(directory, subdirs=()):
+    """
+    Gera uma assinatura dos artefatos de um diretório de modelos
+    (nome, tamanho e data de modificação de cada arquivo).
+    Só os arquivos do próprio diretório e os de subdirs (ex.: compact, percorridos por inteiro)
+    entram: outras versões, caches de busca e versões em treino não invalidam o cache.
+    """
+    entries = []
+    walks = [[next(os.walk(directory), (directory, [], []))]]
+    walks += [sorted(os.walk(os.path.join(directory, subdir))) for subdir in subdirs]
+    for root, _, files in (entry for walk in walks for entry in walk):
+        for name in sorted(files):
+            # Código e arquivos ocultos (ex.: a trava do aprendizado incremental) não são artefatos
+            if name.endswith(('.py', '.pyc')) or name.startswith('.'):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append(f"{os.path.relpath(path, directory)}:{stat.st_size}:{stat.st_mtime_ns}")
+    return hashlib.sha1('\n'.join(entries).encode('utf-8')).hexdigest()
+
+
+class PredictionCache:
+    """
+    Cache LRU com expiração (TTL) para as categorias previstas.
+
+    A chave é a descrição normalizada. O cache é esvaziado automaticamente
+    quando a assinatura dos artefatos dos modelos muda.
+    """
+
+    def __init__(self, maxsize=10000, ttl=86400, fingerprint=None, check_interval=5.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.fingerprint = fingerprint
+        self.check_interval = check_interval
+        self.clock = clock
+
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._current_fingerprint = fingerprint() if fingerprint else None
+        self._last_check = clock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _check_artifacts(self):
+        """Invalida o cache se os artefatos dos modelos mudaram (chamado com o lock)"""
+        if not self.fingerprint:
+            return
+        now = self.clock()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        current = self.fingerprint()
+        if current != self._current_fingerprint:
+            self._current_fingerprint = current
+            self._clear()
+
+    def _clear(self):
+        if self._data:
+            self.invalidations += 1
+        self._data.clear()
+
+    def get(self, description):
+        """Retorna a categoria em cache ou None"""
+        key = normalize_description(description)
+        with self._lock:
+            self._check_artifacts()
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            value, expires_at = item
+            if expires_at <= self.clock():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, description, value):
+        """Grava a categoria prevista para a descrição"""
+        key = normalize_description(description)
+        with self._lock:
+            self._data[key] = (value, self.clock() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, description, compute):
+        """Consulta o cache e, em caso de falta, executa a predição e guarda o resultado"""
+        value = self.get(description)
+        if value is None:
+            value = compute(description)
+            self.put(description, value)
+        return value
+
+    def get_many_or_compute(self, descriptions, compute_batch):
+        """
+        Versão em lote: consulta o cache para cada descrição e executa uma
+        única predição em lote para as descrições ausentes (sem repetição).
+        """
+        results = [self.get(description) for description in descriptions]
+        pending = {}
+        for index, value in enumerate(results):
+            if value is None:
+                pending.setdefault(normalize_description(descriptions[index]), []).append(index)
+
+        if pending:
+            representatives = [descriptions[indexes[0]] for indexes in pending.values()]
+            for indexes, value in zip(pending.values(), compute_batch(representatives)):
+                self.put(descriptions[indexes[0]], value)
+                for index in indexes:
+                    results[index] = value
+        return results
+
+    def invalidate(self):
+        """Esvazia o cache"""
+        with self._lock:
+            self._clear()
+
+    def stats(self):
+        """Retorna os contadores do cache"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
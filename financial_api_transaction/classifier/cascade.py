@@ -0,0 +1,84 @@
+import threading
+
+from collections import Counter
+
+# count_votes aceita uma categoria quando contagem > 2
+VOTES_REQUIRED = 3
+
+
+def decided_outcome(predictions, remaining, required=VOTES_REQUIRED):
+    """
+    Verifica se os votos restantes ainda podem mudar o resultado da votação.
+    Predições None (modelo com erro ou fora do prazo) são abstenções.
+
+    Retorna (True, categoria) quando uma categoria já tem os votos necessários,
+    (True, "CND") quando nenhuma categoria consegue mais alcançá-los e
+    (False, None) quando o resultado ainda está em aberto.
+    """
+    counts = Counter(p for p in predictions if p is not None)  # None é abstenção
+    category, count = counts.most_common(1)[0] if counts else (None, 0)
+    if count >= required:
+        return True, category
+    if count + remaining < required:
+        return True, "CND"
+    return False, None
+
+
+def run_cascade(stages, stats=None, required=VOTES_REQUIRED):
+    """
+    Executa as etapas em ordem de custo e para assim que o resultado estiver decidido.
+
+    stages: lista de (nome, [funções sem argumentos que retornam uma predição]).
+    O resultado é sempre o mesmo da votação completa.
+    """
+    remaining = sum(len(predictors) for _, predictors in stages)
+    predictions = []
+    for name, predictors in stages:
+        for predictor in predictors:
+            predictions.append(predictor())
+        remaining -= len(predictors)
+        decided, category = decided_outcome(predictions, remaining, required)
+        if decided:
+            if stats is not None:
+                stats.record(name)
+            return category
+    # Nunca alcançado: sem votos restantes o resultado está sempre decidido
+    return "CND"
+
+
+class CascadeStats:
+    """Conta quantas vezes cada etapa da cascata decidiu o resultado"""
+
+    def __init__(self, stage_names, logger=None, log_every=100):
+        self.stage_names = list(stage_names)
+        self.logger = logger
+        self.log_every = log_every
+        self.decisions = {name: 0 for name in self.stage_names}
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def record(self, stage_name):
+        with self._lock:
+            self.decisions[stage_name] += 1
+            self.total += 1
+            should_log = self.log_every and self.total % self.log_every == 0
+        if self.logger:
+            self.logger.debug(f"Cascata decidida na etapa '{stage_name}'")
+            if should_log:
+                self.logger.info(f"Cascata: {self.summary()}")
+
+    def summary(self):
+        stats = self.stats()
+        return ", ".join(f"{name}={stats['decided_by'][name]}" for name in self.stage_names) + \
+            f" (última etapa evitada em {stats['last_stage_skipped_rate']:.1%})"
+
+    def stats(self):
+        with self._lock:
+            last_stage = self.stage_names[-1]
+            skipped = self.total - self.decisions[last_stage]
+            return {
+                "total": self.total,
+                "decided_by": dict(self.decisions),
+                "last_stage_skipped": skipped,
+                "last_stage_skipped_rate": round(skipped / self.total, 4) if self.total else 0.0
+            }
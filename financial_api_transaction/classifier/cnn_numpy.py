@@ -0,0 +1,116 @@
+import json
+
+import numpy as np
+
+
+def _activation(name):
+    """Retorna a função de ativação do Keras equivalente em NumPy"""
+    if name in (None, 'linear'):
+        return lambda x: x
+    if name == 'relu':
+        return lambda x: np.maximum(x, 0)
+    if name == 'sigmoid':
+        return lambda x: 1 / (1 + np.exp(-x))
+    if name == 'tanh':
+        return np.tanh
+    if name == 'softmax':
+        def softmax(x):
+            e = np.exp(x - x.max(axis=-1, keepdims=True))
+            return e / e.sum(axis=-1, keepdims=True)
+        return softmax
+    raise ValueError(f"Ativação não suportada: {name}")
+
+
+def _conv1d(x, kernel, bias, strides, padding, dilation):
+    """Convolução 1D (channels_last) com janelas deslizantes e einsum"""
+    size = kernel.shape[0]
+    span = (size - 1) * dilation + 1
+    if padding == 'same':
+        total = max(span - 1, 0)
+        x = np.pad(x, ((0, 0), (total // 2, total - total // 2), (0, 0)))
+    elif padding != 'valid':
+        raise ValueError(f"Padding não suportado: {padding}")
+    windows = np.lib.stride_tricks.sliding_window_view(x, span, axis=1)[:, ::strides, :, ::dilation]
+    return np.einsum('nlik,kio->nlo', windows, kernel, optimize=True) + bias
+
+
+def _max_pool1d(x, pool, strides, padding):
+    if padding != 'valid':
+        raise ValueError(f"Padding não suportado: {padding}")
+    windows = np.lib.stride_tricks.sliding_window_view(x, pool, axis=1)[:, ::strides]
+    return windows.max(axis=-1)
+
+
+class NumpyCNN:
+    """
+    Executa o forward da CNN salva em .h5 (Sequential do Keras) apenas com NumPy.
+
+    Camadas suportadas: Embedding, Conv1D, MaxPooling1D, GlobalMaxPooling1D,
+    GlobalAveragePooling1D, Flatten, Dense e Dropout (ignorada na inferência).
+    """
+
+    def __init__(self, layers):
+        self.layers = layers
+
+    @classmethod
+    def load(cls, path):
+        """Lê a configuração e os pesos do arquivo .h5 sem importar keras/tensorflow"""
+        import h5py
+
+        with h5py.File(path, 'r') as f:
+            config = f.attrs['model_config']
+            config = json.loads(config.decode('utf-8') if isinstance(config, bytes) else config)
+            weights_group = f['model_weights'] if 'model_weights' in f else f
+
+            layers = []
+            for layer in config['config']['layers']:
+                kind, cfg = layer['class_name'], layer['config']
+                if kind == 'InputLayer':
+                    continue
+                weights = []
+                if cfg['name'] in weights_group:
+                    group = weights_group[cfg['name']]
+                    names = group.attrs.get('weight_names', [])
+                    weights = [np.asarray(group[n.decode('utf-8') if isinstance(n, bytes) else n], dtype=np.float32)
+                               for n in names]
+                layers.append((kind, cfg, weights))
+        return cls(layers)
+
+    @property
+    def has_weights(self):
+        """Indica se o arquivo trazia os pesos treinados (e não só a arquitetura)"""
+        return any(weights for _, _, weights in self.layers)
+
+    def predict(self, x, batch_size=None, verbose=None):
+        """Retorna as probabilidades de cada classe, como modelo.predict do Keras"""
+        if not self.has_weights:
+            raise ValueError("O arquivo da CNN não contém pesos treinados")
+
+        x = np.asarray(x)
+        for kind, cfg, weights in self.layers:
+            if kind == 'Embedding':
+                x = weights[0][x.astype(np.int64)]
+            elif kind == 'Conv1D':
+                bias = weights[1] if cfg.get('use_bias', True) else 0
+                x = _conv1d(x, weights[0], bias, cfg['strides'][0], cfg['padding'], cfg['dilation_rate'][0])
+                x = _activation(cfg.get('activation'))(x)
+            elif kind == 'MaxPooling1D':
+                pool = cfg['pool_size'][0]
+                strides = (cfg.get('strides') or [pool])[0]
+                x = _max_pool1d(x, pool, strides, cfg.get('padding', 'valid'))
+            elif kind == 'GlobalMaxPooling1D':
+                x = x.max(axis=1)
+            elif kind == 'GlobalAveragePooling1D':
+                x = x.mean(axis=1)
+            elif kind == 'Flatten':
+                x = x.reshape(len(x), -1)
+            elif kind == 'Dense':
+                x = x @ weights[0]
+                if cfg.get('use_bias', True):
+                    x = x + weights[1]
+                x = _activation(cfg.get('activation'))(x)
+            elif kind == 'Dropout':
+                continue
+            else:
+                raise ValueError(f"Camada não suportada: {kind}")
+        return x
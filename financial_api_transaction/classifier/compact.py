@@ -0,0 +1,397 @@
+"""
+Formato compacto dos artefatos de classificação.
+
+Cada artefato vira um diretório com meta.json e arrays .npy (sem pickle),
+abertos com mmap_mode="r": o carregamento é quase instantâneo e os workers
+criados por fork compartilham as páginas (copy-on-write). Vocabulários são
+gravados como arrays ordenados e consultados por busca binária.
+
+Exportação:
+    python -m classifier.compact models            # grava models/compact/
+    python -m classifier.compact models/v3         # grava models/v3/compact/
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+from classifier.tokenizer import Tokenizer, load_tokenizer
+
+COMPACT_DIR = "compact"
+META_FILE = "meta.json"
+
+# Parâmetros do analisador de texto preservados na exportação dos vectorizers
+ANALYZER_PARAMS = ("lowercase", "strip_accents", "token_pattern", "analyzer", "ngram_range")
+
+
+class SortedVocabulary:
+    """Vocabulário em arrays ordenados (termos e índices) em vez de um dict"""
+
+    def __init__(self, terms, indices):
+        self.terms = terms
+        self.indices = indices
+
+    @classmethod
+    def from_dict(cls, mapping):
+        terms = sorted(mapping)
+        return cls(np.array(terms, dtype=str), np.array([mapping[t] for t in terms], dtype=np.int64))
+
+    def lookup(self, tokens):
+        """Índices dos tokens (-1 para os ausentes do vocabulário)"""
+        tokens = np.asarray(tokens, dtype=str)
+        if not len(self.terms) or not tokens.size:
+            return np.full(tokens.shape, -1, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.terms, tokens), len(self.terms) - 1)
+        found = self.terms[positions] == tokens
+        return np.where(found, self.indices[positions], -1)
+
+    def get(self, term, default=None):
+        index = self.lookup([term])[0]
+        return int(index) if index >= 0 else default
+
+    def __contains__(self, term):
+        return self.get(term) is not None
+
+    def __len__(self):
+        return len(self.terms)
+
+
+# Leitura e escrita -----------------------------------------------------------------------------
+def _save(path, kind, arrays, **meta):
+    os.makedirs(path, exist_ok=True)
+    digest = hashlib.sha1(json.dumps([kind, meta], sort_keys=True).encode("utf-8"))
+    for name, array in sorted(arrays.items()):
+        array = np.ascontiguousarray(array)
+        np.save(os.path.join(path, f"{name}.npy"), array, allow_pickle=False)
+        digest.update(name.encode("utf-8") + array.tobytes())
+    meta = dict(meta, kind=kind, fingerprint=digest.hexdigest())
+    with open(os.path.join(path, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+
+def _load_arrays(path, mmap_mode="r"):
+    return {
+        name[:-4]: np.load(os.path.join(path, name), mmap_mode=mmap_mode, allow_pickle=False)
+        for name in os.listdir(path) if name.endswith(".npy")
+    }
+
+
+def _labels(classes):
+    """Classes como array de texto (mapeável); as predições voltam a ser str"""
+    return np.asarray([str(c) for c in classes], dtype=str)
+
+
+# Artefatos -------------------------------------------------------------------------------------
+class CompactVectorizer:
+    """CountVectorizer/TfidfVectorizer (unigramas) com vocabulário ordenado"""
+
+    def __init__(self, meta, arrays):
+        from sklearn.feature_extraction.text import CountVectorizer
+
+        self.fingerprint = meta["fingerprint"]
+        self.params = meta["params"]
+        self.dtype = np.dtype(meta["dtype"])
+        self.vocabulary = SortedVocabulary(arrays["terms"], arrays["indices"])
+        self.n_features = int(meta["n_features"])
+        self.idf = arrays.get("idf")
+        # Mesmo analisador do sklearn (pré-processamento + token_pattern)
+        self._analyzer = CountVectorizer(**{k: v for k, v in self.params.items() if k in ANALYZER_PARAMS}).build_analyzer()
+
+    def transform(self, descriptions):
+        rows, tokens = [], []
+        for row, description in enumerate(descriptions):
+            words = self._analyzer(description)
+            rows.extend([row] * len(words))
+            tokens.extend(words)
+        columns = self.vocabulary.lookup(tokens)
+        known = columns >= 0
+        rows = np.asarray(rows, dtype=np.int64)[known]
+        columns = columns[known]
+        X = sp.csr_matrix((np.ones(len(rows), dtype=self.dtype), (rows, columns)),
+                          shape=(len(descriptions), self.n_features), dtype=self.dtype)
+        X.sort_indices()
+        if self.params.get("binary"):
+            X.data[:] = 1
+        if not self.params.get("tfidf"):
+            return X
+
+        # Mesmas operações do TfidfTransformer
+        from sklearn.preprocessing import normalize
+
+        if self.params.get("sublinear_tf"):
+            np.log(X.data, X.data)
+            X.data += 1
+        if self.idf is not None:
+            X.data *= np.asarray(self.idf)[X.indices]
+        if self.params.get("norm"):
+            X = normalize(X, norm=self.params["norm"], copy=False)
+        return X
+
+
+class CompactHashingVectorizer:
+    """HashingVectorizer: só os parâmetros (não há vocabulário nem arrays a mapear)"""
+
+    def __init__(self, meta, arrays):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.fingerprint = meta["fingerprint"]
+        self.params = dict(meta["params"], ngram_range=tuple(meta["params"]["ngram_range"]),
+                           dtype=np.dtype(meta["params"]["dtype"]).type)
+        self.n_features = int(self.params["n_features"])
+        self._vectorizer = HashingVectorizer(**self.params)
+
+    def transform(self, descriptions):
+        return self._vectorizer.transform(descriptions)
+
+
+class CompactLinear:
+    """Classificador linear (LogisticRegression, SGDClassifier): argmax de X·Wᵀ + b"""
+
+    def __init__(self, meta, arrays):
+        self.coef = arrays["coef"]
+        self.intercept = arrays["intercept"]
+        self.classes_ = arrays["classes"]
+
+    def decision_function(self, X):
+        scores = X @ np.asarray(self.coef).T + self.intercept
+        return np.asarray(scores)
+
+    def predict(self, X):
+        scores = self.decision_function(X)
+        if scores.shape[1] == 1:
+            return self.classes_[(scores[:, 0] > 0).astype(np.int64)].astype(object)
+        return self.classes_[np.argmax(scores, axis=1)].astype(object)
+
+
+class CompactNaiveBayes:
+    """MultinomialNB: argmax de X·log P(termo|classe) + log P(classe)"""
+
+    def __init__(self, meta, arrays):
+        self.feature_log_prob = arrays["feature_log_prob"]
+        self.class_log_prior = arrays["class_log_prior"]
+        self.classes_ = arrays["classes"]
+
+    def predict(self, X):
+        jll = np.asarray(X @ np.asarray(self.feature_log_prob).T) + self.class_log_prior
+        return self.classes_[np.argmax(jll, axis=1)].astype(object)
+
+
+class CompactForest:
+    """RandomForestClassifier: árvores concatenadas em arrays de nós"""
+
+    def __init__(self, meta, arrays):
+        self.roots = arrays["roots"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.value = arrays["value"]
+        self.classes_ = arrays["classes"]
+
+    def predict_proba(self, X):
+        # As árvores do sklearn comparam os atributos em float32
+        X = (X.toarray() if sp.issparse(X) else np.asarray(X)).astype(np.float32)
+        if not X.shape[0]:
+            return np.zeros((0, len(self.classes_)))
+        nodes = np.broadcast_to(self.roots, (X.shape[0], len(self.roots))).copy()
+        active = self.left[nodes] >= 0
+        while active.any():
+            r, t = np.nonzero(active)
+            current = nodes[r, t]
+            goes_left = X[r, self.feature[current]] <= self.threshold[current]
+            nodes[r, t] = np.where(goes_left, self.left[current], self.right[current])
+            active[r, t] = self.left[nodes[r, t]] >= 0
+        return np.asarray(self.value)[nodes].mean(axis=1)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)].astype(object)
+
+
+class CompactPipeline:
+    """Pipeline (vectorizer + classificador) com a mesma interface usada pelo FeatureExtractor"""
+
+    def __init__(self, steps):
+        self.steps = steps
+
+    def __getitem__(self, index):
+        return CompactPipeline(self.steps[index])
+
+    def predict(self, X):
+        for _, step in self.steps[:-1]:
+            X = step.transform(X)
+        return self.steps[-1][1].predict(X)
+
+
+class CompactTokenizer(Tokenizer):
+    """Tokenizer da CNN com o word_index em arrays ordenados"""
+
+    def __init__(self, meta, arrays):
+        self.__dict__.update(meta["config"])
+        self.fingerprint = meta["fingerprint"]
+        self.word_index = SortedVocabulary(arrays["words"], arrays["indices"])
+
+
+class CompactLabelEncoder:
+    def __init__(self, meta, arrays):
+        self.classes_ = arrays["classes"]
+
+    def inverse_transform(self, y):
+        return self.classes_[np.asarray(y, dtype=np.int64)].astype(object)
+
+
+KINDS = {
+    "vectorizer": CompactVectorizer,
+    "hashing": CompactHashingVectorizer,
+    "linear": CompactLinear,
+    "naive_bayes": CompactNaiveBayes,
+    "forest": CompactForest,
+    "tokenizer": CompactTokenizer,
+    "label_encoder": CompactLabelEncoder
+}
+
+
+# Exportação ------------------------------------------------------------------------------------
+def _export_vectorizer(vectorizer, path):
+    params = vectorizer.get_params()
+    # Funções próprias não são gravadas: o artefato compacto geraria atributos diferentes do pickle
+    if callable(params.get("analyzer")) or params.get("preprocessor") or params.get("tokenizer"):
+        raise ValueError("Vectorizer com funções próprias não é suportado")
+    if params.get("analyzer") != "word" or tuple(params.get("ngram_range", (1, 1))) != (1, 1):
+        raise ValueError("Apenas vectorizers de palavras (unigramas) são suportados")
+    params = {k: params[k] for k in ANALYZER_PARAMS + ("binary", "norm", "sublinear_tf") if k in params}
+    params["ngram_range"] = list(params["ngram_range"])
+    params["tfidf"] = hasattr(vectorizer, "use_idf")
+    vocabulary = SortedVocabulary.from_dict(vectorizer.vocabulary_)
+    arrays = {"terms": vocabulary.terms, "indices": vocabulary.indices}
+    if getattr(vectorizer, "use_idf", False):
+        arrays["idf"] = vectorizer.idf_
+    _save(path, "vectorizer", arrays, params=params, dtype=np.dtype(vectorizer.dtype).name,
+          n_features=len(vectorizer.vocabulary_))
+
+
+def _export_hashing(vectorizer, path):
+    params = vectorizer.get_params()
+    if callable(params.get("analyzer")) or params.get("preprocessor") or params.get("tokenizer"):
+        raise ValueError("HashingVectorizer com funções próprias não é suportado")
+    params = {k: v for k, v in params.items() if k not in ("input", "encoding", "decode_error",
+                                                           "preprocessor", "tokenizer", "stop_words")}
+    params["ngram_range"] = list(params["ngram_range"])
+    params["dtype"] = np.dtype(params["dtype"]).name
+    _save(path, "hashing", {}, params=params)
+
+
+def _export_forest(forest, path):
+    roots, left, right, feature, threshold, value = [], [], [], [], [], []
+    offset = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        is_leaf = tree.children_left < 0
+        roots.append(offset)
+        left.append(np.where(is_leaf, -1, tree.children_left + offset))
+        right.append(np.where(is_leaf, -1, tree.children_right + offset))
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(tree.threshold)
+        proba = tree.value[:, 0, :]
+        normalizer = proba.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        value.append(proba / normalizer)
+        offset += tree.node_count
+    _save(path, "forest", {
+        "roots": np.array(roots, dtype=np.int64),
+        "left": np.concatenate(left).astype(np.int64),
+        "right": np.concatenate(right).astype(np.int64),
+        "feature": np.concatenate(feature).astype(np.int64),
+        "threshold": np.concatenate(threshold),
+        "value": np.concatenate(value),
+        "classes": _labels(forest.classes_)
+    })
+
+
+def export_artifact(obj, path):
+    """Grava o artefato no formato compacto; ValueError se o tipo não for suportado"""
+    from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import LabelEncoder
+
+    if isinstance(obj, Pipeline):
+        names = []
+        for i, (name, step) in enumerate(obj.steps):
+            export_artifact(step, os.path.join(path, f"{i}_{name}"))
+            names.append(f"{i}_{name}")
+        _save(path, "pipeline", {}, steps=names)
+    elif isinstance(obj, CountVectorizer):
+        _export_vectorizer(obj, path)
+    elif isinstance(obj, HashingVectorizer):
+        _export_hashing(obj, path)
+    elif isinstance(obj, MultinomialNB):
+        _save(path, "naive_bayes", {"feature_log_prob": obj.feature_log_prob_,
+                                    "class_log_prior": obj.class_log_prior_,
+                                    "classes": _labels(obj.classes_)})
+    elif isinstance(obj, RandomForestClassifier):
+        _export_forest(obj, path)
+    elif isinstance(obj, LabelEncoder):
+        _save(path, "label_encoder", {"classes": _labels(obj.classes_)})
+    elif isinstance(obj, Tokenizer) or type(obj).__name__ == "Tokenizer":
+        config = {k: v for k, v in vars(obj).items()
+                  if k in ("num_words", "filters", "lower", "split", "char_level", "oov_token")}
+        vocabulary = SortedVocabulary.from_dict(obj.word_index)
+        _save(path, "tokenizer", {"words": vocabulary.terms, "indices": vocabulary.indices}, config=config)
+    elif hasattr(obj, "coef_") and hasattr(obj, "classes_"):
+        _save(path, "linear", {"coef": obj.coef_, "intercept": obj.intercept_, "classes": _labels(obj.classes_)})
+    else:
+        raise ValueError(f"Tipo de artefato não suportado: {type(obj).__name__}")
+
+
+def load_artifact(path, mmap_mode="r"):
+    """Abre um artefato exportado; os arrays são mapeados em memória"""
+    with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta["kind"] == "pipeline":
+        return CompactPipeline([(name.split("_", 1)[1], load_artifact(os.path.join(path, name), mmap_mode))
+                                for name in meta["steps"]])
+    return KINDS[meta["kind"]](meta, _load_arrays(path, mmap_mode))
+
+
+def export_directory(directory, out_dir=None, logger=None):
+    """Exporta os artefatos .pkl de uma versão para <versão>/compact/<nome>"""
+    import joblib
+
+    out_dir = out_dir or os.path.join(directory, COMPACT_DIR)
+    exported = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".pkl"):
+            continue
+        path = os.path.join(directory, name)
+        obj = load_tokenizer(path) if name == "cnn_tokenizer.pkl" else joblib.load(path)
+        try:
+            export_artifact(obj, os.path.join(out_dir, name[:-4]))
+            exported.append(name[:-4])
+        except ValueError as e:
+            if logger:
+                logger.warning(f"{name} não exportado: {str(e)}")
+    return exported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta os artefatos de uma versão para o formato compacto")
+    parser.add_argument("directory", help="Diretório da versão (ex.: models ou models/v3)")
+    parser.add_argument("--out", help="Diretório de saída (padrão: <diretório>/compact)")
+    args = parser.parse_args()
+
+    exported = export_directory(args.directory, args.out)
+    out_dir = args.out or os.path.join(args.directory, COMPACT_DIR)
+    start = time.perf_counter()
+    for name in exported:
+        load_artifact(os.path.join(out_dir, name))
+    print(f"Exportados: {', '.join(exported)}")
+    print(f"Carregamento do formato compacto: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
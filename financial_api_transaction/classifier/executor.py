@@ -0,0 +1,153 @@
+import threading
+import time
+import multiprocessing
+
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError
+
+# Modelos carregados em cada processo do pool (um carregamento por processo)
+_process_models = {}
+
+
+def _load_process_models(paths):
+    """Inicializador dos processos: carrega modelo e vectorizer de cada entrada"""
+    import joblib
+    for name, (model_path, vectorizer_path) in paths.items():
+        _process_models[name] = (joblib.load(model_path), joblib.load(vectorizer_path))
+
+
+def _predict_in_process(name, descriptions):
+    """Executa a predição (vectorizer + modelo) dentro de um processo do pool"""
+    modelo, vectorizer = _process_models[name]
+    return list(modelo.predict(vectorizer.transform(descriptions)))
+
+
+class InferenceExecutor:
+    """
+    Executa as predições dos modelos em paralelo.
+
+    Usa um pool de threads (sklearn e TensorFlow liberam o GIL nas operações
+    pesadas) e, opcionalmente, um pool de processos para modelos como o
+    Randon Forest. Cada modelo tem um prazo; quem não responde a tempo é
+    contado como abstenção (None) e a requisição não fica bloqueada.
+
+    Uma predição já iniciada não pode ser cancelada: enquanto a chamada que
+    estourou o prazo não termina, o modelo não recebe novas tarefas e
+    continua se abstendo (skipped). Assim um modelo travado ocupa no máximo
+    um worker do pool em vez de um por requisição.
+    """
+
+    def __init__(self, max_workers=4, timeout=2.0, timeouts=None,
+                 process_models=None, process_workers=0, logger=None):
+        self.timeout = timeout
+        self.logger = logger
+        self.timeouts = dict(timeouts or {})
+        self._threads = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inferencia")
+        self.process_workers = process_workers
+        self._processes = None
+        self._process_names = set()
+        self.reload_process_models(process_models)
+
+        self._lock = threading.Lock()
+        self._stats = {}
+        # Chamadas que estouraram o prazo e ainda estão em execução: {nome: future}
+        self._stuck = {}
+
+    def reload_process_models(self, process_models):
+        """(Re)cria o pool de processos com os caminhos dos modelos (ex.: após trocar a versão)"""
+        old = self._processes
+        self._processes = None
+        self._process_names = set()
+        if process_models and self.process_workers > 0:
+            self._processes = ProcessPoolExecutor(
+                max_workers=self.process_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_load_process_models,
+                initargs=(process_models,)
+            )
+            self._process_names = set(process_models)
+        if old:
+            old.shutdown(wait=False)
+
+    def runs_in_process(self, name):
+        """Indica se o modelo é executado no pool de processos"""
+        return name in self._process_names
+
+    def deadline_for(self, name):
+        return self.timeouts.get(name, self.timeout)
+
+    def _record(self, name, outcome):
+        with self._lock:
+            stats = self._stats.setdefault(name, {"calls": 0, "timeouts": 0, "errors": 0, "skipped": 0})
+            stats["calls"] += 1
+            if outcome != "ok":
+                stats[outcome] += 1
+
+    def _mark_stuck(self, name, future):
+        """Guarda a chamada que estourou o prazo até ela terminar"""
+        with self._lock:
+            self._stuck[name] = future
+        if self.logger:
+            self.logger.warning(f"Modelo '{name}' estourou o prazo e continua em execução; "
+                                f"abstenção até a chamada terminar")
+
+        def release(done):
+            with self._lock:
+                if self._stuck.get(name) is done:
+                    del self._stuck[name]
+        future.add_done_callback(release)
+
+    def stuck(self):
+        """Modelos com uma chamada que estourou o prazo e ainda ocupa um worker"""
+        with self._lock:
+            return sorted(self._stuck)
+
+    def run(self, tasks, process_tasks=None):
+        """
+        Executa as tarefas em paralelo e retorna {nome: predição}.
+
+        tasks: {nome: função sem argumentos} executadas no pool de threads.
+        process_tasks: {nome: descrição} executadas no pool de processos.
+        """
+        start = time.monotonic()
+        stuck = set(self.stuck())
+        results = {}
+        for name in stuck & (set(tasks) | set(process_tasks or {})):
+            results[name] = None
+            self._record(name, "skipped")
+
+        futures = {name: self._threads.submit(task) for name, task in tasks.items() if name not in stuck}
+        for name, description in (process_tasks or {}).items():
+            if name not in stuck:
+                futures[name] = self._processes.submit(_predict_in_process, name, [description])
+
+        for name in sorted(futures, key=self.deadline_for):
+            remaining = max(0.0, start + self.deadline_for(name) - time.monotonic())
+            try:
+                result = futures[name].result(timeout=remaining)
+                if name in (process_tasks or {}):
+                    result = result[0]
+                results[name] = result
+                self._record(name, "ok")
+            except TimeoutError:
+                if not futures[name].cancel():
+                    self._mark_stuck(name, futures[name])
+                results[name] = None
+                self._record(name, "timeouts")
+            except Exception:
+                results[name] = None
+                self._record(name, "errors")
+        return results
+
+    def stats(self):
+        """Retorna chamadas, prazos estourados, erros e abstenções por modelo travado"""
+        with self._lock:
+            return {
+                name: dict(stats, timeout_rate=round(stats["timeouts"] / stats["calls"], 4),
+                           deadline=self.deadline_for(name), stuck=name in self._stuck)
+                for name, stats in self._stats.items()
+            }
+
+    def shutdown(self):
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processes:
+            self._processes.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,131 @@
+import hashlib
+import pickle
+import threading
+import weakref
+
+from contextlib import contextmanager
+
+from classifier.registry import resolve
+
+
+def vectorizer_fingerprint(vectorizer):
+    """Hash do estado treinado: vectorizers com o mesmo hash produzem a mesma matriz"""
+    return hashlib.sha1(pickle.dumps(vectorizer, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+
+
+class _Slot:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.done = False
+        self.value = None
+
+
+class FeatureScope:
+    """Matrizes já calculadas para um conjunto de descrições (uma requisição ou lote)"""
+
+    def __init__(self, descriptions):
+        self.descriptions = descriptions
+        self._lock = threading.Lock()
+        self._slots = {}
+
+    def matches(self, descriptions):
+        return self.descriptions is descriptions or self.descriptions == descriptions
+
+    def slot(self, key):
+        with self._lock:
+            return self._slots.setdefault(key, _Slot())
+
+
+class FeatureExtractor:
+    """
+    Etapa de extração de atributos compartilhada entre os modelos.
+
+    Os vectorizers são identificados pelo hash do seu estado treinado. Dentro
+    de um escopo (uma requisição ou lote) cada matriz distinta é calculada uma
+    única vez e reaproveitada pelos demais modelos que usam o mesmo vectorizer.
+    """
+
+    def __init__(self):
+        self._fingerprints = weakref.WeakKeyDictionary()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.transforms = 0
+        self.avoided = 0
+
+    def fingerprint(self, vectorizer):
+        vectorizer = resolve(vectorizer)
+        # Artefatos no formato compacto já trazem o hash gravado na exportação
+        if isinstance(getattr(vectorizer, "fingerprint", None), str):
+            return vectorizer.fingerprint
+        try:
+            return self._fingerprints[vectorizer]
+        except KeyError:
+            pass
+        try:
+            key = vectorizer_fingerprint(vectorizer)
+        except Exception:
+            key = f"id:{id(vectorizer)}"
+        self._fingerprints[vectorizer] = key
+        return key
+
+    @contextmanager
+    def scope(self, descriptions):
+        """Abre um escopo para as descrições na thread atual"""
+        with self.attach(FeatureScope(descriptions)) as scope:
+            yield scope
+
+    @contextmanager
+    def attach(self, scope):
+        """Usa um escopo já aberto (por exemplo, nas threads do executor paralelo)"""
+        previous = getattr(self._local, "scope", None)
+        self._local.scope = scope
+        try:
+            yield scope
+        finally:
+            self._local.scope = previous
+
+    def current(self):
+        return getattr(self._local, "scope", None)
+
+    def _count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def transform(self, vectorizer, descriptions):
+        """vectorizer.transform(descriptions), reaproveitando a matriz do escopo atual"""
+        vectorizer = resolve(vectorizer)
+        scope = self.current()
+        if scope is None or not scope.matches(descriptions):
+            self._count("transforms")
+            return vectorizer.transform(descriptions)
+
+        slot = scope.slot(self.fingerprint(vectorizer))
+        with slot.lock:
+            if slot.done:
+                self._count("avoided")
+                return slot.value
+            slot.value = vectorizer.transform(descriptions)
+            slot.done = True
+        self._count("transforms")
+        return slot.value
+
+    def predict(self, model, descriptions):
+        """
+        Predição de um modelo. Se for um Pipeline iniciado por um vectorizer,
+        a matriz do primeiro passo também passa pelo escopo.
+        """
+        model = resolve(model)
+        steps = getattr(model, "steps", None)
+        if not steps or len(steps) < 2 or not hasattr(steps[0][1], "transform"):
+            return model.predict(descriptions)
+        X = self.transform(steps[0][1], descriptions)
+        return model[1:].predict(X)
+
+    def stats(self):
+        with self._lock:
+            total = self.transforms + self.avoided
+            return {
+                "transforms": self.transforms,
+                "avoided": self.avoided,
+                "avoided_rate": round(self.avoided / total, 4) if total else 0.0
+            }
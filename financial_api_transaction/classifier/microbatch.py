@@ -0,0 +1,116 @@
+import queue
+import threading
+import time
+
+from concurrent.futures import Future
+
+# Limites das faixas do histograma de tamanho dos lotes
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class MicroBatcher:
+    """
+    Agrupa classificações individuais concorrentes em lotes.
+
+    Cada chamada entra numa fila e recebe um Future. Uma thread coleta os
+    itens por até max_wait_ms (contados a partir do primeiro item) ou até
+    max_batch_size itens, executa uma única predição em lote e resolve o
+    Future de cada chamador.
+    """
+
+    def __init__(self, process_batch, max_batch_size=32, max_wait_ms=5.0, result_timeout=30.0, logger=None):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.result_timeout = result_timeout
+        self.logger = logger
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._reset_stats()
+        self._thread = threading.Thread(target=self._run, name="microbatch", daemon=True)
+        self._thread.start()
+
+    def _reset_stats(self):
+        self.batches = 0
+        self.items = 0
+        self.max_batch_seen = 0
+        self.flush_by_size = 0
+        self.flush_by_time = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.histogram = {bucket: 0 for bucket in BATCH_SIZE_BUCKETS}
+        self.histogram["+Inf"] = 0
+
+    def submit(self, item):
+        """Enfileira o item e retorna o Future com o resultado"""
+        future = Future()
+        self._queue.put((item, future, time.monotonic()))
+        return future
+
+    def __call__(self, item):
+        """Classifica um item aguardando o lote em que ele for incluído"""
+        return self.submit(item).result(timeout=self.result_timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _record(self, batch, started):
+        waits = [started - enqueued for _, _, enqueued in batch]
+        size = len(batch)
+        with self._lock:
+            self.batches += 1
+            self.items += size
+            self.max_batch_seen = max(self.max_batch_seen, size)
+            if size >= self.max_batch_size:
+                self.flush_by_size += 1
+            else:
+                self.flush_by_time += 1
+            self.wait_total += sum(waits)
+            self.wait_max = max(self.wait_max, max(waits))
+            bucket = next((b for b in BATCH_SIZE_BUCKETS if size <= b), "+Inf")
+            self.histogram[bucket] += 1
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.monotonic()
+            self._record(batch, started)
+            items = [item for item, _, _ in batch]
+            try:
+                results = self.process_batch(items)
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"Erro ao processar micro-lote de {len(batch)} itens: {str(e)}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+
+    def stats(self):
+        """Métricas: tamanho dos lotes e tempo de espera na fila"""
+        with self._lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "batches": self.batches,
+                "items": self.items,
+                "queue_size": self._queue.qsize(),
+                "batch_size_avg": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "batch_size_max": self.max_batch_seen,
+                "batch_size_histogram": {str(k): v for k, v in self.histogram.items()},
+                "flush_by_size": self.flush_by_size,
+                "flush_by_time": self.flush_by_time,
+                "queue_wait_avg_ms": round(self.wait_total / self.items * 1000, 3) if self.items else 0.0,
+                "queue_wait_max_ms": round(self.wait_max * 1000, 3)
+            }
@@ -0,0 +1,249 @@
+import os
+import re
+import shutil
+import threading
+import time
+
+from contextlib import contextmanager
+
+import joblib
+import numpy as np
+
+from classifier.versions import BASE_VERSION
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: sem fcntl o servidor roda em um único processo
+    fcntl = None
+
+# Versões geradas pelo aprendizado incremental: models/online-1, models/online-2, ...
+ONLINE_PREFIX = "online-"
+
+# Modelos com partial_fit: Naive Bayes (pipeline) e regressão logística (convertida para SGD)
+ONLINE_MODELS = {
+    "nb": ("naive_bayes_model.pkl", None),
+    "lr": ("logistic_regression_model.pkl", "logistic_regression_vectorizer.pkl")
+}
+
+# Trava do ciclo em models/: um único aprendizado por implantação, entre workers e processos
+LOCK_FILE = ".online.lock"
+
+# Passo do SGD que substitui a regressão logística
+SGD_PARAMS = {"loss": "log_loss", "alpha": 1e-4, "learning_rate": "constant", "eta0": 0.05}
+
+
+def to_sgd(modelo, X, y, random_state=0):
+    """
+    SGDClassifier (log_loss) com os coeficientes da regressão logística: as predições são as
+    mesmas da regressão logística até o primeiro partial_fit.
+    """
+    from sklearn.linear_model import SGDClassifier
+
+    sgd = SGDClassifier(random_state=random_state, **SGD_PARAMS)
+    sgd.partial_fit(X[:1], y[:1], classes=modelo.classes_)
+    # O SGD atualiza os coeficientes no lugar e exige arrays contíguos (ordem C)
+    sgd.coef_ = np.array(modelo.coef_, dtype=np.float64, order="C", copy=True)
+    sgd.intercept_ = np.array(modelo.intercept_, dtype=np.float64, order="C", copy=True)
+    return sgd
+
+
+def link_or_copy(src, dst):
+    """Hard link quando possível (artefatos não alterados não ocupam espaço em disco)"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class OnlineLearner:
+    """
+    Aprendizado incremental com as correções de categoria.
+
+    A cada intervalo, com pelo menos min_feedback correções pendentes, copia a versão ativa para
+    models/online-N, aplica partial_fit no Naive Bayes e na regressão logística (substituída por
+    SGD na primeira vez) e ativa a nova versão por ModelVersions (predição de teste + troca
+    atômica). Random Forest e CNN continuam os da versão de origem.
+
+    feedback é a fonte das correções: pending() -> int, claim(version, limit) -> [(descrição,
+    categoria)] e release(version) para devolver as correções se a versão falhar.
+
+    Com vários workers, cada um tem o seu OnlineLearner: o ciclo roda sob uma trava de arquivo em
+    models/ e parte da versão gravada no manifest, assim só um deles publica por vez e nenhum
+    publica a partir de uma versão ativa desatualizada.
+    """
+
+    def __init__(self, versions, feedback, interval=300, min_feedback=10, max_feedback=1000,
+                 sample_weight=5.0, keep_versions=3, after_build=None, logger=None):
+        self.versions = versions
+        self.feedback = feedback
+        self.interval = interval
+        self.min_feedback = min_feedback
+        self.max_feedback = max_feedback
+        self.sample_weight = sample_weight
+        self.keep_versions = keep_versions
+        self.after_build = after_build
+        self.logger = logger
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {"runs": 0, "published": 0, "failed": 0, "learned": 0, "skipped": 0,
+                       "last_version": None, "last_run": None, "last_error": None}
+
+    # Versões -----------------------------------------------------------------------------------
+    def online_versions(self):
+        numbers = [int(m.group(1)) for m in (re.fullmatch(rf"{ONLINE_PREFIX}(\d+)", name)
+                                             for name in os.listdir(self.versions.models_dir)) if m]
+        return [f"{ONLINE_PREFIX}{n}" for n in sorted(numbers)]
+
+    def next_version(self):
+        versions = self.online_versions()
+        return f"{ONLINE_PREFIX}{int(versions[-1][len(ONLINE_PREFIX):]) + 1 if versions else 1}"
+
+    def reserve_version(self):
+        """
+        Reserva o nome da próxima versão criando o diretório (os.mkdir é atômico): dois workers
+        ou processos nunca recebem o mesmo nome
+        """
+        while True:
+            version = self.next_version()
+            try:
+                os.mkdir(self.versions.version_dir(version))
+                return version
+            except FileExistsError:
+                continue
+
+    def build_version(self, version, descriptions, categories, source=None):
+        """Copia a versão ativa (ou source) e atualiza os modelos com partial_fit; retorna as correções usadas"""
+        source = source or self.versions.active_dir
+        target = self.versions.version_dir(version)
+        os.makedirs(target, exist_ok=True)
+        for name in os.listdir(source):
+            if os.path.isfile(os.path.join(source, name)) and name.endswith((".pkl", ".h5")):
+                link_or_copy(os.path.join(source, name), os.path.join(target, name))
+
+        learned = 0
+        for model_file, vectorizer_file in ONLINE_MODELS.values():
+            path = os.path.join(target, model_file)
+            if not os.path.exists(path):
+                continue
+            modelo = joblib.load(path)
+            if vectorizer_file:
+                estimator, X = None, joblib.load(os.path.join(target, vectorizer_file)).transform(descriptions)
+            else:
+                # Pipeline do Naive Bayes: o vocabulário do CountVectorizer é mantido
+                estimator, X = modelo.steps[-1][1], modelo[:-1].transform(descriptions)
+            classifier = estimator or modelo
+            y = np.asarray(categories, dtype=object)
+            # partial_fit não aceita classes novas: categorias desconhecidas pelo modelo são ignoradas
+            known = np.isin(y, classifier.classes_)
+            if not known.any():
+                continue
+            X, y = X[known], y[known]
+            if not hasattr(classifier, "partial_fit"):
+                classifier = to_sgd(classifier, X, y)
+                modelo = classifier
+            classifier.partial_fit(X, y, sample_weight=np.full(len(y), self.sample_weight))
+            # Remove o arquivo antes de gravar: ele pode ser um hard link da versão de origem
+            os.remove(path)
+            joblib.dump(modelo, path)
+            learned = max(learned, int(known.sum()))
+        if self.after_build:
+            self.after_build(target)
+        return learned
+
+    def prune(self):
+        """Remove as versões online antigas (mantém as keep_versions mais novas, a ativa e a anterior)"""
+        protected = {self.versions.active_version, self.versions.previous.version if self.versions.previous else None}
+        for version in self.online_versions()[:-self.keep_versions or None]:
+            if version not in protected:
+                shutil.rmtree(self.versions.version_dir(version), ignore_errors=True)
+
+    # Ciclo -------------------------------------------------------------------------------------
+    @contextmanager
+    def _deployment_lock(self):
+        """Trava não bloqueante em models/; retorna False se outro processo está em um ciclo"""
+        if fcntl is None:
+            yield True
+            return
+        with open(os.path.join(self.versions.models_dir, LOCK_FILE), "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def run_once(self):
+        """Um ciclo de aprendizado; retorna a versão publicada ou None"""
+        with self._lock, self._deployment_lock() as acquired:
+            self._stats["runs"] += 1
+            self._stats["last_run"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+            if not acquired or self.feedback.pending() < self.min_feedback:
+                self._stats["skipped"] += 1
+                return None
+
+            # Parte da última versão publicada (por outro worker, inclusive), não da que está em memória
+            self.versions.sync_manifest()
+            source = self.versions.version_dir(self.versions.read_manifest().get("active") or BASE_VERSION)
+
+            # O diretório reservado é desta execução: só ele é removido se a versão falhar
+            version = self.reserve_version()
+            start = time.perf_counter()
+            try:
+                rows = self.feedback.claim(version, self.max_feedback)
+            except Exception:
+                shutil.rmtree(self.versions.version_dir(version), ignore_errors=True)
+                raise
+            if not rows:
+                # Outro processo levou as correções pendentes
+                shutil.rmtree(self.versions.version_dir(version), ignore_errors=True)
+                self._stats["skipped"] += 1
+                return None
+            try:
+                learned = self.build_version(version, [d for d, _ in rows], [c for _, c in rows], source)
+                self.versions.activate(version, background=False)
+                if self.versions.activation["state"] != "active":
+                    raise RuntimeError(self.versions.activation["error"])
+            except Exception as e:
+                self.feedback.release(version)
+                shutil.rmtree(self.versions.version_dir(version), ignore_errors=True)
+                self._stats["failed"] += 1
+                self._stats["last_error"] = str(e)
+                if self.logger:
+                    self.logger.error(f"Falha no aprendizado incremental ({version}): {str(e)}")
+                return None
+
+            self._stats["published"] += 1
+            self._stats["learned"] += learned
+            self._stats["last_version"] = version
+            self._stats["last_error"] = None
+            if self.logger:
+                self.logger.warning(f"Versão '{version}' publicada com {len(rows)} correções "
+                                    f"em {time.perf_counter() - start:.2f}s")
+            self.prune()
+            return version
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"Erro no aprendizado incremental: {str(e)}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="aprendizado-incremental", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        return dict(self._stats, pending=self.feedback.pending())
@@ -0,0 +1,111 @@
+import threading
+import time
+
+
+class ModelNotReadyError(RuntimeError):
+    """Erro lançado quando um artefato não pôde ser carregado"""
+
+
+class _Entry:
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.state = "pending"
+        self.value = None
+        self.error = None
+        self.load_time = None
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """
+    Registro dos artefatos de classificação com carregamento sob demanda.
+
+    Cada artefato é carregado uma única vez: na primeira utilização ou pela
+    thread de aquecimento (start_warmup). Enquanto isso os demais endpoints
+    continuam atendendo normalmente.
+    """
+
+    def __init__(self, loaders, logger=None):
+        self.logger = logger
+        self._entries = {name: _Entry(name, loader) for name, loader in loaders.items()}
+        self._warmup_thread = None
+
+    def _load(self, entry):
+        with entry.lock:
+            if entry.state in ("ready", "failed"):
+                return
+            entry.state = "loading"
+            start = time.perf_counter()
+            try:
+                entry.value = entry.loader()
+                entry.state = "ready"
+            except Exception as e:
+                entry.error = str(e)
+                entry.state = "failed"
+                if self.logger:
+                    self.logger.error(f"Erro ao carregar o artefato '{entry.name}': {str(e)}")
+            finally:
+                entry.load_time = round(time.perf_counter() - start, 3)
+            if self.logger and entry.state == "ready":
+                self.logger.info(f"Artefato '{entry.name}' carregado em {entry.load_time}s")
+
+    def get(self, name):
+        """Retorna o artefato, carregando-o (ou aguardando o carregamento) se necessário"""
+        entry = self._entries[name]
+        if entry.state != "ready":
+            self._load(entry)
+        if entry.state == "failed":
+            raise ModelNotReadyError(f"Artefato '{name}' indisponível: {entry.error}")
+        return entry.value
+
+    def proxy(self, name):
+        """Retorna um objeto que repassa atributos ao artefato, carregando-o no primeiro uso"""
+        return LazyArtifact(self, name)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def load_all(self):
+        for entry in self._entries.values():
+            self._load(entry)
+
+    def start_warmup(self):
+        """Carrega todos os artefatos em uma thread em segundo plano"""
+        if self._warmup_thread is None:
+            self._warmup_thread = threading.Thread(target=self.load_all, name="aquecimento-modelos", daemon=True)
+            self._warmup_thread.start()
+        return self._warmup_thread
+
+    def is_ready(self):
+        return all(entry.state == "ready" for entry in self._entries.values())
+
+    def status(self):
+        """Estado e tempo de carregamento de cada artefato"""
+        return {
+            name: {"state": entry.state, "load_time": entry.load_time, "error": entry.error}
+            for name, entry in self._entries.items()
+        }
+
+
+class LazyArtifact:
+    """Representa um artefato do registro; o carregamento só ocorre no primeiro acesso"""
+
+    __slots__ = ("_registry", "_name")
+
+    def __init__(self, registry, name):
+        self._registry = registry
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._registry.get(self._name), attr)
+
+    def __repr__(self):
+        return f"<LazyArtifact {self._name}>"
+
+
+def resolve(artifact):
+    """Retorna o objeto real por trás de um LazyArtifact"""
+    if isinstance(artifact, LazyArtifact):
+        return artifact._registry.get(artifact._name)
+    return artifact
@@ -0,0 +1,423 @@
+"""
+Processo classificador compartilhado pelos workers web.
+
+Os workers enviam as descrições por um socket Unix local usando um protocolo
+binário compacto:
+
+    requisição: op (1 byte) + tamanho (4 bytes) + conteúdo
+    resposta:   status (1 byte, 0 = ok) + tamanho (4 bytes) + conteúdo
+
+CLASSIFY leva a lista de descrições (quantidade em 4 bytes e cada texto
+UTF-8 prefixado por 4 bytes) e devolve a versão dos modelos e as categorias
+no mesmo formato. PING (estado/saúde), ACTIVATE e ROLLBACK trocam JSON.
+
+Execução do processo (Linux/macOS):
+    python -m classifier.sidecar --socket /tmp/classifier.sock --handler app:SidecarHandler
+"""
+import argparse
+import fcntl
+import importlib
+import json
+import os
+import signal
+import socket
+import socketserver
+import struct
+import subprocess
+import threading
+import time
+
+HEADER = struct.Struct(">BI")
+COUNT = struct.Struct(">I")
+LENGTH = struct.Struct(">I")
+
+OP_PING = 0
+OP_CLASSIFY = 1
+OP_ACTIVATE = 2
+OP_ROLLBACK = 3
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+STATUS_INVALID = 2  # Requisição inválida (ValueError no processo classificador)
+
+
+class SidecarError(RuntimeError):
+    """Erro retornado pelo processo classificador"""
+
+
+# Protocolo -------------------------------------------------------------------------------------
+def encode_strings(strings):
+    parts = [COUNT.pack(len(strings))]
+    for value in strings:
+        data = (value or "").encode("utf-8")
+        parts.append(LENGTH.pack(len(data)))
+        parts.append(data)
+    return b"".join(parts)
+
+
+def decode_strings(payload, offset=0):
+    (count,) = COUNT.unpack_from(payload, offset)
+    offset += COUNT.size
+    strings = []
+    for _ in range(count):
+        (size,) = LENGTH.unpack_from(payload, offset)
+        offset += LENGTH.size
+        strings.append(payload[offset:offset + size].decode("utf-8"))
+        offset += size
+    return strings, offset
+
+
+def encode_classification(categories, version):
+    return encode_strings([version] + list(categories))
+
+
+def decode_classification(payload):
+    strings, _ = decode_strings(payload)
+    return strings[1:], strings[0]
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("Conexão encerrada pelo processo classificador")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_frame(sock, code, payload=b""):
+    sock.sendall(HEADER.pack(code, len(payload)) + payload)
+
+
+def recv_frame(sock):
+    code, size = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    return code, _recv_exact(sock, size)
+
+
+# Servidor --------------------------------------------------------------------------------------
+class _RequestHandler(socketserver.BaseRequestHandler):
+    def setup(self):
+        self.server.connections.add(self.request)
+
+    def finish(self):
+        self.server.connections.discard(self.request)
+
+    def handle(self):
+        handler = self.server.handler
+        while True:
+            try:
+                op, payload = recv_frame(self.request)
+            except (ConnectionError, OSError):
+                return
+            try:
+                if op == OP_CLASSIFY:
+                    descriptions, _ = decode_strings(payload)
+                    categories, version = handler.classify(descriptions)
+                    response = encode_classification(categories, version)
+                elif op == OP_PING:
+                    response = json.dumps(handler.status()).encode("utf-8")
+                elif op == OP_ACTIVATE:
+                    response = json.dumps(handler.activate(payload.decode("utf-8"))).encode("utf-8")
+                elif op == OP_ROLLBACK:
+                    response = json.dumps(handler.rollback()).encode("utf-8")
+                else:
+                    raise ValueError(f"Operação desconhecida: {op}")
+                send_frame(self.request, STATUS_OK, response)
+            except ValueError as e:
+                send_frame(self.request, STATUS_INVALID, str(e).encode("utf-8"))
+            except Exception as e:
+                send_frame(self.request, STATUS_ERROR, str(e).encode("utf-8"))
+
+
+class SidecarServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Servidor do processo classificador (uma thread por conexão)"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, handler):
+        self.handler = handler
+        self.connections = set()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _RequestHandler)
+
+    def server_close(self):
+        """Encerra também as conexões abertas pelos workers web"""
+        super().server_close()
+        for connection in list(self.connections):
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+# Cliente ---------------------------------------------------------------------------------------
+class SidecarClient:
+    """
+    Cliente usado pelos workers web. Mantém uma conexão persistente por thread
+    e guarda a última versão de modelos informada pelo processo classificador
+    (na classificação, no PING do supervisor e na ativação/rollback); os callbacks
+    de on_version_change recebem cada troca, ex.: para esvaziar o cache do worker.
+    """
+
+    def __init__(self, socket_path, timeout=30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.version = None
+        self.on_version_change = []
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+        self._local.sock = None
+
+    def request(self, op, payload=b"", timeout=None):
+        """
+        Envia uma requisição; reconecta e reenvia uma vez apenas se a conexão falhar antes do
+        envio terminar (conexão recusada ou caída). Depois do envio, inclusive em timeout, o erro
+        é repassado: o processo classificador pode já estar processando a requisição.
+        """
+        for attempt in (1, 2):
+            sent = False
+            try:
+                if getattr(self._local, "sock", None) is None:
+                    self._local.sock = self._connect()
+                self._local.sock.settimeout(timeout or self.timeout)
+                send_frame(self._local.sock, op, payload)
+                sent = True
+                status, response = recv_frame(self._local.sock)
+                break
+            except OSError as e:
+                self._close()
+                if attempt == 2 or sent or isinstance(e, socket.timeout):
+                    raise
+        if status == STATUS_INVALID:
+            raise ValueError(response.decode("utf-8"))
+        if status != STATUS_OK:
+            raise SidecarError(response.decode("utf-8"))
+        return response
+
+    def _observe(self, version):
+        if version and version != self.version:
+            previous, self.version = self.version, version
+            if previous is not None:
+                for callback in self.on_version_change:
+                    callback(version)
+
+    def classify(self, descriptions):
+        """Classifica as descrições no processo classificador e retorna as categorias"""
+        categories, version = decode_classification(self.request(OP_CLASSIFY, encode_strings(descriptions)))
+        self._observe(version)
+        return categories
+
+    def status(self, timeout=None):
+        """Estado das versões de modelos no processo classificador"""
+        status = json.loads(self.request(OP_PING, timeout=timeout))
+        self._observe(status.get("active"))
+        return status
+
+    def ping(self, timeout=2.0):
+        """Retorna o estado do processo classificador ou None se ele não responder"""
+        try:
+            return self.status(timeout=timeout)
+        except (OSError, ConnectionError, SidecarError, ValueError):
+            return None
+
+    def activate(self, version):
+        """A ativação é concluída em segundo plano: a nova versão é vista no PING seguinte"""
+        status = json.loads(self.request(OP_ACTIVATE, version.encode("utf-8")))
+        self._observe(status.get("active"))
+        return status
+
+    def rollback(self):
+        status = json.loads(self.request(OP_ROLLBACK))
+        self._observe(status.get("active"))
+        return status
+
+
+# Supervisor ------------------------------------------------------------------------------------
+class SidecarSupervisor:
+    """
+    Mantém o processo classificador no ar: verifica a saúde periodicamente
+    (PING) e reinicia o processo quando ele terminou ou quando não responde
+    em max_failures verificações seguidas (um processo ocupado com um lote
+    grande ou carregando modelos não é encerrado). Um lock de arquivo
+    garante que apenas um worker web inicie o processo; o pid fica em
+    <socket>.pid para que o supervisor de qualquer worker encerre o processo
+    anterior (lento ou travado) antes de iniciar outro.
+    """
+
+    def __init__(self, command, client, check_interval=5.0, startup_timeout=120.0, stop_timeout=10.0,
+                 max_failures=3, ping_timeout=None, env=None, cwd=None, logger=None):
+        self.command = command
+        self.client = client
+        self.check_interval = check_interval
+        self.max_failures = max_failures
+        # Padrão: o prazo das requisições dos workers (a maior espera aceitável do processo)
+        self.ping_timeout = ping_timeout or client.timeout
+        self.startup_timeout = startup_timeout
+        self.stop_timeout = stop_timeout
+        self.env = env
+        self.cwd = cwd
+        self.logger = logger
+        self.process = None
+        self.restarts = 0
+        self.failures = 0
+        self.last_status = None
+        self._thread = None
+
+    def _wait_until_alive(self):
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            status = self.client.ping()
+            if status is not None:
+                return status
+            if self.process is not None and self.process.poll() is not None:
+                break
+            time.sleep(0.1)
+        return None
+
+    @property
+    def pidfile(self):
+        return self.client.socket_path + ".pid"
+
+    def _read_pid(self):
+        try:
+            with open(self.pidfile) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def _signal(self, pid, sig):
+        """Envia o sinal ao grupo do processo (start_new_session: inclui os processos filhos)"""
+        try:
+            os.killpg(pid, sig)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            # pid reaproveitado por um processo de outro usuário: não é o processo classificador
+            return False
+        return True
+
+    def _exited(self, pid):
+        if self.process is not None and self.process.pid == pid:
+            return self.process.poll() is not None
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        # Processo de outro worker já encerrado, mas ainda não coletado (zumbi)
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                return f.read().rsplit(")", 1)[1].split()[0] == "Z"
+        except OSError:
+            return False
+
+    def _wait_exit(self, pid, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._exited(pid):
+                return True
+            time.sleep(0.05)
+        return self._exited(pid)
+
+    def stop_previous(self):
+        """
+        Encerra o processo classificador anterior (deste ou de outro worker, pelo pidfile):
+        SIGTERM, espera até stop_timeout e SIGKILL se ele não terminar.
+        """
+        pid = self._read_pid() or (self.process.pid if self.process is not None else None)
+        if pid is None or self._exited(pid):
+            return
+        if self.logger:
+            self.logger.warning(f"Encerrando o processo classificador anterior (pid {pid})")
+        if self._signal(pid, signal.SIGTERM) and not self._wait_exit(pid, self.stop_timeout):
+            self._signal(pid, signal.SIGKILL)
+            self._wait_exit(pid, self.stop_timeout)
+        if self.process is not None and self.process.pid == pid:
+            self.process.wait()
+
+    def _running(self):
+        """Há um processo classificador vivo (deste ou de outro worker, pelo pidfile)"""
+        pid = self._read_pid() or (self.process.pid if self.process is not None else None)
+        return pid is not None and not self._exited(pid)
+
+    def ensure_running(self):
+        """
+        Inicia o processo classificador se ele não existe ou terminou; um processo vivo que
+        não responde só é reiniciado após max_failures verificações seguidas sem resposta
+        """
+        status = self.client.ping(timeout=self.ping_timeout)
+        self.failures = 0 if status is not None else self.failures + 1
+        if status is None and self._running() and self.failures < self.max_failures:
+            if self.logger:
+                self.logger.warning(f"Processo classificador sem resposta ({self.failures}/{self.max_failures})")
+        elif status is None:
+            with open(self.client.socket_path + ".lock", "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                # Outro worker pode ter iniciado um processo enquanto este esperava o lock
+                status = self.client.ping(timeout=self.ping_timeout) if self._running() else None
+                if status is None:
+                    if self.logger:
+                        self.logger.warning("Processo classificador não responde; iniciando um novo")
+                    # Travado: não pode continuar com os modelos em memória ao lado do novo processo
+                    self.stop_previous()
+                    env = dict(os.environ, **(self.env or {}))
+                    self.process = subprocess.Popen(self.command, env=env, cwd=self.cwd, start_new_session=True)
+                    with open(self.pidfile, "w") as f:
+                        f.write(str(self.process.pid))
+                    self.restarts += 1
+                    status = self._wait_until_alive()
+                self.failures = 0
+        self.last_status = status
+        return status is not None
+
+    def _monitor(self):
+        while True:
+            try:
+                self.ensure_running()
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"Erro ao verificar o processo classificador: {str(e)}")
+            time.sleep(self.check_interval)
+
+    def start(self):
+        """Inicia a verificação de saúde em segundo plano"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._monitor, name="supervisor-classificador", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def status(self):
+        return {
+            "alive": self.last_status is not None,
+            "pid": self.process.pid if self.process else None,
+            "restarts": self.restarts,
+            "worker": self.last_status
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Processo classificador compartilhado pelos workers web")
+    parser.add_argument("--socket", required=True, help="Caminho do socket Unix")
+    parser.add_argument("--handler", required=True, help="Classe que classifica as descrições (modulo:Classe)")
+    args = parser.parse_args()
+
+    module_name, class_name = args.handler.split(":")
+    handler = getattr(importlib.import_module(module_name), class_name)()
+    with SidecarServer(args.socket, handler) as server:
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import pickle
+
+import numpy as np
+
+from classifier.registry import resolve
+
+# Filtros padrão do Tokenizer do Keras
+KERAS_FILTERS = '!"#$%&()*+,-./:;<=>?@[\\]^_`{|}~\t\n'
+
+# Separador entre descrições no texto concatenado pelo SequenceEncoder
+SENTINEL = "\x00"
+# Até este tamanho o lote é preenchido linha a linha (menos overhead do NumPy)
+SMALL_BATCH = 8
+
+
+class Tokenizer:
+    """
+    Substituto do Tokenizer do Keras para a inferência.
+
+    Recebe o estado salvo em cnn_tokenizer.pkl e reproduz texts_to_sequences
+    sem importar keras/tensorflow. fit_on_texts (usado no treinamento) gera o
+    mesmo vocabulário do Keras.
+    """
+
+    def __init__(self, num_words=None, filters=KERAS_FILTERS, lower=True, split=' ', char_level=False, oov_token=None):
+        self.word_counts = {}
+        self.word_docs = {}
+        self.filters = filters
+        self.split = split
+        self.lower = lower
+        self.num_words = num_words
+        self.document_count = 0
+        self.char_level = char_level
+        self.oov_token = oov_token
+        self.index_docs = {}
+        self.word_index = {}
+        self.index_word = {}
+        self.analyzer = None
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop('_sequence_encoder', None)
+        return state
+
+    def fit_on_texts(self, texts):
+        """Monta o vocabulário como o Keras: índices por frequência, 1 = token OOV"""
+        for text in texts:
+            self.document_count += 1
+            words = self._words(text)
+            for w in words:
+                self.word_counts[w] = self.word_counts.get(w, 0) + 1
+            for w in dict.fromkeys(words):  # palavras distintas na ordem do texto (reproduzível)
+                self.word_docs[w] = self.word_docs.get(w, 0) + 1
+
+        wcounts = sorted(self.word_counts.items(), key=lambda x: x[1], reverse=True)
+        sorted_voc = [] if self.oov_token is None else [self.oov_token]
+        sorted_voc.extend(w for w, _ in wcounts)
+        self.word_index = dict(zip(sorted_voc, range(1, len(sorted_voc) + 1)))
+        self.index_word = {c: w for w, c in self.word_index.items()}
+        self.index_docs = {self.word_index[w]: c for w, c in self.word_docs.items()}
+        self.__dict__.pop('_sequence_encoder', None)
+
+    def _words(self, text):
+        if self.char_level or isinstance(text, list):
+            if self.lower:
+                text = [t.lower() for t in text] if isinstance(text, list) else text.lower()
+            return text
+        if getattr(self, 'analyzer', None) is not None:
+            return self.analyzer(text)
+        if self.lower:
+            text = text.lower()
+        text = text.translate(str.maketrans({c: self.split for c in self.filters}))
+        return [w for w in text.split(self.split) if w]
+
+    def texts_to_sequences(self, texts):
+        num_words = self.num_words
+        oov_index = self.word_index.get(self.oov_token)
+        sequences = []
+        for text in texts:
+            seq = []
+            for word in self._words(text):
+                i = self.word_index.get(word)
+                if i is not None:
+                    if num_words and i >= num_words:
+                        if oov_index is not None:
+                            seq.append(oov_index)
+                    else:
+                        seq.append(i)
+                elif self.oov_token is not None:
+                    seq.append(oov_index)
+            sequences.append(seq)
+        return sequences
+
+
+class _TokenizerUnpickler(pickle.Unpickler):
+    """Troca a classe Tokenizer do Keras pela versão local ao ler o pickle"""
+
+    def find_class(self, module, name):
+        if name == 'Tokenizer' and module.endswith('preprocessing.text'):
+            return Tokenizer
+        return super().find_class(module, name)
+
+
+class SequenceEncoder:
+    """
+    Converte um lote de descrições direto na matriz (N, maxlen) int32 da CNN.
+
+    Mesma saída de texts_to_sequences + pad_sequences (preenchimento e corte
+    no início), mas o lote inteiro é normalizado e separado em palavras de uma
+    só vez e os índices são escritos direto na matriz int32. Cada chamada
+    retorna uma matriz nova: o resultado pode ser guardado (micro-lotes, cache).
+    """
+
+    def __init__(self, tokenizer, maxlen=100):
+        self.tokenizer = tokenizer
+        self.maxlen = maxlen
+        word_index = tokenizer.word_index
+        if hasattr(word_index, "terms"):
+            items = zip(word_index.terms.tolist(), word_index.indices.tolist())
+        else:
+            items = word_index.items()
+
+        # Índice final de cada palavra (já aplicando num_words); -1 = palavra descartada
+        oov_index = word_index.get(tokenizer.oov_token) if tokenizer.oov_token is not None else None
+        self._missing = -1 if oov_index is None else oov_index
+        num_words = tokenizer.num_words
+        self._ids = {w: i if not num_words or i < num_words else self._missing for w, i in items}
+        self._table = str.maketrans({c: tokenizer.split for c in tokenizer.filters})
+        # Filtros ASCII: a troca pode ser feita nos bytes UTF-8 (sequências multibyte não
+        # contêm bytes ASCII), bem mais rápido que str.translate
+        self._byte_table = None
+        if (tokenizer.filters + tokenizer.split).isascii() and len(tokenizer.split) == 1:
+            self._byte_table = bytes.maketrans(tokenizer.filters.encode(), tokenizer.split.encode() * len(tokenizer.filters))
+        self._fast = (not tokenizer.char_level and getattr(tokenizer, 'analyzer', None) is None
+                      and SENTINEL not in tokenizer.filters and SENTINEL != tokenizer.split)
+
+    def _matrix(self, rows):
+        # np.zeros usa páginas zeradas pelo sistema: sem custo de preenchimento em lotes grandes
+        return np.zeros((rows, self.maxlen), dtype=np.int32)
+
+    def _fallback(self, texts, padded):
+        for row, seq in enumerate(self.tokenizer.texts_to_sequences(texts)):
+            seq = seq[-self.maxlen:]
+            if len(seq):
+                padded[row, self.maxlen - len(seq):] = seq
+        return padded
+
+    def _encode_rows(self, texts, padded):
+        get, missing, split = self._ids.get, self._missing, self.tokenizer.split
+        for row, text in enumerate(texts):
+            if self.tokenizer.lower:
+                text = text.lower()
+            ids = [get(w, missing) for w in text.translate(self._table).split(split) if w]
+            if missing < 0:
+                ids = [i for i in ids if i >= 0]
+            ids = ids[-self.maxlen:]
+            if ids:
+                padded[row, self.maxlen - len(ids):] = ids
+        return padded
+
+    def encode(self, texts):
+        padded = self._matrix(len(texts))
+        if not len(texts):
+            return padded
+        if not self._fast or any(SENTINEL in text for text in texts):
+            return self._fallback(texts, padded)
+        if len(texts) <= SMALL_BATCH:
+            return self._encode_rows(texts, padded)
+
+        # Lote inteiro em um único texto: lower, filtros e split executados uma vez
+        split = self.tokenizer.split
+        text = f"{split}{SENTINEL}{split}".join(texts)
+        if self.tokenizer.lower:
+            text = text.lower()
+        if self._byte_table is not None:
+            text = text.encode('utf-8', 'surrogatepass').translate(self._byte_table).decode('utf-8', 'surrogatepass')
+        else:
+            text = text.translate(self._table)
+        get, missing = self._ids.get, self._missing
+        ids = np.fromiter((-2 if w == SENTINEL else get(w, missing)
+                           for w in text.split(split) if w), dtype=np.int64)
+
+        # Linha de cada palavra (os separadores marcam as trocas de linha)
+        separators = ids == -2
+        rows = np.cumsum(separators)
+        keep = ~separators & (ids >= 0)
+        ids, rows = ids[keep], rows[keep]
+        counts = np.bincount(rows, minlength=len(texts))
+        starts = np.cumsum(counts) - counts
+        from_end = counts[rows] - (np.arange(len(ids)) - starts[rows])
+        keep = from_end <= self.maxlen
+        padded[rows[keep], self.maxlen - from_end[keep]] = ids[keep]
+        return padded
+
+
+def encode_sequences(tokenizer, texts, maxlen=100):
+    """
+    Matriz (N, maxlen) int32 da CNN. Usa o SequenceEncoder com o Tokenizer
+    local; outros tokenizers passam por texts_to_sequences + pad_sequences.
+    """
+    tokenizer = resolve(tokenizer)
+    if not isinstance(tokenizer, Tokenizer):
+        return pad_sequences(tokenizer.texts_to_sequences(texts), maxlen=maxlen)
+    encoder = getattr(tokenizer, '_sequence_encoder', None)
+    if encoder is None or encoder.maxlen != maxlen:
+        encoder = tokenizer._sequence_encoder = SequenceEncoder(tokenizer, maxlen=maxlen)
+    return encoder.encode(texts)
+
+
+def load_tokenizer(path):
+    """Carrega cnn_tokenizer.pkl sem importar o Keras"""
+    with open(path, 'rb') as f:
+        return _TokenizerUnpickler(f).load()
+
+
+def pad_sequences(sequences, maxlen=100, value=0):
+    """
+    Equivalente ao pad_sequences do Keras com os padrões usados na CNN
+    (preenchimento e corte no início, int32).
+    """
+    padded = np.full((len(sequences), maxlen), value, dtype=np.int32)
+    for row, seq in enumerate(sequences):
+        seq = seq[-maxlen:]
+        if len(seq):
+            padded[row, maxlen - len(seq):] = seq
+    return padded
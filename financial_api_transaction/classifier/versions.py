@@ -0,0 +1,244 @@
+import json
+import os
+import re
+import threading
+import time
+
+from contextlib import contextmanager
+
+from classifier.registry import LazyArtifact
+
+# Versão formada pelos artefatos gravados diretamente em models/ (layout antigo)
+BASE_VERSION = "base"
+MANIFEST_FILE = "manifest.json"
+ARTIFACT_EXTENSIONS = (".pkl", ".h5", ".npy", ".json")
+# Nomes de versão: treino (v1, v2, ...) e aprendizado incremental (online-1, ...)
+VERSION_NAME = re.compile(r"v\d+|online-\d+")
+
+
+class ModelVersions:
+    """
+    Gerencia versões dos artefatos em models/<versão>/ e a versão ativa.
+
+    O manifest models/manifest.json guarda a versão ativa. Uma nova versão é
+    carregada em segundo plano, validada por uma predição de teste e só então
+    trocada de forma atômica. A versão anterior continua carregada, assim o
+    rollback é imediato.
+
+    Com vários workers, cada um acompanha o manifest (watch_manifest): a troca
+    feita em um worker é repetida pelos demais.
+    """
+
+    def __init__(self, models_dir, registry_factory, smoke_test=None, logger=None):
+        self.models_dir = models_dir
+        self.registry_factory = registry_factory
+        self.smoke_test = smoke_test
+        self.logger = logger
+        self.on_swap = []
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.activation = None
+        self._manifest_stamp = self._stat_manifest()
+        self._watch_thread = None
+
+        manifest = self.read_manifest()
+        self.active_version = manifest.get("active") or BASE_VERSION
+        if self.active_version not in self.available_versions():
+            if self.logger:
+                self.logger.warning(f"Versão '{self.active_version}' do manifest não encontrada; usando '{BASE_VERSION}'")
+            self.active_version = BASE_VERSION
+        self.current = self._build(self.active_version)
+        self.previous = None
+
+    # Manifest e diretórios ---------------------------------------------------------------------
+    @property
+    def manifest_path(self):
+        return os.path.join(self.models_dir, MANIFEST_FILE)
+
+    def read_manifest(self):
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def write_manifest(self):
+        manifest = {
+            "active": self.active_version,
+            "previous": self.previous.version if self.previous else None,
+            "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+        self._manifest_stamp = self._stat_manifest()
+
+    def _stat_manifest(self):
+        try:
+            stat = os.stat(self.manifest_path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def version_dir(self, version):
+        if version == BASE_VERSION:
+            return self.models_dir
+        return os.path.join(self.models_dir, version)
+
+    @property
+    def active_dir(self):
+        return self.version_dir(self.active_version)
+
+    def available_versions(self):
+        """Versões disponíveis: subdiretórios vN e online-N de models/ com artefatos"""
+        versions = []
+        for name in sorted(os.listdir(self.models_dir)):
+            path = os.path.join(self.models_dir, name)
+            if not VERSION_NAME.fullmatch(name) or not os.path.isdir(path):
+                continue
+            if any(f.endswith(ARTIFACT_EXTENSIONS) and f != MANIFEST_FILE for f in os.listdir(path)):
+                versions.append(name)
+        return [BASE_VERSION] + versions
+
+    def _build(self, version):
+        registry = self.registry_factory(self.version_dir(version))
+        registry.version = version
+        return registry
+
+    # Acesso aos artefatos ----------------------------------------------------------------------
+    def registry(self):
+        """Registro fixado na thread atual (durante uma classificação) ou o ativo"""
+        return getattr(self._local, "registry", None) or self.current
+
+    def get(self, name):
+        return self.registry().get(name)
+
+    def proxy(self, name):
+        return LazyArtifact(self, name)
+
+    @contextmanager
+    def pinned(self, registry=None):
+        """
+        Fixa a versão ativa (ou o registro informado) na thread atual:
+        todos os modelos de uma votação vêm da mesma versão.
+        """
+        if getattr(self._local, "registry", None) is not None:
+            yield self._local.registry.version
+            return
+        self._local.registry = registry or self.current
+        try:
+            yield self._local.registry.version
+        finally:
+            self._local.registry = None
+
+    def is_ready(self):
+        return self.current.is_ready()
+
+    # Troca de versões --------------------------------------------------------------------------
+    def _swap(self, registry, persist=True):
+        with self._lock:
+            self.previous, self.current = self.current, registry
+            self.active_version = registry.version
+            if persist:
+                self.write_manifest()
+        for callback in self.on_swap:
+            callback(self)
+        if self.logger:
+            self.logger.warning(f"Versão de modelos ativa: '{registry.version}'")
+
+    def _load_and_swap(self, version, persist=True):
+        start = time.perf_counter()
+        try:
+            registry = self._build(version)
+            registry.load_all()
+            if self.smoke_test:
+                self.smoke_test(registry)
+            self._swap(registry, persist)
+            self.activation.update(state="active", duration=round(time.perf_counter() - start, 3))
+        except Exception as e:
+            self.activation.update(state="failed", error=str(e), duration=round(time.perf_counter() - start, 3))
+            if self.logger:
+                self.logger.error(f"Falha ao ativar a versão '{version}': {str(e)}")
+
+    def activate(self, version, background=True, persist=True):
+        """
+        Carrega a versão, executa a predição de teste e troca a versão ativa.
+        persist=False não grava o manifest (troca repetida a partir dele).
+        """
+        if version not in self.available_versions():
+            raise ValueError(f"Versão '{version}' não encontrada em {self.models_dir}")
+        with self._lock:
+            if self.activation and self.activation["state"] == "loading":
+                raise RuntimeError(f"A versão '{self.activation['version']}' já está sendo carregada")
+            self.activation = {"version": version, "state": "loading", "error": None, "duration": None}
+        if not background:
+            self._load_and_swap(version, persist)
+            return None
+        thread = threading.Thread(target=self._load_and_swap, args=(version, persist), name="ativacao-modelos",
+                                  daemon=True)
+        thread.start()
+        return thread
+
+    def rollback(self):
+        """Volta para a versão anterior, que continua carregada em memória"""
+        if self.previous is None:
+            raise RuntimeError("Não há versão anterior para rollback")
+        self._swap(self.previous)
+
+    # Sincronização entre workers ---------------------------------------------------------------
+    def sync_manifest(self):
+        """
+        Repete a troca gravada no manifest por outro worker ou processo. Retorna True se a versão
+        ativa mudou. A versão anterior em memória é reaproveitada (rollback) sem recarregar.
+        """
+        stamp = self._stat_manifest()
+        if stamp is None or stamp == self._manifest_stamp:
+            return False
+        version = self.read_manifest().get("active") or BASE_VERSION
+        if version == self.active_version:
+            self._manifest_stamp = stamp
+            return False
+        if self.previous is not None and self.previous.version == version:
+            self._swap(self.previous, persist=False)
+        else:
+            try:
+                self.activate(version, background=False, persist=False)
+            except RuntimeError:
+                # Outra ativação em andamento neste worker: tenta de novo na próxima verificação
+                return False
+            except ValueError as e:
+                if self.logger:
+                    self.logger.error(f"Versão do manifest não encontrada: {str(e)}")
+            # Em caso de falha a versão ativa continua a mesma até o manifest mudar de novo
+            self._manifest_stamp = stamp
+            return self.active_version == version
+        self._manifest_stamp = stamp
+        return True
+
+    def _watch(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.sync_manifest()
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"Erro ao acompanhar o manifest de modelos: {str(e)}")
+
+    def watch_manifest(self, interval=5.0):
+        """Acompanha o manifest em segundo plano (um worker por processo)"""
+        if self._watch_thread is None:
+            self._watch_thread = threading.Thread(target=self._watch, args=(interval,), name="manifest-modelos",
+                                                  daemon=True)
+            self._watch_thread.start()
+        return self._watch_thread
+
+    def status(self):
+        return {
+            "active": self.active_version,
+            "previous": self.previous.version if self.previous else None,
+            "available": self.available_versions(),
+            "activation": self.activation,
+            "models": self.current.status()
+        }
@@ -0,0 +1,67 @@
+import os
+
+# Diretório com os artefatos dos modelos de classificação
+MODELS_DIR = os.getenv("MODELS_DIR", "./models")
+
+# Intervalo (segundos) em que cada worker confere o manifest e repete as trocas de versão feitas por outro
+MANIFEST_CHECK_INTERVAL_SECONDS = float(os.getenv("CLASSIFIER_MANIFEST_CHECK_INTERVAL_SECONDS", "5"))
+
+# Carregamento dos modelos: "background" (thread de aquecimento na inicialização)
+# ou "lazy" (apenas na primeira classificação)
+MODEL_WARMUP = os.getenv("CLASSIFIER_WARMUP", "background")
+
+# Formato dos artefatos: "pickle" (arquivos .pkl) ou "compact" (arrays .npy mapeados em memória,
+# gerados por "python -m classifier.compact <diretório da versão>")
+ARTIFACT_FORMAT = os.getenv("CLASSIFIER_ARTIFACT_FORMAT", "pickle")
+
+# Backend da CNN: "keras" ou "numpy" (forward em NumPy, sem importar tensorflow)
+CNN_BACKEND = os.getenv("CLASSIFIER_CNN_BACKEND", "keras")
+
+# Modo de votação: "full" (quatro modelos em sequência), "cascade" (modelos baratos primeiro,
+# CNN só se necessário), "parallel" (quatro modelos em paralelo, com prazo por modelo) ou "student"
+# (modelo aluno destilado do ensemble por "python -m training --distill"; o ensemble só vota as
+# descrições em que a confiança do aluno fica abaixo de STUDENT_CONFIDENCE)
+VOTE_MODE = os.getenv("CLASSIFIER_VOTE_MODE", "full")
+CASCADE_LOG_EVERY = int(os.getenv("CLASSIFIER_CASCADE_LOG_EVERY", "100"))
+STUDENT_CONFIDENCE = float(os.getenv("CLASSIFIER_STUDENT_CONFIDENCE", "0.9"))
+
+# Execução paralela das predições
+INFERENCE_POOL_SIZE = int(os.getenv("CLASSIFIER_POOL_SIZE", "4"))
+INFERENCE_TIMEOUT_SECONDS = float(os.getenv("CLASSIFIER_TIMEOUT_SECONDS", "2.0"))
+INFERENCE_TIMEOUTS = {
+    name: float(os.getenv(f"CLASSIFIER_TIMEOUT_{name.upper()}_SECONDS", INFERENCE_TIMEOUT_SECONDS))
+    for name in ("lr", "rf", "nb", "cnn")
+}
+# Processos dedicados ao Randon Forest (0 = executa no pool de threads)
+INFERENCE_PROCESS_POOL_SIZE = int(os.getenv("CLASSIFIER_PROCESS_POOL_SIZE", "0"))
+
+# Backend de classificação: "local" (modelos carregados no próprio worker web) ou "sidecar"
+# (um processo classificador carrega os modelos uma vez e atende todos os workers por socket Unix)
+CLASSIFIER_BACKEND = os.getenv("CLASSIFIER_BACKEND", "local")
+SIDECAR_SOCKET = os.getenv("CLASSIFIER_SIDECAR_SOCKET", "/tmp/financial_classifier.sock")
+SIDECAR_TIMEOUT_SECONDS = float(os.getenv("CLASSIFIER_SIDECAR_TIMEOUT_SECONDS", "30"))
+SIDECAR_CHECK_INTERVAL_SECONDS = float(os.getenv("CLASSIFIER_SIDECAR_CHECK_INTERVAL_SECONDS", "5"))
+# Verificações seguidas sem resposta (cada uma espera até SIDECAR_TIMEOUT_SECONDS) antes de reiniciar o processo
+SIDECAR_MAX_FAILURES = int(os.getenv("CLASSIFIER_SIDECAR_MAX_FAILURES", "3"))
+
+# Micro-lotes: agrupa inserções concorrentes em uma única predição em lote
+MICROBATCH_ENABLED = os.getenv("CLASSIFIER_MICROBATCH", "0") == "1"
+MICROBATCH_MAX_SIZE = int(os.getenv("CLASSIFIER_MICROBATCH_MAX_SIZE", "32"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("CLASSIFIER_MICROBATCH_MAX_WAIT_MS", "5"))
+
+# Aprendizado incremental com as correções de categoria (PATCH /transaction): a cada intervalo, com
+# pelo menos ONLINE_MIN_FEEDBACK correções pendentes, Naive Bayes e regressão logística (via SGD)
+# recebem partial_fit e a versão resultante (models/online-N) é ativada
+ONLINE_LEARNING = os.getenv("CLASSIFIER_ONLINE_LEARNING", "0") == "1"
+ONLINE_INTERVAL_SECONDS = float(os.getenv("CLASSIFIER_ONLINE_INTERVAL_SECONDS", "300"))
+ONLINE_MIN_FEEDBACK = int(os.getenv("CLASSIFIER_ONLINE_MIN_FEEDBACK", "10"))
+ONLINE_MAX_FEEDBACK = int(os.getenv("CLASSIFIER_ONLINE_MAX_FEEDBACK", "1000"))
+# Peso de cada correção no partial_fit (uma correção vale por N exemplos do treino)
+ONLINE_SAMPLE_WEIGHT = float(os.getenv("CLASSIFIER_ONLINE_SAMPLE_WEIGHT", "5"))
+# Versões online-N mantidas em disco
+ONLINE_KEEP_VERSIONS = int(os.getenv("CLASSIFIER_ONLINE_KEEP_VERSIONS", "3"))
+
+# Cache de predições (LRU + TTL)
+CACHE_MAX_SIZE = int(os.getenv("CLASSIFIER_CACHE_MAX_SIZE", "10000"))
+CACHE_TTL_SECONDS = float(os.getenv("CLASSIFIER_CACHE_TTL_SECONDS", "86400"))
+CACHE_CHECK_INTERVAL_SECONDS = float(os.getenv("CLASSIFIER_CACHE_CHECK_INTERVAL_SECONDS", "5"))
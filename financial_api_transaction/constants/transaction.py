@@ -0,0 +1,18 @@
+import os
+
+# Paginação de GET /transaction (cursor after_id): tamanho padrão e máximo de uma página
+TRANSACTION_PAGE_SIZE = int(os.getenv("TRANSACTION_PAGE_SIZE", "100"))
+TRANSACTION_MAX_PAGE_SIZE = int(os.getenv("TRANSACTION_MAX_PAGE_SIZE", "1000"))
+
+# Linhas lidas do banco por vez (yield_per) ao percorrer uma consulta
+TRANSACTION_YIELD_PER = int(os.getenv("TRANSACTION_YIELD_PER", "500"))
+
+# POST /transaction/bulk: transações por requisição e por transação do banco (commit)
+TRANSACTION_BULK_MAX_ROWS = int(os.getenv("TRANSACTION_BULK_MAX_ROWS", "20000"))
+TRANSACTION_BULK_CHUNK = int(os.getenv("TRANSACTION_BULK_CHUNK", "1000"))
+
+# Formatos de GET /transaction/export: formato -> (mimetype, extensão do arquivo)
+TRANSACTION_EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv")
+}
@@ -1,10 +1,10 @@
 import os
 from sqlalchemy_utils import database_exists, create_database
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 
 # importando os elementos definidos no modelo
-from models.table import Base
+from models.table import Base, Transactions
 
 # url de acesso ao banco (essa é uma url de acesso ao sqlite local)
 db_url = 'sqlite:///database/db.sqlite3'
@@ -26,5 +26,15 @@ try:
     # cria as tabelas do banco, caso não existam
     Base.metadata.create_all(engine)
 
+    # adiciona as colunas novas em bancos criados antes delas
+    colunas = {coluna['name'] for coluna in inspect(engine).get_columns('transaction')}
+    if 'model_version' not in colunas:
+        with engine.begin() as conn:
+            conn.execute(text('ALTER TABLE "transaction" ADD COLUMN model_version VARCHAR(20)'))
+
+    # cria os índices dos filtros em bancos criados antes deles (create_all não altera tabelas existentes)
+    for index in Transactions.__table__.indexes:
+        index.create(engine, checkfirst=True)
+
 except Exception as e:
     print(f"Ocorreu um erro: {e}")
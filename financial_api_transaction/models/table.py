@@ -1,4 +1,6 @@
-from sqlalchemy import Column, String, Integer, Float, Date
+import operator
+
+from sqlalchemy import Column, String, Integer, Float, Date, DateTime, Index
 from sqlalchemy.orm import declarative_base
 from datetime import datetime, date
 from typing import Optional 
@@ -12,6 +14,17 @@ class Transactions(Base):
     """
     __tablename__ = 'transaction'
 
+    # Índices dos filtros de GET /transaction: coluna de igualdade seguida da data (faixa).
+    # transaction_type (D/C) não tem índice próprio: é filtrado nas linhas do índice escolhido
+    __table_args__ = (
+        Index('ix_transaction_date', 'transaction_date'),
+        Index('ix_transaction_account_date', 'account_id', 'transaction_date'),
+        Index('ix_transaction_branch_date', 'branch_id', 'transaction_date'),
+        Index('ix_transaction_category_date', 'category_id', 'transaction_date'),
+        Index('ix_transaction_resource_date', 'resource_id', 'transaction_date'),
+        Index('ix_transaction_status_expiration', 'transaction_status', 'transaction_expiration_date'),
+    )
+
     # Definição das colunas da tabela
     transaction_id = Column(Integer, primary_key=True, autoincrement=True)
     transaction_date = Column(Date, default=datetime.today, nullable=False)
@@ -24,11 +37,13 @@ class Transactions(Base):
     transaction_type = Column(String(1), nullable=False)
     transaction_value = Column(Float, nullable=False)
     transaction_status = Column(String(1), nullable=False)
+    model_version = Column(String(20), nullable=True)
 
     def __init__(self, transaction_id:int, transaction_date:date,  
                  transaction_expiration_date:date, transaction_description:str,
                  account_id: int, branch_id:int, resource_id:str, transaction_type:str, 
-                 transaction_value:float, transaction_status:str,  category_id: Optional[str] = None):
+                 transaction_value:float, transaction_status:str,  category_id: Optional[str] = None,
+                 model_version: Optional[str] = None):
         """
         Cria a tabela de categoria
 
@@ -44,6 +59,7 @@ class Transactions(Base):
             transaction_type: Tipo da transação (D para débito, C para crédito)
             transaction_value: Valor da transação
             transaction_status: Status da transação (A para ativo, I para inativo)
+            model_version: Versão dos modelos que classificou a transação
         """
         self.transaction_id = transaction_id
         self.transaction_date = transaction_date
@@ -56,6 +72,7 @@ class Transactions(Base):
         self.transaction_type = transaction_type
         self.transaction_value = transaction_value 
         self.transaction_status = transaction_status 
+        self.model_version = model_version
 
     def to_dict(self):
         """
@@ -73,5 +90,70 @@ class Transactions(Base):
             'resource_id': self.resource_id,
             'transaction_type': self.transaction_type,
             'transaction_value': self.transaction_value,
-            'transaction_status': self.transaction_status
-        }
\ No newline at end of file
+            'transaction_status': self.transaction_status,
+            'model_version': self.model_version
+        }
+
+class CategoryFeedback(Base):
+    """
+    Correções de categoria feitas pelo usuário (PATCH /transaction), usadas no aprendizado incremental.
+    """
+    __tablename__ = 'category_feedback'
+
+    feedback_id = Column(Integer, primary_key=True, autoincrement=True)
+    transaction_id = Column(Integer, nullable=False)
+    transaction_description = Column(String(200), nullable=False)
+    predicted_category = Column(String(3), nullable=True)
+    corrected_category = Column(String(3), nullable=False)
+    model_version = Column(String(20), nullable=True)
+    created_at = Column(DateTime, default=datetime.now, nullable=False)
+    learned_version = Column(String(20), nullable=True, index=True)
+
+    def __init__(self, transaction_id:int, transaction_description:str, corrected_category:str,
+                 predicted_category: Optional[str] = None, model_version: Optional[str] = None):
+        """
+        Cria a correção de categoria
+
+        Arguments:
+            transaction_id: ID da transação corrigida
+            transaction_description: Descrição da transação
+            corrected_category: Categoria informada pelo usuário
+            predicted_category: Categoria anterior (prevista pelo classificador)
+            model_version: Versão dos modelos que classificou a transação
+        """
+        self.transaction_id = transaction_id
+        self.transaction_description = transaction_description
+        self.corrected_category = corrected_category
+        self.predicted_category = predicted_category
+        self.model_version = model_version
+
+    def to_dict(self):
+        return {
+            'feedback_id': self.feedback_id,
+            'transaction_id': self.transaction_id,
+            'transaction_description': self.transaction_description,
+            'predicted_category': self.predicted_category,
+            'corrected_category': self.corrected_category,
+            'model_version': self.model_version,
+            'created_at': self.created_at,
+            'learned_version': self.learned_version
+        }
+
+# Filtros de GET /transaction: parâmetro -> (coluna, operador)
+TRANSACTION_FILTERS = {
+    'transaction_date_from': (Transactions.transaction_date, operator.ge),
+    'transaction_date_to': (Transactions.transaction_date, operator.le),
+    'transaction_expiration_date_from': (Transactions.transaction_expiration_date, operator.ge),
+    'transaction_expiration_date_to': (Transactions.transaction_expiration_date, operator.le),
+    'account_id': (Transactions.account_id, operator.eq),
+    'branch_id': (Transactions.branch_id, operator.eq),
+    'category_id': (Transactions.category_id, operator.eq),
+    'resource_id': (Transactions.resource_id, operator.eq),
+    'transaction_type': (Transactions.transaction_type, operator.eq),
+    'transaction_status': (Transactions.transaction_status, operator.eq)
+}
+
+def transaction_filters(criteria):
+    """Condições para os filtros informados em criteria (parâmetros ausentes ou None não filtram)"""
+    return [compare(column, criteria[name]) for name, (column, compare) in TRANSACTION_FILTERS.items()
+            if criteria.get(name) is not None]
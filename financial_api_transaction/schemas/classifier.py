@@ -0,0 +1,21 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+
+EXEMPLE_VERSION = "v3"
+
+# Versões de modelos --------------------------------------------------------------------------
+class ModelVersionSchema(BaseModel):
+    """ 
+    Define a versão dos modelos a ser ativada. 
+    """
+    version: str = Field(..., min_length=1, max_length=20, examples=[EXEMPLE_VERSION])
+
+class ModelVersionsViewSchema(BaseModel):
+    """ 
+    Define como as versões dos modelos são retornadas. 
+    """
+    active: str = Field(..., examples=[EXEMPLE_VERSION])
+    previous: Optional[str] = Field(None, examples=["v2"])
+    available: List[str]
+    activation: Optional[Dict]
+    models: Dict
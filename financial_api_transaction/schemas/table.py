@@ -1,6 +1,8 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
-from datetime import datetime
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
+from datetime import datetime, date
+
+from constants.transaction import TRANSACTION_PAGE_SIZE, TRANSACTION_MAX_PAGE_SIZE, TRANSACTION_BULK_MAX_ROWS
 
 EXEMPLE_ID = 123
 EXEMPLE_DESCRIPTION = "CONTA DE ÁGUA"
@@ -30,6 +32,21 @@ class TransactionsSchema(BaseModel):
     transaction_value: float = Field(..., examples=[EXEMPLE_VALUE])
     transaction_status: str = Field(..., min_length=1, max_length=1, examples=[EXEMPLE_STATUS])
 
+class TransactionsBulkSchema(BaseModel):
+    """ 
+    Define como um lote de transações deve ser enviado para inserção. 
+    Cada item segue TransactionsSchema e é validado individualmente.
+    """
+
+    transactions: List[dict] = Field(..., min_length=1, max_length=TRANSACTION_BULK_MAX_ROWS,
+                                     examples=[[{"transaction_id": EXEMPLE_ID, "transaction_date": "2025-01-10",
+                                                 "transaction_expiration_date": "2025-01-10",
+                                                 "transaction_description": EXEMPLE_DESCRIPTION,
+                                                 "account_id": EXEMPLE_ACCOUNT, "branch_id": EXEMPLE_BRANCH,
+                                                 "resource_id": EXEMPLE_RESOURCE, "transaction_type": EXEMPLE_TYPE,
+                                                 "transaction_value": EXEMPLE_VALUE,
+                                                 "transaction_status": EXEMPLE_STATUS}]])
+
 # Views Schemas -------------------------------------------------------------------------------
 class TransactionsViewSchema(BaseModel):
     """ 
@@ -47,6 +64,28 @@ class TransactionsViewSchema(BaseModel):
     transaction_type: str = Field(..., min_length=1, max_length=1, examples=[EXEMPLE_TYPE])
     transaction_value: float = Field(..., examples=[EXEMPLE_VALUE])
     transaction_status: str = Field(..., min_length=1, max_length=1, examples=[EXEMPLE_STATUS])
+    model_version: Optional[str] = Field(None, max_length=20, examples=["v3"])
+
+class TransactionsBulkResultSchema(BaseModel):
+    """ 
+    Define o resultado de cada transação do lote (na ordem do envio). 
+    """
+
+    index: int = Field(..., examples=[0])
+    transaction_id: Optional[int] = Field(None, examples=[EXEMPLE_ID])
+    status: str = Field(..., examples=["Sucesso"])
+    category_id: Optional[str] = Field(None, examples=[EXEMPLE_CATEGORY])
+    message: Optional[str] = Field(None, examples=["Transação já cadastrada"])
+
+class TransactionsBulkViewSchema(BaseModel):
+    """ 
+    Define como o resultado da inserção em lote será retornado. 
+    """
+
+    inserted: int = Field(..., examples=[1])
+    failed: int = Field(..., examples=[0])
+    model_version: Optional[str] = Field(None, examples=["v3"])
+    results: List[TransactionsBulkResultSchema]
 
 # Listagens Schema ----------------------------------------------------------------------------
 class ListTransactionsSchema(BaseModel):
@@ -55,6 +94,74 @@ class ListTransactionsSchema(BaseModel):
     """
 
     transactions:List[TransactionsViewSchema]
+    next_cursor: Optional[int] = Field(None, examples=[EXEMPLE_ID])
+
+class TransactionsFilterSchema(BaseModel):
+    """ 
+    Define os filtros da listagem (datas inclusivas; parâmetros ausentes não filtram). 
+    """
+
+    transaction_date_from: Optional[date] = Field(None, description="Data da transação a partir de (AAAA-MM-DD)")
+    transaction_date_to: Optional[date] = Field(None, description="Data da transação até (AAAA-MM-DD)")
+    transaction_expiration_date_from: Optional[date] = Field(None, description="Vencimento a partir de (AAAA-MM-DD)")
+    transaction_expiration_date_to: Optional[date] = Field(None, description="Vencimento até (AAAA-MM-DD)")
+    account_id: Optional[int] = Field(None, description="Conta")
+    branch_id: Optional[int] = Field(None, description="Agência")
+    category_id: Optional[str] = Field(None, max_length=3, description="Categoria")
+    resource_id: Optional[str] = Field(None, max_length=3, description="Recurso")
+    transaction_type: Optional[str] = Field(None, max_length=1, description="Tipo (D ou C)")
+    transaction_status: Optional[str] = Field(None, max_length=1, description="Status")
+
+class TransactionsPageSchema(TransactionsFilterSchema):
+    """ 
+    Define os filtros e a paginação da listagem: transações com transaction_id maior que after_id
+    (menor, com order=desc). 
+    """
+
+    after_id: Optional[int] = Field(None, description="next_cursor da página anterior")
+    order: Literal["asc", "desc"] = Field("asc", description="Ordem de transaction_id: asc ou desc (mais recentes primeiro)")
+    limit: int = Field(TRANSACTION_PAGE_SIZE, ge=1, le=TRANSACTION_MAX_PAGE_SIZE, description="Transações por página")
+
+class TransactionsExportSchema(TransactionsFilterSchema):
+    """ 
+    Define os filtros e o formato da exportação (uma transação por linha). 
+    """
+
+    format: Literal["ndjson", "csv"] = Field("ndjson", description="ndjson (um objeto JSON por linha) ou csv")
+
+# Resumo Schemas ------------------------------------------------------------------------------
+class TransactionsSummaryQuerySchema(TransactionsFilterSchema):
+    """ 
+    Define o período e os filtros do resumo: ano inteiro ou um mês do ano. 
+    """
+
+    year: Optional[int] = Field(None, ge=1900, le=9999, description="Ano (AAAA)")
+    month: Optional[int] = Field(None, ge=1, le=12, description="Mês (1 a 12, exige year)")
+
+    @model_validator(mode="after")
+    def month_requires_year(self):
+        if self.month is not None and self.year is None:
+            raise ValueError("month exige year")
+        return self
+
+class TransactionsSummaryRowSchema(BaseModel):
+    """ 
+    Define o total e a quantidade de transações de um mês, categoria e tipo. 
+    """
+
+    month: str = Field(..., examples=["2025-01"])
+    category_id: Optional[str] = Field(None, examples=[EXEMPLE_CATEGORY])
+    transaction_type: str = Field(..., examples=[EXEMPLE_TYPE])
+    total: float = Field(..., examples=[EXEMPLE_VALUE])
+    count: int = Field(..., examples=[1])
+
+class TransactionsSummarySchema(BaseModel):
+    """ 
+    Define como o resumo será retornado: linhas agrupadas e totais por tipo. 
+    """
+
+    summary: List[TransactionsSummaryRowSchema]
+    totals: dict = Field(..., examples=[{"D": {"total": EXEMPLE_VALUE, "count": 1}}])
 
 # Del Schemas ---------------------------------------------------------------------------------
 class TransactionsDelSchema(BaseModel):
@@ -97,4 +204,23 @@ class TransactionsClass(BaseModel):
     Define como será tratado o modelo de classificação. 
     """
     transaction_id:  int = Field(..., examples=[EXEMPLE_ID])
-    transaction_description: str = Field(..., max_length=200, examples=[EXEMPLE_DESCRIPTION])
\ No newline at end of file
+    transaction_description: str = Field(..., max_length=200, examples=[EXEMPLE_DESCRIPTION])
+
+class TransactionsClassBatchSchema(BaseModel):
+    """ 
+    Define como um lote de descrições deve ser enviado para classificação. 
+    """
+    descriptions: List[str] = Field(..., min_length=1, max_length=10000, examples=[[EXEMPLE_DESCRIPTION]])
+
+class TransactionsClassificationSchema(BaseModel):
+    """ 
+    Define como a classificação de uma descrição será retornada. 
+    """
+    transaction_description: str = Field(..., examples=[EXEMPLE_DESCRIPTION])
+    category_id: Optional[str] = Field(None, examples=[EXEMPLE_CATEGORY])
+
+class TransactionsClassBatchViewSchema(BaseModel):
+    """ 
+    Define como o resultado da classificação em lote será retornado. 
+    """
+    classifications: List[TransactionsClassificationSchema]
\ No newline at end of file
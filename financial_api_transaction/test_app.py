@@ -1,11 +1,30 @@
+import csv
+import io
+import json
+import os
+import threading
+import numpy as np
 import pytest
 
+# Os testes não precisam esperar o carregamento dos modelos
+os.environ.setdefault("CLASSIFIER_WARMUP", "lazy")
+
 from datetime import datetime
 from unittest.mock import MagicMock, patch
 from app import app, parse_date
 from models import Session
-from models.table import Transactions
+from models.table import Transactions, CategoryFeedback
 from app import predict_category, predict_category_nb, predict_category_cnn, vote_category
+from app import predict_category_batch, predict_category_cnn_batch, vote_category_batch
+from app import classify_description, prediction_cache
+from app import count_votes, vote_category_cascade, cascade_stats, vote_category_parallel, student_stats
+from app import model_versions, classify_micro_batch, classify_transaction_description, SidecarHandler
+from app import feature_extractor, build_registry, FeedbackStore
+from classifier import export_directory
+from classifier import MicroBatcher
+from classifier.sidecar import SidecarServer, SidecarClient
+from classifier import InferenceExecutor
+from itertools import product
 from collections import Counter
 
 
@@ -127,4 +146,361 @@ def test_vote_category_no_majority(monkeypatch):
 	monkeypatch.setattr("app.predict_category_cnn", fake_predict_category_cnn)
 	monkeypatch.setattr("collections.Counter", lambda x: Counter(["A", "B", "C", "D"]))
 	result = vote_category("qualquer coisa")
-	assert result == "CND"
\ No newline at end of file
+	assert result == "CND"
+
+AUTH_HEADER = {"Authorization": "Bearer banana"}
+
+def test_predict_category_batch_success(mock_vectorizer):
+	modelo = MagicMock()
+	modelo.predict.return_value = ["CAT1", "CAT2"]
+	result = predict_category_batch(["desc 1", "desc 2"], modelo, mock_vectorizer)
+	assert result == ["CAT1", "CAT2"]
+	mock_vectorizer.transform.assert_called_once_with(["desc 1", "desc 2"])
+
+def test_predict_category_cnn_batch_success(mock_encoder):
+	tokenizer = MagicMock()
+	tokenizer.texts_to_sequences.return_value = [[1, 2], [3]]
+	modelo = MagicMock()
+	modelo.predict.return_value = [[0.9, 0.1], [0.2, 0.8]]
+	mock_encoder.inverse_transform.side_effect = lambda idx: ["CAT%d" % i for i in idx]
+	result = predict_category_cnn_batch(["a b", "c"], modelo, tokenizer, mock_encoder, maxlen=10)
+	assert result == ["CAT0", "CAT1"]
+	assert modelo.predict.call_count == 1
+
+def test_predict_category_batch_handles_exception(mock_vectorizer):
+	class FailingModel:
+		def predict(self, X):
+			raise Exception("erro")
+	result = predict_category_batch(["a", "b"], FailingModel(), mock_vectorizer)
+	assert result == [None, None]
+
+def test_vote_category_batch_row_by_row(monkeypatch):
+	monkeypatch.setattr("app.predict_category_batch", lambda descs, m, v: ["A", "B"])
+	monkeypatch.setattr("app.predict_category_nb_batch", lambda descs, m: ["A", "C"])
+	monkeypatch.setattr("app.predict_category_cnn_batch", lambda descs, m, t, e, maxlen=100: ["D", "D"])
+	result = vote_category_batch(["primeira", "segunda"])
+	assert result == ["A", "CND"]
+
+def test_classify_batch_endpoint(monkeypatch):
+	monkeypatch.setattr("app.vote_category_batch", lambda descs: ["ABS"] * len(descs))
+	client = app.test_client()
+	response = client.post("/transaction/classify/batch", headers=AUTH_HEADER,
+						   json={"descriptions": ["pay auto posto", "posto skay"]})
+	assert response.status_code == 200
+	assert response.get_json()["classifications"] == [
+		{"transaction_description": "pay auto posto", "category_id": "ABS"},
+		{"transaction_description": "posto skay", "category_id": "ABS"}
+	]
+
+def test_classify_description_uses_cache(monkeypatch):
+	calls = []
+	monkeypatch.setattr("app.vote_category", lambda desc: calls.append(desc) or "ASS")
+	prediction_cache.invalidate()
+	assert classify_description("Assinatura Deezer Mensal") == "ASS"
+	assert classify_description("assinatura  deezer mensal") == "ASS"
+	assert calls == ["Assinatura Deezer Mensal"]
+	prediction_cache.invalidate()
+
+def test_vote_category_cascade_matches_full_vote(monkeypatch):
+	for lr, rf, nb, cnn in product(["A", "B", "C", None], repeat=4):
+		monkeypatch.setattr("app.predict_category", lambda desc, m, v, lr=lr, rf=rf: lr if m == "lr" else rf)
+		monkeypatch.setattr("app.predict_category_nb", lambda desc, m=None, nb=nb: nb)
+		monkeypatch.setattr("app.predict_category_cnn", lambda desc, m, t, e, maxlen=100, cnn=cnn: cnn)
+		monkeypatch.setattr("app.modelo1", "lr")
+		monkeypatch.setattr("app.modelo2", "rf")
+		assert vote_category_cascade("desc") == count_votes([lr, rf, nb, cnn])
+
+def test_vote_category_cascade_skips_cnn(monkeypatch):
+	cnn_calls = []
+	monkeypatch.setattr("app.predict_category", lambda desc, m, v: "A")
+	monkeypatch.setattr("app.predict_category_nb", lambda desc, m=None: "A")
+	monkeypatch.setattr("app.predict_category_cnn", lambda desc, m, t, e, maxlen=100: cnn_calls.append(desc) or "B")
+	before = cascade_stats.stats()["decided_by"]["rf"]
+	assert vote_category_cascade("desc") == "A"
+	assert cnn_calls == []
+	assert cascade_stats.stats()["decided_by"]["rf"] == before + 1
+
+def test_count_votes_abstentions():
+	assert count_votes([None, None, None, "A"]) == "CND"
+	assert count_votes(["A", None, "A", "A"]) == "A"
+
+def test_vote_category_parallel_timeout_is_abstention(monkeypatch):
+	import time
+	monkeypatch.setattr("app.predict_category", lambda desc, m, v: "A")
+	monkeypatch.setattr("app.predict_category_nb", lambda desc, m=None: "A")
+	monkeypatch.setattr("app.predict_category_cnn", lambda desc, m, t, e, maxlen=100: time.sleep(0.5) or "B")
+	executor = InferenceExecutor(max_workers=4, timeout=1, timeouts={"cnn": 0.05})
+	assert vote_category_parallel("desc", executor) == "A"
+	assert executor.stats()["cnn"]["timeouts"] == 1
+	executor.shutdown()
+
+def test_ready_endpoint_is_public_and_reports_models():
+	client = app.test_client()
+	response = client.get("/ready")
+	data = response.get_json()
+	assert response.status_code == (200 if data["ready"] else 503)
+	assert set(data["models"]) >= {"modelo1", "modelo2", "modelo3", "modelo4", "encoder"}
+
+def test_get_transaction_does_not_load_models():
+	client = app.test_client()
+	response = client.get("/transaction", headers=AUTH_HEADER)
+	assert response.status_code == 200
+	assert model_versions.current.status()["modelo4"]["state"] == "pending"
+
+def test_admin_activate_unknown_version():
+	client = app.test_client()
+	response = client.post("/admin/models/activate", headers=AUTH_HEADER, json={"version": "nao-existe"})
+	assert response.status_code == 404
+
+def test_admin_rollback_without_previous_version():
+	client = app.test_client()
+	if model_versions.previous is None:
+		response = client.post("/admin/models/rollback", headers=AUTH_HEADER)
+		assert response.status_code == 409
+
+def test_transaction_to_dict_has_model_version():
+	transaction = Transactions(1, datetime.today().date(), datetime.today().date(), "uber trip",
+							   1, 1, "CRD", "D", 10.0, "P", category_id="TRP", model_version="v3")
+	assert transaction.to_dict()["model_version"] == "v3"
+
+def test_classify_transaction_description_with_micro_batcher(monkeypatch):
+	batches = []
+	def fake_batch(descs):
+		batches.append(list(descs))
+		return ["TRP"] * len(descs)
+	monkeypatch.setattr("app.vote_category_batch", fake_batch)
+	prediction_cache.invalidate()
+	monkeypatch.setattr("app.micro_batcher", MicroBatcher(classify_micro_batch, max_batch_size=8, max_wait_ms=1))
+	assert classify_transaction_description("uber trip") == ("TRP", model_versions.active_version)
+	assert batches == [["uber trip"]]
+	prediction_cache.invalidate()
+
+def test_classify_through_sidecar(monkeypatch, tmp_path):
+	monkeypatch.setattr("app.vote_category_batch", lambda descs: ["SAU"] * len(descs))
+	socket_path = str(tmp_path / "s.sock")
+	server = SidecarServer(socket_path, SidecarHandler())
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	sidecar_client = SidecarClient(socket_path, timeout=5)
+	monkeypatch.setattr("app.sidecar_client", sidecar_client)
+	monkeypatch.setattr("app.model_admin", sidecar_client)
+	prediction_cache.invalidate()
+	try:
+		assert classify_transaction_description("drogasil") == ("SAU", model_versions.active_version)
+		client = app.test_client()
+		response = client.post("/transaction/classify/batch", headers=AUTH_HEADER, json={"descriptions": ["drogasil", "pague menos"]})
+		assert [c["category_id"] for c in response.get_json()["classifications"]] == ["SAU", "SAU"]
+		response = client.post("/admin/models/activate", headers=AUTH_HEADER, json={"version": "nao-existe"})
+		assert response.status_code == 404
+	finally:
+		server.shutdown()
+		server.server_close()
+		prediction_cache.invalidate()
+
+def test_vote_category_transforms_shared_vectorizer_once(monkeypatch):
+	vectorizer = MagicMock()
+	vectorizer.transform.return_value = [[0.1, 0.2]]
+	modelo = MagicMock()
+	modelo.predict.return_value = ["ABS"]
+	monkeypatch.setattr(feature_extractor, "fingerprint", lambda v: "tfidf")
+	monkeypatch.setattr("app.predict_category_nb", lambda desc, m=None: "ABS")
+	monkeypatch.setattr("app.predict_category_cnn", lambda desc, m, t, e, maxlen=100: "ABS")
+	monkeypatch.setattr("app.modelo1", modelo)
+	monkeypatch.setattr("app.modelo2", modelo)
+	monkeypatch.setattr("app.vectorizer1", vectorizer)
+	monkeypatch.setattr("app.vectorizer2", vectorizer)
+	avoided = feature_extractor.stats()["avoided"]
+	assert vote_category("pay auto posto") == "ABS"
+	assert vectorizer.transform.call_count == 1
+	assert feature_extractor.stats()["avoided"] == avoided + 1
+
+class FakeStudent:
+	classes_ = np.array(["ABS", "SAU"])
+
+	def predict_proba(self, descriptions):
+		return np.array([[0.95, 0.05] if "posto" in d else [0.6, 0.4] for d in descriptions])
+
+def test_vote_category_student_falls_back_on_low_confidence(monkeypatch):
+	ensemble_calls = []
+	monkeypatch.setattr("app.VOTE_MODE", "student")
+	monkeypatch.setattr("app.STUDENT_CONFIDENCE", 0.9)
+	monkeypatch.setattr("app.active_student", lambda: FakeStudent())
+	monkeypatch.setattr("app.vote_category_batch_full", lambda descs: ensemble_calls.extend(descs) or ["CND"] * len(descs))
+	monkeypatch.setattr("app.vote_category_full", lambda desc: ensemble_calls.append(desc) or "SAU")
+	before = student_stats.stats()["decided_by"]
+	assert vote_category_batch(["pay auto posto", "farmacia", "posto skay"]) == ["ABS", "CND", "ABS"]
+	assert vote_category("consulta medica") == "SAU"
+	assert ensemble_calls == ["farmacia", "consulta medica"]
+	after = student_stats.stats()["decided_by"]
+	assert after["student"] == before["student"] + 2 and after["ensemble"] == before["ensemble"] + 2
+
+	# Versão sem aluno: tudo vai para o ensemble
+	monkeypatch.setattr("app.active_student", lambda: None)
+	assert vote_category_batch(["pay auto posto"]) == ["CND"]
+
+def test_build_registry_compact_format(monkeypatch, tmp_path):
+	monkeypatch.setattr("app.ARTIFACT_FORMAT", "compact")
+	export_directory("models", out_dir=str(tmp_path / "compact"))
+	registry = build_registry(str(tmp_path))
+	vectorizer = registry.get("vectorizer1")
+	assert type(vectorizer).__name__ == "CompactVectorizer"
+	prediction = registry.get("modelo1").predict(vectorizer.transform(["pay auto posto"]))
+	assert prediction[0] in registry.get("encoder").classes_
+
+@pytest.fixture
+def memory_session(monkeypatch):
+	from sqlalchemy import create_engine
+	from sqlalchemy.orm import sessionmaker
+	from models.table import Base
+	engine = create_engine("sqlite://")
+	Base.metadata.create_all(engine)
+	session_factory = sessionmaker(bind=engine)
+	monkeypatch.setattr("app.Session", session_factory)
+	return session_factory
+
+def add_transactions(session, ids, **fields):
+	for transaction_id in ids:
+		data = dict(transaction_date=datetime(2025, 1, 10).date(), transaction_expiration_date=datetime(2025, 1, 10).date(),
+			transaction_description="Compra Loja Geek Hero World", account_id=1, branch_id=1, resource_id="CC",
+			transaction_type="D", transaction_value=50.0, transaction_status="A", category_id="LOJ", model_version="v1")
+		session.add(Transactions(transaction_id=transaction_id, **dict(data, **fields)))
+	session.commit()
+
+def test_get_transaction_keyset_pagination(memory_session):
+	session = memory_session()
+	add_transactions(session, [7, 3, 12, 5, 9])
+	client = app.test_client()
+	pages, cursor = [], None
+	while True:
+		query = {"limit": 2} if cursor is None else {"limit": 2, "after_id": cursor}
+		data = client.get("/transaction", headers=AUTH_HEADER, query_string=query).get_json()
+		pages.append([row["transaction_id"] for row in data["transaction"]])
+		cursor = data["next_cursor"]
+		if cursor is None:
+			break
+	assert pages == [[3, 5], [7, 9], [12]]
+	data = client.get("/transaction", headers=AUTH_HEADER, query_string={"limit": 2, "order": "desc"}).get_json()
+	assert [row["transaction_id"] for row in data["transaction"]] == [12, 9] and data["next_cursor"] == 9
+	data = client.get("/transaction", headers=AUTH_HEADER, query_string={"limit": 2, "order": "desc", "after_id": 9}).get_json()
+	assert [row["transaction_id"] for row in data["transaction"]] == [7, 5]
+	assert client.get("/transaction", headers=AUTH_HEADER, query_string={"after_id": 12}).get_json() == {"transaction": [], "next_cursor": None}
+	assert client.get("/transaction", headers=AUTH_HEADER, query_string={"limit": 0}).status_code == 422
+	session.close()
+
+def test_get_transaction_filters(memory_session):
+	session = memory_session()
+	add_transactions(session, [1, 2])
+	add_transactions(session, [3], account_id=2, transaction_date=datetime(2025, 2, 1).date())
+	add_transactions(session, [4], account_id=2, category_id="SAU", transaction_date=datetime(2025, 3, 1).date())
+	client = app.test_client()
+	def ids(**query):
+		data = client.get("/transaction", headers=AUTH_HEADER, query_string=query).get_json()
+		return [row["transaction_id"] for row in data["transaction"]]
+	assert ids(account_id=2) == [3, 4]
+	assert ids(account_id=2, transaction_date_to="2025-02-01") == [3]
+	assert ids(transaction_date_from="2025-01-11", category_id="SAU") == [4]
+	assert ids(account_id=2, limit=1, after_id=3) == [4]
+	assert client.get("/transaction", headers=AUTH_HEADER, query_string={"transaction_date_from": "ontem"}).status_code == 422
+	session.close()
+
+def test_export_transactions_streams_ndjson_and_csv(memory_session, monkeypatch):
+	monkeypatch.setattr("app.TRANSACTION_YIELD_PER", 2)
+	session = memory_session()
+	add_transactions(session, [5, 1, 3])
+	add_transactions(session, [4], account_id=2, transaction_description="Farmácia, \"Centro\"")
+	client = app.test_client()
+
+	response = client.get("/transaction/export", headers=AUTH_HEADER, query_string={"account_id": 1})
+	assert response.status_code == 200 and response.is_streamed
+	assert response.mimetype == "application/x-ndjson"
+	rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+	assert [row["transaction_id"] for row in rows] == [1, 3, 5]
+	assert rows[0]["transaction_date"] == "2025-01-10" and rows[0]["model_version"] == "v1"
+
+	response = client.get("/transaction/export", headers=AUTH_HEADER, query_string={"format": "csv"})
+	assert response.mimetype == "text/csv"
+	header, *lines = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+	assert header[0] == "transaction_id" and [line[0] for line in lines] == ["1", "3", "4", "5"]
+	assert lines[2][header.index("transaction_description")] == "Farmácia, \"Centro\""
+	assert client.get("/transaction/export", headers=AUTH_HEADER, query_string={"format": "xml"}).status_code == 422
+	session.close()
+
+def test_transaction_summary_groups_in_sql(memory_session):
+	session = memory_session()
+	add_transactions(session, [1, 2])
+	add_transactions(session, [3], transaction_type="C", category_id="SAL", transaction_value=1000.0)
+	add_transactions(session, [4], category_id="SAU", transaction_value=20.5, transaction_date=datetime(2025, 2, 3).date())
+	add_transactions(session, [5], transaction_date=datetime(2024, 12, 31).date())
+	client = app.test_client()
+
+	data = client.get("/transaction/summary", headers=AUTH_HEADER, query_string={"year": 2025, "month": 1}).get_json()
+	assert data["summary"] == [
+		{"month": "2025-01", "category_id": "LOJ", "transaction_type": "D", "total": 100.0, "count": 2},
+		{"month": "2025-01", "category_id": "SAL", "transaction_type": "C", "total": 1000.0, "count": 1}]
+	assert data["totals"] == {"D": {"total": 100.0, "count": 2}, "C": {"total": 1000.0, "count": 1}}
+
+	data = client.get("/transaction/summary", headers=AUTH_HEADER, query_string={"year": 2025, "transaction_type": "D"}).get_json()
+	assert [(row["month"], row["category_id"]) for row in data["summary"]] == [("2025-01", "LOJ"), ("2025-02", "SAU")]
+	assert data["totals"] == {"D": {"total": 120.5, "count": 3}}
+	assert client.get("/transaction/summary", headers=AUTH_HEADER, query_string={"month": 1}).status_code == 422
+	session.close()
+
+def test_bulk_insert_classifies_once_and_reports_each_row(memory_session, monkeypatch):
+	calls = []
+	def classify(descriptions):
+		calls.append(list(descriptions))
+		return [("LOJ" if "Loja" in d else "SAU", "v1") for d in descriptions]
+	monkeypatch.setattr("app.classify_micro_batch", classify)
+	monkeypatch.setattr("app.TRANSACTION_BULK_CHUNK", 2)
+	session = memory_session()
+	add_transactions(session, [2])
+	row = {"transaction_date": "2025-01-10", "transaction_expiration_date": "2025-01-10", "account_id": 1,
+		"branch_id": 1, "resource_id": "CC", "transaction_type": "D", "transaction_value": 10.0, "transaction_status": "A"}
+	body = {"transactions": [
+		dict(row, transaction_id=1, transaction_description="Compra Loja Geek"),
+		dict(row, transaction_id=2, transaction_description="Compra Loja Geek"),
+		dict(row, transaction_id=3, transaction_description="Farmácia Centro"),
+		dict(row, transaction_id=4, transaction_description="Compra Loja Geek", transaction_value="dez"),
+		dict(row, transaction_id=3, transaction_description="Farmácia Centro"),
+		dict(row, transaction_id=5, transaction_description="Compra Loja Geek")]}
+	data = app.test_client().post("/transaction/bulk", headers=AUTH_HEADER, json=body).get_json()
+	assert calls == [["Compra Loja Geek", "Farmácia Centro"]]
+	assert data["inserted"] == 3 and data["failed"] == 3 and data["model_version"] == "v1"
+	assert [r["status"] for r in data["results"]] == ["Sucesso", "Falha", "Sucesso", "Falha", "Falha", "Sucesso"]
+	assert data["results"][1]["message"] == "Transação já cadastrada"
+	assert data["results"][3]["message"].startswith("transaction_value")
+	stored = {t.transaction_id: t for t in session.query(Transactions).all()}
+	assert sorted(stored) == [1, 2, 3, 5]
+	assert stored[3].category_id == "SAU" and stored[3].transaction_date == datetime(2025, 1, 10).date()
+	session.close()
+
+def test_patch_category_records_feedback(memory_session):
+	session = memory_session()
+	session.add(Transactions(transaction_id=1, transaction_date=datetime(2025, 1, 10).date(),
+		transaction_expiration_date=datetime(2025, 1, 10).date(), transaction_description="Compra Loja Geek Hero World",
+		account_id=1, branch_id=1, resource_id="CC", transaction_type="D", transaction_value=50.0,
+		transaction_status="A", category_id="LOJ", model_version="v1"))
+	session.commit()
+	body = {"transaction_id": 1, "transaction_date": "2025-01-10", "transaction_expiration_date": "2025-01-10",
+		"transaction_description": "Compra Loja Geek Hero World", "category_id": "LAZ", "account_id": 1, "branch_id": 1,
+		"resource_id": "CC", "transaction_type": "D", "transaction_value": 50.0, "transaction_status": "A"}
+	client = app.test_client()
+	assert client.patch("/transaction", headers=AUTH_HEADER, json=body).status_code == 200
+	# Sem mudança de categoria não há nova correção
+	assert client.patch("/transaction", headers=AUTH_HEADER, json=body).status_code == 200
+	feedback = [row.to_dict() for row in session.query(CategoryFeedback).all()]
+	assert len(feedback) == 1
+	assert feedback[0]["predicted_category"] == "LOJ" and feedback[0]["corrected_category"] == "LAZ"
+	assert feedback[0]["model_version"] == "v1" and feedback[0]["learned_version"] is None
+
+	store = FeedbackStore()
+	assert store.pending() == 1
+	assert store.claim("online-1", limit=10) == [("Compra Loja Geek Hero World", "LAZ")]
+	assert store.pending() == 0 and store.claim("online-2", limit=10) == []
+	# Outro processo com o mesmo nome de versão não recebe nem devolve as correções já reservadas
+	other = FeedbackStore()
+	assert other.claim("online-1", limit=10) == []
+	other.release("online-1")
+	assert store.pending() == 0
+	store.release("online-1")
+	assert store.pending() == 1
+	session.close()
@@ -0,0 +1,776 @@
+import os
+import signal
+import socket
+import sys
+import json
+import time
+import threading
+import pickle
+import joblib
+import numpy as np
+import pytest
+
+from classifier import PredictionCache, normalize_description, artifacts_fingerprint
+from classifier import CascadeStats, decided_outcome, run_cascade
+from classifier import InferenceExecutor
+from classifier import NumpyCNN, load_tokenizer, pad_sequences, encode_sequences
+from classifier import ModelRegistry, ModelNotReadyError, ModelVersions
+from classifier import MicroBatcher
+from classifier import FeatureExtractor
+from classifier import SortedVocabulary, export_artifact, load_artifact
+from classifier import OnlineLearner, to_sgd
+from classifier.sidecar import (SidecarServer, SidecarClient, SidecarSupervisor, SidecarError,
+                                encode_strings, decode_strings)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalize_description():
+    assert normalize_description("  Assinatura   DEEZER Mensal ") == "assinatura deezer mensal"
+    assert normalize_description("Farmácia São Paulo") == "farmacia sao paulo"
+
+def test_cache_hit_for_equivalent_descriptions():
+    cache = PredictionCache(maxsize=10, ttl=60)
+    calls = []
+    compute = lambda desc: calls.append(desc) or "ABS"
+    assert cache.get_or_compute("pay auto posto", compute) == "ABS"
+    assert cache.get_or_compute("PAY  Auto pôsto", compute) == "ABS"
+    assert calls == ["pay auto posto"]
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+def test_cache_lru_eviction():
+    cache = PredictionCache(maxsize=2, ttl=60)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    cache.get("a")
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.stats()["evictions"] == 1
+
+def test_cache_ttl_expiration():
+    clock = FakeClock()
+    cache = PredictionCache(maxsize=10, ttl=30, clock=clock)
+    cache.put("uber trip", "TRP")
+    clock.now = 29
+    assert cache.get("uber trip") == "TRP"
+    clock.now = 31
+    assert cache.get("uber trip") is None
+    assert cache.stats()["expirations"] == 1
+
+def test_cache_invalidated_when_artifacts_change(tmp_path):
+    clock = FakeClock()
+    artifact = tmp_path / "modelo.pkl"
+    artifact.write_bytes(b"v1")
+    cache = PredictionCache(maxsize=10, ttl=60, clock=clock, check_interval=1,
+                            fingerprint=lambda: artifacts_fingerprint(str(tmp_path)))
+    cache.put("seguro viagem", "SEG")
+    artifact.write_bytes(b"versao 2")
+    clock.now = 2
+    assert cache.get("seguro viagem") is None
+    assert cache.stats()["invalidations"] == 1
+
+def test_fingerprint_ignores_other_versions_and_caches(tmp_path):
+    (tmp_path / "modelo.pkl").write_bytes(b"v1")
+    (tmp_path / "compact" / "modelo").mkdir(parents=True)
+    (tmp_path / "compact" / "modelo" / "meta.json").write_text("{}")
+    before = artifacts_fingerprint(str(tmp_path), subdirs=("compact",))
+    for directory in ("v2", ".cache", "online-1"):
+        (tmp_path / directory).mkdir()
+        (tmp_path / directory / "modelo.pkl").write_bytes(b"outra")
+    assert artifacts_fingerprint(str(tmp_path), subdirs=("compact",)) == before
+    (tmp_path / "compact" / "modelo" / "meta.json").write_text('{"versao": 2}')
+    assert artifacts_fingerprint(str(tmp_path), subdirs=("compact",)) != before
+
+def test_cache_batch_computes_only_missing_once():
+    cache = PredictionCache(maxsize=10, ttl=60)
+    cache.put("uber trip", "TRP")
+    batches = []
+    def compute_batch(descs):
+        batches.append(list(descs))
+        return ["SEG"] * len(descs)
+    result = cache.get_many_or_compute(["uber trip", "itau seg", "ITAU SEG"], compute_batch)
+    assert result == ["TRP", "SEG", "SEG"]
+    assert batches == [["itau seg"]]
+
+def test_decided_outcome():
+    assert decided_outcome(["A", "B"], remaining=2) == (False, None)
+    assert decided_outcome(["A", "A", "A"], remaining=1) == (True, "A")
+    assert decided_outcome(["A", "B", "C"], remaining=1) == (True, "CND")
+    assert decided_outcome(["A", "A", "B"], remaining=1) == (False, None)
+
+def test_run_cascade_records_deciding_stage():
+    stats = CascadeStats(["baratos", "caro"])
+    calls = []
+    stages = [
+        ("baratos", [lambda: "A", lambda: "B", lambda: "C"]),
+        ("caro", [lambda: calls.append("caro") or "A"])
+    ]
+    assert run_cascade(stages, stats) == "CND"
+    assert calls == []
+    assert stats.stats()["decided_by"] == {"baratos": 1, "caro": 0}
+    assert stats.stats()["last_stage_skipped_rate"] == 1.0
+
+def test_decided_outcome_ignores_abstentions():
+    assert decided_outcome([None, None, None], remaining=1) == (True, "CND")
+
+def test_executor_runs_models_concurrently():
+    executor = InferenceExecutor(max_workers=4, timeout=2)
+    slow = lambda value: (lambda: time.sleep(0.2) or value)
+    start = time.monotonic()
+    result = executor.run({"lr": slow("A"), "rf": slow("A"), "nb": slow("B"), "cnn": slow("A")})
+    assert time.monotonic() - start < 0.6
+    assert result == {"lr": "A", "rf": "A", "nb": "B", "cnn": "A"}
+    executor.shutdown()
+
+def test_executor_timeout_counts_as_abstention():
+    executor = InferenceExecutor(max_workers=2, timeout=1, timeouts={"cnn": 0.05})
+    start = time.monotonic()
+    result = executor.run({"lr": lambda: "A", "cnn": lambda: time.sleep(0.5) or "B"})
+    assert time.monotonic() - start < 0.4
+    assert result == {"lr": "A", "cnn": None}
+    stats = executor.stats()
+    assert stats["cnn"]["timeouts"] == 1 and stats["cnn"]["timeout_rate"] == 1.0
+    assert stats["lr"]["timeouts"] == 0
+    executor.shutdown()
+
+def test_executor_skips_model_still_running_after_timeout():
+    executor = InferenceExecutor(max_workers=2, timeout=0.05)
+    release = threading.Event()
+    calls = []
+    hung = lambda: calls.append(1) or release.wait(5) and "B"
+    assert executor.run({"lr": lambda: "A", "cnn": hung}) == {"lr": "A", "cnn": None}
+    # A chamada anterior ainda ocupa um worker: o modelo se abstém sem ocupar outro
+    for _ in range(3):
+        assert executor.run({"lr": lambda: "A", "cnn": hung}) == {"lr": "A", "cnn": None}
+    assert len(calls) == 1 and executor.stuck() == ["cnn"]
+    assert executor.stats()["cnn"]["skipped"] == 3 and executor.stats()["cnn"]["stuck"]
+    release.set()
+    time.sleep(0.1)
+    assert executor.stuck() == []
+    assert executor.run({"cnn": lambda: "B"}) == {"cnn": "B"}
+    executor.shutdown()
+
+def test_executor_process_pool(tmp_path):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    textos = ["posto shell", "posto ipiranga", "uber trip", "uber pending"]
+    vectorizer = TfidfVectorizer().fit(textos)
+    modelo = LogisticRegression().fit(vectorizer.transform(textos), ["ABS", "ABS", "TRP", "TRP"])
+    joblib.dump(modelo, tmp_path / "modelo.pkl")
+    joblib.dump(vectorizer, tmp_path / "vectorizer.pkl")
+    executor = InferenceExecutor(max_workers=1, timeout=60, process_workers=1,
+                                 process_models={"rf": (str(tmp_path / "modelo.pkl"), str(tmp_path / "vectorizer.pkl"))})
+    assert executor.runs_in_process("rf")
+    assert executor.run({}, {"rf": "uber trip"}) == {"rf": "TRP"}
+    executor.shutdown()
+
+TEXTOS_CNN = ["pay auto posto", "Assinatura Deezer Mensal", "rshop-aut post s", "", "Farmácia São Paulo!!", "xyz desconhecido " * 60]
+
+def test_load_tokenizer_matches_keras():
+    pytest.importorskip("keras")
+    with open("./models/cnn_tokenizer.pkl", "rb") as f:
+        keras_tokenizer = pickle.load(f)
+    tokenizer = load_tokenizer("./models/cnn_tokenizer.pkl")
+    assert tokenizer.texts_to_sequences(TEXTOS_CNN) == keras_tokenizer.texts_to_sequences(TEXTOS_CNN)
+
+def test_pad_sequences_matches_keras():
+    keras_sequence = pytest.importorskip("keras.preprocessing.sequence")
+    sequences = [[1, 2, 3], [], list(range(1, 150))]
+    expected = keras_sequence.pad_sequences(sequences, maxlen=100)
+    result = pad_sequences(sequences, maxlen=100)
+    assert result.dtype == np.int32
+    assert np.array_equal(result, expected)
+
+def test_encode_sequences_matches_texts_to_sequences():
+    tokenizer = load_tokenizer("./models/cnn_tokenizer.pkl")
+    words = list(tokenizer.word_index)
+    long_text = " ".join(words[i % len(words)] for i in range(0, 3000, 7))
+    texts = TEXTOS_CNN + ["", "!!!", "Farmácia SÃO João", "a\tb\nc", "x\x00y", long_text] * 3
+    for batch in (texts[:1], texts[:5], texts):
+        expected = pad_sequences(tokenizer.texts_to_sequences(batch), maxlen=100)
+        result = encode_sequences(tokenizer, batch, maxlen=100)
+        assert result.dtype == np.int32
+        assert np.array_equal(result, expected)
+
+def test_encode_sequences_returns_independent_arrays():
+    tokenizer = load_tokenizer("./models/cnn_tokenizer.pkl")
+    first = encode_sequences(tokenizer, ["pay auto posto " * 40] * 50)
+    kept = first.copy()
+    result = encode_sequences(tokenizer, ["posto"] * 20)
+    assert np.array_equal(result, pad_sequences(tokenizer.texts_to_sequences(["posto"] * 20), maxlen=100))
+    # O resultado guardado não é sobrescrito pela chamada seguinte
+    assert np.array_equal(first, kept)
+    assert not np.shares_memory(first, result)
+
+def test_encode_sequences_other_tokenizers():
+    class KerasLike:
+        def texts_to_sequences(self, texts):
+            return [[1, 2]] * len(texts)
+    result = encode_sequences(KerasLike(), ["a", "b"], maxlen=4)
+    assert result.tolist() == [[0, 0, 1, 2], [0, 0, 1, 2]]
+
+def test_numpy_cnn_matches_keras(tmp_path):
+    keras = pytest.importorskip("keras")
+    from keras import layers
+    modelo = keras.Sequential([
+        keras.Input(shape=(100,)),
+        layers.Embedding(1000, 50),
+        layers.Conv1D(64, 3, activation="softmax"),
+        layers.GlobalMaxPooling1D(),
+        layers.Dense(64, activation="relu"),
+        layers.Dropout(0.5),
+        layers.Dense(21, activation="softmax")
+    ])
+    path = str(tmp_path / "cnn.h5")
+    modelo.save(path)
+    x = np.random.default_rng(0).integers(0, 1000, size=(8, 100))
+    expected = modelo.predict(x, verbose=0)
+    result = NumpyCNN.load(path).predict(x)
+    assert np.allclose(result, expected, atol=1e-5)
+
+def test_numpy_cnn_without_weights_raises():
+    modelo = NumpyCNN.load("./models/cnn_model.h5")
+    if modelo.has_weights:
+        pytest.skip("cnn_model.h5 já contém pesos")
+    with pytest.raises(ValueError):
+        modelo.predict(np.zeros((1, 100), dtype=np.int32))
+
+def test_registry_loads_lazily_and_once():
+    calls = []
+    def loader():
+        time.sleep(0.05)
+        calls.append(1)
+        return {"pronto": True}
+    registry = ModelRegistry({"modelo": loader})
+    proxy = registry.proxy("modelo")
+    assert registry.status()["modelo"]["state"] == "pending"
+    threads = [threading.Thread(target=lambda: proxy.get("pronto")) for _ in range(4)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert calls == [1]
+    assert registry.is_ready()
+    assert registry.status()["modelo"]["load_time"] >= 0.05
+
+def test_registry_failed_load():
+    def loader():
+        raise FileNotFoundError("modelo.pkl")
+    registry = ModelRegistry({"modelo": loader, "outro": lambda: 1})
+    with pytest.raises(ModelNotReadyError):
+        registry.get("modelo")
+    assert registry.status()["modelo"]["state"] == "failed"
+    assert not registry.is_ready()
+
+def test_registry_background_warmup():
+    registry = ModelRegistry({"a": lambda: 1, "b": lambda: 2})
+    registry.start_warmup().join(timeout=5)
+    assert registry.is_ready()
+    assert registry.get("b") == 2
+
+def make_versions(tmp_path, smoke_test=None):
+    for version in ("v1", "v2"):
+        os.makedirs(tmp_path / version)
+        (tmp_path / version / "modelo.pkl").write_bytes(b"x")
+    (tmp_path / "manifest.json").write_text(json.dumps({"active": "v1"}))
+    factory = lambda directory: ModelRegistry({"modelo": lambda: os.path.basename(directory)})
+    return ModelVersions(str(tmp_path), factory, smoke_test=smoke_test)
+
+def test_versions_activate_and_rollback(tmp_path):
+    versions = make_versions(tmp_path)
+    swaps = []
+    versions.on_swap.append(lambda v: swaps.append(v.active_version))
+    assert versions.available_versions() == ["base", "v1", "v2"]
+    assert versions.get("modelo") == "v1"
+    versions.activate("v2", background=False)
+    assert versions.get("modelo") == "v2"
+    assert json.loads((tmp_path / "manifest.json").read_text())["active"] == "v2"
+    versions.rollback()
+    assert versions.get("modelo") == "v1"
+    assert versions.active_version == "v1"
+    assert swaps == ["v2", "v1"]
+
+def test_versions_failed_smoke_test_keeps_active(tmp_path):
+    def smoke_test(registry):
+        raise ValueError("predição de teste falhou")
+    versions = make_versions(tmp_path, smoke_test=smoke_test)
+    versions.activate("v2", background=False)
+    assert versions.active_version == "v1"
+    assert versions.activation["state"] == "failed"
+    with pytest.raises(ValueError):
+        versions.activate("../fora")
+
+def test_versions_lists_only_version_directories(tmp_path):
+    versions = make_versions(tmp_path)
+    for name in ("Antigos", ".cache", "online-2", "online-x"):
+        os.makedirs(tmp_path / name)
+        (tmp_path / name / "modelo.pkl").write_bytes(b"x")
+    assert versions.available_versions() == ["base", "online-2", "v1", "v2"]
+    with pytest.raises(ValueError):
+        versions.activate("Antigos")
+
+def test_versions_follow_manifest_written_by_other_worker(tmp_path):
+    worker_a = make_versions(tmp_path)
+    worker_b = ModelVersions(str(tmp_path), worker_a.registry_factory)
+    assert worker_b.sync_manifest() is False
+    worker_a.activate("v2", background=False)
+    manifest = (tmp_path / "manifest.json").read_text()
+    assert worker_b.sync_manifest() is True
+    assert worker_b.get("modelo") == "v2" and worker_b.previous.version == "v1"
+    # O worker que repete a troca não regrava o manifest
+    assert (tmp_path / "manifest.json").read_text() == manifest
+    time.sleep(0.01)
+    worker_a.rollback()
+    assert worker_b.sync_manifest() is True and worker_b.get("modelo") == "v1"
+    assert worker_a.sync_manifest() is False
+
+def test_versions_pinned_during_swap(tmp_path):
+    versions = make_versions(tmp_path)
+    with versions.pinned() as version:
+        versions.activate("v2", background=False)
+        assert version == "v1"
+        assert versions.get("modelo") == "v1"
+    assert versions.get("modelo") == "v2"
+
+def test_microbatcher_coalesces_concurrent_calls():
+    sizes = []
+    def process_batch(items):
+        sizes.append(len(items))
+        return [item.upper() for item in items]
+    batcher = MicroBatcher(process_batch, max_batch_size=64, max_wait_ms=100)
+    results = {}
+    threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, batcher(f"desc {i}"))) for i in range(16)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert results == {i: f"DESC {i}" for i in range(16)}
+    assert sum(sizes) == 16 and len(sizes) < 16
+    stats = batcher.stats()
+    assert stats["items"] == 16 and stats["batch_size_max"] == max(sizes)
+    assert stats["queue_wait_max_ms"] <= 1000
+
+def test_microbatcher_respects_max_batch_size():
+    sizes = []
+    batcher = MicroBatcher(lambda items: sizes.append(len(items)) or items, max_batch_size=4, max_wait_ms=200)
+    futures = [batcher.submit(i) for i in range(10)]
+    assert [f.result(timeout=5) for f in futures] == list(range(10))
+    assert max(sizes) <= 4
+    assert batcher.stats()["flush_by_size"] >= 2
+
+def test_microbatcher_propagates_errors():
+    def process_batch(items):
+        raise RuntimeError("falha no lote")
+    batcher = MicroBatcher(process_batch, max_batch_size=4, max_wait_ms=1)
+    with pytest.raises(RuntimeError):
+        batcher("desc")
+
+
+class EchoHandler:
+    """Handler usado nos testes do processo classificador"""
+
+    calls = 0
+    active = "v1"
+
+    def classify(self, descriptions):
+        EchoHandler.calls += 1
+        if "erro" in descriptions:
+            raise RuntimeError("falha na votação")
+        if "lento" in descriptions:
+            time.sleep(1)
+        return [d.upper() for d in descriptions], EchoHandler.active
+
+    def status(self):
+        return {"ready": True, "active": EchoHandler.active, "pid": os.getpid()}
+
+    def activate(self, version):
+        raise ValueError(f"Versão '{version}' não encontrada")
+
+    def rollback(self):
+        EchoHandler.active = "v0"
+        return self.status()
+
+
+def serve(socket_path):
+    server = SidecarServer(socket_path, EchoHandler())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def test_sidecar_protocol_roundtrip():
+    strings = ["pay auto posto", "Farmácia São Paulo", "", "x" * 70000]
+    decoded, offset = decode_strings(encode_strings(strings))
+    assert decoded == strings
+    assert offset == len(encode_strings(strings))
+
+def test_sidecar_client_server(tmp_path):
+    socket_path = str(tmp_path / "s.sock")
+    server = serve(socket_path)
+    client = SidecarClient(socket_path, timeout=5)
+    changes = []
+    client.on_version_change.append(changes.append)
+    try:
+        assert client.classify(["pay auto posto", "netflix"]) == ["PAY AUTO POSTO", "NETFLIX"]
+        assert client.version == "v1" and changes == []
+        assert client.ping()["ready"] is True
+        with pytest.raises(ValueError):
+            client.activate("v9")
+        with pytest.raises(SidecarError):
+            client.classify(["erro"])
+        # A conexão continua válida após um erro
+        assert client.classify(["a"]) == ["A"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_sidecar_client_reports_version_swaps(tmp_path):
+    socket_path = str(tmp_path / "s.sock")
+    server = serve(socket_path)
+    client = SidecarClient(socket_path, timeout=5)
+    changes = []
+    client.on_version_change.append(changes.append)
+    try:
+        assert client.classify(["a"]) == ["A"] and client.version == "v1"
+        # O rollback é imediato: o worker fica sabendo pela resposta, sem esperar uma classificação
+        client.rollback()
+        assert client.version == "v0" and changes == ["v0"]
+        # Ativação concluída em segundo plano: vista no PING do supervisor
+        EchoHandler.active = "v2"
+        client.ping()
+        assert client.version == "v2" and changes == ["v0", "v2"]
+    finally:
+        EchoHandler.active = "v1"
+        server.shutdown()
+        server.server_close()
+
+def test_sidecar_client_reconnects(tmp_path):
+    socket_path = str(tmp_path / "s.sock")
+    server = serve(socket_path)
+    client = SidecarClient(socket_path, timeout=5)
+    assert client.classify(["a"]) == ["A"]
+    server.shutdown()
+    server.server_close()
+    assert client.ping(timeout=0.5) is None
+
+    server = serve(socket_path)
+    try:
+        assert client.classify(["b"]) == ["B"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_sidecar_client_does_not_resend_after_timeout(tmp_path):
+    socket_path = str(tmp_path / "s.sock")
+    server = serve(socket_path)
+    client = SidecarClient(socket_path, timeout=0.3)
+    try:
+        EchoHandler.calls = 0
+        with pytest.raises(socket.timeout):
+            client.classify(["lento"])
+        time.sleep(1.5)
+        assert EchoHandler.calls == 1
+        assert client.classify(["a"]) == ["A"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_sidecar_supervisor_replaces_unresponsive_process(tmp_path):
+    socket_path = str(tmp_path / "s.sock")
+    client = SidecarClient(socket_path, timeout=5)
+    command = [sys.executable, "-m", "classifier.sidecar", "--socket", socket_path,
+               "--handler", "test_classifier:EchoHandler"]
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    first = SidecarSupervisor(command, client, startup_timeout=60, stop_timeout=0.5, cwd=cwd)
+    second = SidecarSupervisor(command, client, startup_timeout=60, stop_timeout=0.5, max_failures=2,
+                               ping_timeout=0.5, cwd=cwd)
+    try:
+        assert first.ensure_running()
+        # Processo parado (não responde ao PING nem ao SIGTERM): uma verificação sem resposta não
+        # basta; na seguinte o supervisor de outro worker encontra o pid pelo pidfile e encerra
+        # o processo antes de iniciar outro
+        os.kill(first.process.pid, signal.SIGSTOP)
+        assert not second.ensure_running()
+        assert first.process.poll() is None and second.process is None
+        assert second.ensure_running()
+        assert first.process.wait(timeout=5) == -signal.SIGKILL
+        assert client.ping()["pid"] == second.process.pid
+        with open(socket_path + ".pid") as f:
+            assert int(f.read()) == second.process.pid
+    finally:
+        for supervisor in (first, second):
+            if supervisor.process and supervisor.process.poll() is None:
+                supervisor.process.kill()
+                supervisor.process.wait()
+
+def test_sidecar_supervisor_restarts_process(tmp_path):
+    socket_path = str(tmp_path / "s.sock")
+    client = SidecarClient(socket_path, timeout=5)
+    command = [sys.executable, "-m", "classifier.sidecar", "--socket", socket_path,
+               "--handler", "test_classifier:EchoHandler"]
+    supervisor = SidecarSupervisor(command, client, startup_timeout=60,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)))
+    try:
+        assert supervisor.ensure_running()
+        first_pid = client.ping()["pid"]
+        assert client.classify(["a"]) == ["A"]
+
+        # Processo encerrado: o supervisor inicia outro
+        supervisor.process.kill()
+        supervisor.process.wait()
+        assert supervisor.ensure_running()
+        assert client.ping()["pid"] != first_pid
+        assert client.classify(["b"]) == ["B"]
+        assert supervisor.status()["restarts"] == 2
+    finally:
+        if supervisor.process:
+            supervisor.process.kill()
+            supervisor.process.wait()
+
+CORPUS = ["pay auto posto", "posto shell", "netflix mensal", "uber trip", "drogasil farmacia", "uber eats"]
+
+def test_feature_extractor_shares_identical_vectorizers():
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    vectorizer_lr = TfidfVectorizer().fit(CORPUS)
+    vectorizer_rf = pickle.loads(pickle.dumps(vectorizer_lr))
+    other = TfidfVectorizer(ngram_range=(1, 2)).fit(CORPUS)
+    extractor = FeatureExtractor()
+    assert extractor.fingerprint(vectorizer_lr) == extractor.fingerprint(vectorizer_rf)
+    assert extractor.fingerprint(vectorizer_lr) != extractor.fingerprint(other)
+
+    descriptions = ["posto shell", "uber trip"]
+    with extractor.scope(descriptions):
+        X_lr = extractor.transform(vectorizer_lr, descriptions)
+        X_rf = extractor.transform(vectorizer_rf, list(descriptions))
+        extractor.transform(other, descriptions)
+    assert X_lr is X_rf
+    assert (X_lr != vectorizer_rf.transform(descriptions)).nnz == 0
+    assert extractor.stats() == {"transforms": 2, "avoided": 1, "avoided_rate": round(1 / 3, 4)}
+
+    # Fora do escopo nada é reaproveitado
+    extractor.transform(vectorizer_lr, descriptions)
+    extractor.transform(vectorizer_rf, descriptions)
+    assert extractor.stats()["transforms"] == 4
+
+def test_feature_extractor_pipeline_predict():
+    from sklearn.feature_extraction.text import CountVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.pipeline import Pipeline
+    labels = ["ABS", "ABS", "ASS", "TRP", "SAU", "TRP"]
+    pipeline = Pipeline([("bow", CountVectorizer()), ("clf", MultinomialNB())]).fit(CORPUS, labels)
+    bow = pickle.loads(pickle.dumps(pipeline.steps[0][1]))
+    extractor = FeatureExtractor()
+    descriptions = ["posto ipiranga", "uber"]
+    with extractor.scope(descriptions):
+        extractor.transform(bow, descriptions)
+        assert list(extractor.predict(pipeline, descriptions)) == list(pipeline.predict(descriptions))
+    assert extractor.stats()["avoided"] == 1
+
+def test_feature_scope_shared_across_threads():
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    vectorizer = TfidfVectorizer().fit(CORPUS)
+    extractor = FeatureExtractor()
+    descriptions = ["uber trip"]
+    with extractor.scope(descriptions) as scope:
+        def run():
+            with extractor.attach(scope):
+                extractor.transform(vectorizer, descriptions)
+        threads = [threading.Thread(target=run) for _ in range(4)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+    assert extractor.stats()["transforms"] == 1 and extractor.stats()["avoided"] == 3
+
+def test_sorted_vocabulary_lookup():
+    vocabulary = SortedVocabulary.from_dict({"posto": 3, "uber": 1, "farmacia": 7})
+    assert list(vocabulary.lookup(["uber", "postos", "farmacia", "zz", "a"])) == [1, -1, 7, -1, -1]
+    assert vocabulary.get("posto") == 3 and vocabulary.get("nada") is None
+    assert "uber" in vocabulary and len(vocabulary) == 3
+
+def test_compact_artifacts_match_sklearn(tmp_path):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import LabelEncoder
+    labels = ["ABS", "ABS", "ASS", "TRP", "SAU", "TRP"]
+    descriptions = CORPUS + ["Farmácia São João", "", "posto posto uber", "desconhecido"]
+
+    vectorizer = TfidfVectorizer(strip_accents="unicode", sublinear_tf=True).fit(CORPUS)
+    X = vectorizer.transform(CORPUS)
+    objects = {
+        "vectorizer": vectorizer,
+        "lr": LogisticRegression(max_iter=1000).fit(X, labels),
+        "rf": RandomForestClassifier(n_estimators=5, random_state=0).fit(X, labels),
+        "nb": Pipeline([("bow", CountVectorizer()), ("clf", MultinomialNB())]).fit(CORPUS, labels),
+        "encoder": LabelEncoder().fit(labels)
+    }
+    for name, obj in objects.items():
+        export_artifact(obj, str(tmp_path / name))
+    compact = {name: load_artifact(str(tmp_path / name)) for name in objects}
+
+    X, X_compact = vectorizer.transform(descriptions), compact["vectorizer"].transform(descriptions)
+    assert np.allclose(X.toarray(), X_compact.toarray())
+    assert list(objects["lr"].predict(X)) == list(compact["lr"].predict(X_compact))
+    assert np.allclose(objects["rf"].predict_proba(X), compact["rf"].predict_proba(X_compact))
+    assert list(objects["nb"].predict(descriptions)) == list(compact["nb"].predict(descriptions))
+    assert list(objects["encoder"].inverse_transform([0, 3])) == list(compact["encoder"].inverse_transform([0, 3]))
+    assert isinstance(compact["lr"].coef, np.memmap)
+
+def test_compact_hashing_matches_sklearn(tmp_path):
+    from sklearn.feature_extraction.text import HashingVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.pipeline import Pipeline
+    labels = ["ABS", "ABS", "ASS", "TRP", "SAU", "TRP"]
+    vectorizer = HashingVectorizer(analyzer="char_wb", ngram_range=(3, 5), n_features=2 ** 10, alternate_sign=False, norm=None)
+    modelo = Pipeline([("hash", vectorizer), ("clf", MultinomialNB().fit(vectorizer.transform(CORPUS), labels))])
+    export_artifact(modelo, str(tmp_path / "nb"))
+    compact = load_artifact(str(tmp_path / "nb"))
+    descriptions = CORPUS + ["rshop-aut post s", ""]
+    assert os.listdir(tmp_path / "nb" / "0_hash") == ["meta.json"]
+    assert np.allclose(vectorizer.transform(descriptions).toarray(), compact.steps[0][1].transform(descriptions).toarray())
+    assert list(modelo.predict(descriptions)) == list(compact.predict(descriptions))
+
+def test_compact_tokenizer_matches_pickle(tmp_path):
+    tokenizer = load_tokenizer("models/cnn_tokenizer.pkl")
+    export_artifact(tokenizer, str(tmp_path / "tokenizer"))
+    compact = load_artifact(str(tmp_path / "tokenizer"))
+    texts = ["pay auto posto", "Assinatura Deezer!", "palavra_inexistente", ""]
+    assert compact.texts_to_sequences(texts) == tokenizer.texts_to_sequences(texts)
+
+def test_export_artifact_unsupported_type(tmp_path):
+    with pytest.raises(ValueError):
+        export_artifact(object(), str(tmp_path / "x"))
+
+def test_export_vectorizer_rejects_custom_functions(tmp_path):
+    from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+    descriptions = ["pay auto posto", "mercado extra"]
+    for vectorizer in (TfidfVectorizer(preprocessor=lambda text: text.upper()),
+                       TfidfVectorizer(tokenizer=str.split, token_pattern=None),
+                       CountVectorizer(analyzer=str.split)):
+        with pytest.raises(ValueError):
+            export_artifact(vectorizer.fit(descriptions), str(tmp_path / "x"))
+    assert not os.path.exists(tmp_path / "x")
+
+class ListFeedback:
+    def __init__(self, rows):
+        self.rows = [[description, category, None] for description, category in rows]
+        self.released = []
+
+    def pending(self):
+        return sum(1 for row in self.rows if row[2] is None)
+
+    def claim(self, version, limit):
+        for row in [row for row in self.rows if row[2] is None][:limit]:
+            row[2] = version
+        return [(d, c) for d, c, v in self.rows if v == version]
+
+    def release(self, version):
+        self.released.append(version)
+        for row in self.rows:
+            if row[2] == version:
+                row[2] = None
+
+def make_online_versions(tmp_path, smoke_test=None):
+    from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.pipeline import Pipeline
+    descriptions = ["posto shell", "posto ipiranga", "auto posto", "mercado extra", "mercado dia", "super mercado",
+                    "loja geek", "loja americanas", "loja renner"]
+    labels = ["ABS"] * 3 + ["MER"] * 3 + ["LOJ"] * 3
+    vectorizer = TfidfVectorizer().fit(descriptions)
+    joblib.dump(vectorizer, tmp_path / "logistic_regression_vectorizer.pkl")
+    joblib.dump(LogisticRegression().fit(vectorizer.transform(descriptions), labels), tmp_path / "logistic_regression_model.pkl")
+    joblib.dump(Pipeline([("bow", CountVectorizer()), ("clf", MultinomialNB())]).fit(descriptions, labels),
+                tmp_path / "naive_bayes_model.pkl")
+    factory = lambda directory: ModelRegistry({
+        "lr": lambda: joblib.load(os.path.join(directory, "logistic_regression_model.pkl")),
+        "nb": lambda: joblib.load(os.path.join(directory, "naive_bayes_model.pkl"))
+    })
+    return ModelVersions(str(tmp_path), factory, smoke_test=smoke_test)
+
+def test_online_learner_publishes_corrected_version(tmp_path):
+    versions = make_online_versions(tmp_path)
+    feedback = ListFeedback([("loja geek posto", "ABS")] * 3)
+    learner = OnlineLearner(versions, feedback, min_feedback=3, keep_versions=1)
+    assert versions.get("nb").predict(["loja geek posto"])[0] == "LOJ"
+
+    assert learner.run_once() == "online-1"
+    assert versions.active_version == "online-1"
+    assert versions.get("nb").predict(["loja geek posto"])[0] == "ABS"
+    assert type(versions.get("lr")).__name__ == "SGDClassifier"
+    assert feedback.pending() == 0 and learner.stats()["learned"] == 3
+    # A versão de origem não é alterada (os arquivos copiados por hard link são regravados)
+    assert joblib.load(tmp_path / "naive_bayes_model.pkl").predict(["loja geek posto"])[0] == "LOJ"
+
+    assert learner.run_once() is None
+    feedback.rows += [["mercado geek", "MER", None]] * 3
+    assert learner.run_once() == "online-2"
+    feedback.rows += [["mercado shell", "MER", None]] * 3
+    assert learner.run_once() == "online-3"
+    # Mantém a mais nova (keep_versions=1) e a anterior, usada no rollback
+    assert learner.online_versions() == ["online-2", "online-3"]
+
+def test_online_learner_releases_feedback_when_version_fails(tmp_path):
+    def smoke_test(registry):
+        raise ValueError("predição de teste falhou")
+    versions = make_online_versions(tmp_path, smoke_test=smoke_test)
+    feedback = ListFeedback([("loja geek posto", "ABS"), ("loja nova", "NOV")])
+    learner = OnlineLearner(versions, feedback, min_feedback=1)
+    assert learner.run_once() is None
+    assert versions.active_version == "base"
+    assert feedback.released == ["online-1"] and feedback.pending() == 2
+    assert not os.path.exists(tmp_path / "online-1")
+    assert learner.stats()["failed"] == 1
+
+def test_online_learner_reserves_version_name(tmp_path):
+    def smoke_test(registry):
+        raise ValueError("predição de teste falhou")
+    versions = make_online_versions(tmp_path, smoke_test=smoke_test)
+    feedback = ListFeedback([("loja geek posto", "ABS")])
+    learner = OnlineLearner(versions, feedback, min_feedback=1)
+    # Outro processo publicou online-1 depois que este calculou o próximo nome
+    (tmp_path / "online-1").mkdir()
+    (tmp_path / "online-1" / "naive_bayes_model.pkl").write_bytes(b"publicada")
+    names = iter(["online-1", "online-2"])
+    learner.next_version = lambda: next(names)
+    assert learner.run_once() is None
+    assert feedback.released == ["online-2"] and feedback.pending() == 1
+    assert (tmp_path / "online-1" / "naive_bayes_model.pkl").read_bytes() == b"publicada"
+    assert not os.path.exists(tmp_path / "online-2")
+
+def test_online_learner_builds_from_latest_version_once_per_deployment(tmp_path):
+    import fcntl
+    worker_a = make_online_versions(tmp_path)
+    worker_b = ModelVersions(str(tmp_path), worker_a.registry_factory)
+    learner_a = OnlineLearner(worker_a, ListFeedback([("loja geek posto", "ABS")] * 3), min_feedback=1)
+    learner_b = OnlineLearner(worker_b, ListFeedback([("mercado geek", "MER")] * 3), min_feedback=1)
+    assert learner_a.run_once() == "online-1"
+
+    # O outro worker ainda está na versão base, mas parte da versão publicada
+    assert learner_b.run_once() == "online-2"
+    assert worker_b.get("nb").predict(["loja geek posto"])[0] == "ABS"
+    assert worker_b.get("nb").predict(["mercado geek"])[0] == "MER"
+
+    # Sem correções para reivindicar (outro processo levou as pendentes) nenhuma versão é criada
+    learner_a.feedback.claim = lambda version, limit: []
+    learner_a.feedback.rows.append(["loja nova", "LOJ", None])
+    assert learner_a.run_once() is None
+    assert learner_a.online_versions() == ["online-1", "online-2"]
+
+    # Outro processo em um ciclo: este pula a execução
+    learner_b.feedback.rows.append(["mercado novo", "MER", None])
+    with open(tmp_path / ".online.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        assert learner_b.run_once() is None
+    assert learner_b.stats()["skipped"] == 1 and learner_b.feedback.pending() == 1
+
+def test_to_sgd_keeps_logistic_regression_predictions():
+    from sklearn.linear_model import LogisticRegression
+    X = np.random.RandomState(0).rand(60, 5)
+    y = np.array(["A", "B", "C"] * 20)
+    modelo = LogisticRegression().fit(X, y)
+    assert list(to_sgd(modelo, X, y).predict(X)) == list(modelo.predict(X))
@@ -0,0 +1,181 @@
+import csv
+import json
+import os
+
+import joblib
+import numpy as np
+import pytest
+
+from classifier.tokenizer import Tokenizer
+from training import load_dataset, next_version_dir, train_all, TRAINING_MANIFEST
+from training.data import from_csv, load_columns
+from training.distill import distill, confidence_table, STUDENT_MODEL, DISTILL_REPORT
+from training.pipeline import CSV_PATH, file_sha1
+from training.search import search, choose, pareto_front, SEARCH_RESULTS
+
+
+@pytest.fixture(scope="module")
+def small_csv(tmp_path_factory):
+    """Amostra do CSV sintético: 40 linhas por categoria"""
+    descriptions, labels = load_dataset(CSV_PATH)
+    rows, counts = [], {}
+    for description, label in zip(descriptions, labels):
+        if counts.get(label, 0) < 40:
+            counts[label] = counts.get(label, 0) + 1
+            rows.append((description, label))
+    path = tmp_path_factory.mktemp("dados") / "transacoes.csv"
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(["descricao", "categoria"])
+        writer.writerows(rows)
+    return str(path)
+
+
+def train(csv_path, out_dir, seed=42):
+    return train_all(csv_path=csv_path, out_dir=str(out_dir), seed=seed, models=["lr", "rf", "nb"], jobs=1)
+
+
+def test_train_all_writes_serving_artifacts(small_csv, tmp_path):
+    out_dir, manifest = train(small_csv, tmp_path / "v1")
+    for name in ("logistic_regression", "random_forest", "naive_bayes"):
+        assert os.path.exists(os.path.join(out_dir, f"{name}_model.pkl"))
+        assert os.path.exists(os.path.join(out_dir, f"{name}_vectorizer.pkl"))
+    with open(os.path.join(out_dir, TRAINING_MANIFEST), encoding="utf-8") as f:
+        assert json.load(f)["models"].keys() == {"lr", "rf", "nb"}
+    assert all(0 <= metrics["accuracy"] <= 1 for metrics in manifest["models"].values())
+    assert manifest["split"]["train"] + manifest["split"]["validation"] == manifest["dataset"]["rows"]
+
+def test_train_all_is_reproducible(small_csv, tmp_path):
+    train(small_csv, tmp_path / "a")
+    train(small_csv, tmp_path / "b")
+    for name in sorted(os.listdir(tmp_path / "a")):
+        if name != TRAINING_MANIFEST:
+            assert (tmp_path / "a" / name).read_bytes() == (tmp_path / "b" / name).read_bytes(), name
+    modelo = joblib.load(tmp_path / "a" / "naive_bayes_model.pkl")
+    assert modelo.predict(["Compra no supermercado"])[0] == joblib.load(tmp_path / "b" / "naive_bayes_model.pkl").predict(["Compra no supermercado"])[0]
+
+def test_train_all_rejects_unknown_model(small_csv, tmp_path):
+    with pytest.raises(ValueError):
+        train_all(csv_path=small_csv, out_dir=str(tmp_path), models=["svm"], jobs=1)
+
+def test_load_dataset_reads_shard_directory(small_csv, tmp_path):
+    with open(small_csv, encoding="utf-8") as f:
+        header, *rows = f.read().splitlines()
+    for shard, part in enumerate((rows[:100], rows[100:])):
+        (tmp_path / f"transacoes_{shard:05d}.csv").write_text("\n".join([header] + part) + "\n", encoding="utf-8")
+    assert load_dataset(str(tmp_path)) == load_dataset(small_csv)
+    assert file_sha1(str(tmp_path)) != file_sha1(small_csv)
+
+def test_columnar_dataset_matches_csv(small_csv, tmp_path):
+    from_csv(small_csv, str(tmp_path / "colunas"))
+    columns, dictionaries = load_columns(str(tmp_path / "colunas"))
+    assert set(columns) == {"descricao", "categoria"}
+    assert isinstance(columns["descricao"], np.memmap) and len(dictionaries["categoria"]) == 21
+    assert load_dataset(str(tmp_path / "colunas")) == load_dataset(small_csv)
+
+    train(small_csv, tmp_path / "csv")
+    train(str(tmp_path / "colunas"), tmp_path / "npy")
+    for name in ("naive_bayes_model.pkl", "logistic_regression_model.pkl"):
+        assert (tmp_path / "csv" / name).read_bytes() == (tmp_path / "npy" / name).read_bytes()
+
+def test_partial_training_inherits_active_version(small_csv, tmp_path):
+    active = tmp_path / "v1"
+    train(small_csv, active)
+    (active / "cnn_model.h5").write_bytes(b"cnn")
+    (tmp_path / "manifest.json").write_text(json.dumps({"active": "v1"}), encoding="utf-8")
+    out_dir, manifest = train_all(csv_path=small_csv, models_dir=str(tmp_path), models=["nb"], jobs=1)
+    assert out_dir == os.path.join(str(tmp_path), "v2")
+    assert manifest["inherited"]["version"] == "v1"
+    assert "naive_bayes_model.pkl" not in manifest["inherited"]["files"]
+    for name in ("logistic_regression_model.pkl", "random_forest_vectorizer.pkl", "cnn_model.h5"):
+        assert (tmp_path / "v2" / name).read_bytes() == (active / name).read_bytes()
+    assert train(small_csv, tmp_path / "v9")[1]["inherited"] is None
+
+def test_next_version_dir(tmp_path):
+    assert next_version_dir(str(tmp_path)) == os.path.join(str(tmp_path), "v1")
+    for name in ("v1", "v3", "latest"):
+        (tmp_path / name).mkdir()
+    assert next_version_dir(str(tmp_path)) == os.path.join(str(tmp_path), "v4")
+
+def test_tokenizer_fit_matches_keras():
+    text = pytest.importorskip("keras.src.legacy.preprocessing.text")
+    descriptions = load_dataset(CSV_PATH)[0][:500]
+    keras_tokenizer = text.Tokenizer(num_words=1000, oov_token="<OOV>")
+    keras_tokenizer.fit_on_texts(descriptions)
+    tokenizer = Tokenizer(num_words=1000, oov_token="<OOV>")
+    tokenizer.fit_on_texts(descriptions)
+    assert tokenizer.word_index == keras_tokenizer.word_index
+    assert tokenizer.texts_to_sequences(descriptions[:50]) == keras_tokenizer.texts_to_sequences(descriptions[:50])
+
+def test_search_caches_features_and_reports_latency(small_csv, tmp_path):
+    grids = {"lr": {"C": [0.1, 1.0, 10.0]}, "nb": {"alpha": [0.1, 1.0]}}
+    report = search(csv_path=small_csv, cache_dir=str(tmp_path / "cache"), models=["lr", "nb"], grids=grids, jobs=1)
+    assert not report["cached"]
+    # 1ª rodada com 1/4 do treino: só a melhor metade de cada modelo chega à rodada final
+    assert sorted(r["model"] for r in report["results"]) == ["lr", "lr", "nb"]
+    assert len(report["pruned"]) == 2
+    assert all(r["latency"]["p50_ms"] > 0 for r in report["results"])
+    assert report["best"]["nb"] in report["results"]
+    assert os.path.exists(os.path.join(report["features"], SEARCH_RESULTS))
+
+    again = search(csv_path=small_csv, cache_dir=str(tmp_path / "cache"), models=["nb"], grids=grids, jobs=1, rounds=(1.0,))
+    assert again["cached"] and again["features"] == report["features"]
+    assert len(again["results"]) == 2 and not again["pruned"]
+
+def test_choose_respects_latency_limit():
+    results = [{"params": {"a": 1}, "accuracy": 0.9, "latency": {"p50_ms": 5.0}},
+               {"params": {"a": 2}, "accuracy": 0.8, "latency": {"p50_ms": 1.0}},
+               {"params": {"a": 3}, "accuracy": 0.7, "latency": {"p50_ms": 2.0}}]
+    assert choose(results)["params"] == {"a": 1}
+    assert choose(results, max_latency_ms=2)["params"] == {"a": 2}
+    assert choose(results, max_latency_ms=0.5) is None
+    assert [r["params"] for r in pareto_front(results)] == [{"a": 1}, {"a": 2}]
+
+def test_distill_student_reproduces_teacher(small_csv, tmp_path):
+    descriptions, labels = load_dataset(small_csv)
+    votes = dict(zip(descriptions, labels))
+    teacher = lambda descs: [votes[d] for d in descs]
+    out_dir, report = distill(csv_path=small_csv, out_dir=str(tmp_path), teacher=teacher, latency_rows=20)
+    student = joblib.load(os.path.join(out_dir, STUDENT_MODEL))
+    assert set(student.classes_) == set(labels)
+    assert report["corpus_agreement"] > 0.9
+    assert 0 <= report["holdout"]["weighted_agreement"] <= 1
+    assert report["latency"]["student"]["p50_ms"] > 0
+    with open(os.path.join(out_dir, DISTILL_REPORT), encoding="utf-8") as f:
+        assert json.load(f)["dataset"]["descriptions"] == len(set(descriptions))
+
+def test_distill_writes_student_to_new_version(small_csv, tmp_path):
+    descriptions, labels = load_dataset(small_csv)
+    votes = dict(zip(descriptions, labels))
+    train(small_csv, tmp_path / "v1")
+    (tmp_path / "manifest.json").write_text(json.dumps({"active": "v1"}), encoding="utf-8")
+    out_dir, report = distill(csv_path=small_csv, models_dir=str(tmp_path), latency_rows=5,
+                              teacher=lambda descs: [votes[d] for d in descs])
+    assert out_dir == os.path.join(str(tmp_path), "v2")
+    assert report["inherited"]["version"] == "v1"
+    assert os.path.exists(os.path.join(out_dir, STUDENT_MODEL))
+    assert os.path.exists(os.path.join(out_dir, "naive_bayes_model.pkl"))
+    # A versão ativa continua imutável
+    assert not os.path.exists(tmp_path / "v1" / STUDENT_MODEL)
+    with pytest.raises(ValueError):
+        distill(csv_path=small_csv, teacher=lambda descs: descs)
+
+def test_confidence_table_counts_fallback_as_agreement():
+    table = confidence_table(np.array([0.95, 0.5, 0.99, 0.7]), np.array([True, False, False, True]),
+                             np.array([1.0, 1.0, 2.0, 1.0]), thresholds=(0.9, 0.6))
+    assert table[0] == {"threshold": 0.9, "coverage": 0.6, "agreement": 0.3333, "served_agreement": 0.6}
+    assert table[1]["coverage"] == 0.8 and table[1]["served_agreement"] == 0.6
+
+def test_train_all_hashing_features(small_csv, tmp_path):
+    from sklearn.feature_extraction.text import HashingVectorizer
+    out_dir, manifest = train_all(csv_path=small_csv, out_dir=str(tmp_path), models=["lr", "rf", "nb"],
+                                  jobs=1, features="hashing")
+    assert manifest["features"] == "hashing" and manifest["models"]["nb"]["features"] == "hashing"
+    for name in ("logistic_regression_vectorizer.pkl", "naive_bayes_vectorizer.pkl"):
+        vectorizer = joblib.load(os.path.join(out_dir, name))
+        assert isinstance(vectorizer, HashingVectorizer) and not hasattr(vectorizer, "vocabulary_")
+    # O Randon Forest continua com o TF-IDF
+    assert hasattr(joblib.load(os.path.join(out_dir, "random_forest_vectorizer.pkl")), "vocabulary_")
+    modelo = joblib.load(os.path.join(out_dir, "logistic_regression_model.pkl"))
+    assert modelo.coef_.shape[1] == vectorizer.n_features
+    assert manifest["models"]["lr"]["accuracy"] > 0.5
@@ -0,0 +1,5 @@
+from training.data import load_columns, from_csv, is_columnar
+from training.models import TRAINERS, TFIDF_PARAMS, portable
+from training.pipeline import load_dataset, split_dataset, next_version_dir, train_all, TRAINING_MANIFEST
+from training.search import GRIDS, prepare_features, search, SEARCH_RESULTS
+from training.distill import distill, STUDENT_MODEL, DISTILL_REPORT
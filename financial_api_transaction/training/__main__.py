@@ -0,0 +1,91 @@
+"""
+Treina os modelos do classificador a partir do CSV sintético.
+
+Uso (a partir da pasta financial_api_transaction):
+    python -m training                          # grava a próxima versão em models/vN
+    python -m training --models lr,rf,nb --seed 7 --out models/v9
+    python -m training --features hashing       # LR e NB com feature hashing (sem vocabulário)
+    python -m training --search --models lr,nb --max-latency-ms 2
+    python -m training --distill                # aluno da versão ativa em uma nova vN (CLASSIFIER_VOTE_MODE=student)
+
+A nova versão é ativada com POST /admin/models/activate.
+"""
+import argparse
+
+from training.distill import distill
+from training.pipeline import CSV_PATH, FEATURES, MODEL_NAMES, train_all
+from training.search import CACHE_DIR, search
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Treina os modelos do classificador de transações")
+    parser.add_argument("--csv", default=CSV_PATH, help="CSV, diretório de shards ou de colunas .npy gerado por dataset/models/modelo.py")
+    parser.add_argument("--models-dir", default="./models", help="Diretório das versões de modelos")
+    parser.add_argument("--out", help="Diretório de saída (padrão: próxima versão em --models-dir)")
+    parser.add_argument("--models", default=",".join(MODEL_NAMES), help="Modelos a treinar (lr,rf,nb,cnn)")
+    parser.add_argument("--seed", type=int, default=42, help="Semente para divisão e modelos")
+    parser.add_argument("--jobs", type=int, help="Processos/núcleos usados (padrão: todos)")
+    parser.add_argument("--test-size", type=float, default=0.2, help="Fração para validação")
+    parser.add_argument("--cnn-epochs", type=int, default=10, help="Épocas de treinamento da CNN")
+    parser.add_argument("--features", choices=FEATURES, default="vocabulary",
+                        help="Atributos da regressão logística e do Naive Bayes (hashing: sem vocabulário)")
+    parser.add_argument("--search", action="store_true", help="Busca de hiperparâmetros (lr, rf, nb) em vez do treinamento")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="Cache das matrizes vetorizadas da busca")
+    parser.add_argument("--max-latency-ms", type=float, help="Latência máxima (p50) de uma predição na escolha da busca")
+    parser.add_argument("--distill", action="store_true", help="Destila o ensemble da versão ativa em um modelo aluno")
+    args = parser.parse_args()
+    models = [name.strip() for name in args.models.split(",") if name.strip()]
+
+    if args.distill:
+        out_dir, report = distill(csv_path=args.csv, out_dir=args.out, seed=args.seed,
+                                  test_size=args.test_size, logger=print)
+        holdout, latency = report["holdout"], report["latency"]
+        print(f"Concordância com o ensemble: {holdout['weighted_agreement']:.4f} (descrições fora do treino), "
+              f"{report['corpus_agreement']:.4f} (conjunto)")
+        for row in holdout["thresholds"]:
+            print(f"  confiança >= {row['threshold']}: aluno responde {row['coverage']:.1%}, "
+                  f"concordância {row['agreement']}, modo student {row['served_agreement']}")
+        print(f"Latência p50: aluno {latency['student']['p50_ms']} ms, ensemble {latency['ensemble']['p50_ms']} ms")
+        print(f"Aluno gravado em {out_dir} (limiar recomendado: {report['recommended_confidence']})")
+        if "inherited" in report:
+            print(f"Nova versão com os demais artefatos de '{report['inherited']['version']}'; "
+                  f"ative com POST /admin/models/activate")
+        return
+
+    if args.search:
+        report = search(
+            csv_path = args.csv,
+            cache_dir = args.cache_dir,
+            out_dir = args.out,
+            models = [name for name in models if name != "cnn"],
+            jobs = args.jobs,
+            seed = args.seed,
+            test_size = args.test_size,
+            max_latency_ms = args.max_latency_ms,
+            logger = print
+        )
+        for name, best in report["best"].items():
+            if best:
+                print(f"Melhor {name}: {best['params']} (acurácia {best['accuracy']:.4f}, p50 {best['latency']['p50_ms']} ms)")
+            else:
+                print(f"Melhor {name}: nenhum candidato dentro de {args.max_latency_ms} ms")
+        print(f"Resultados em {args.out or report['features']} ({report['search_seconds']}s)")
+        return
+
+    out_dir, manifest = train_all(
+        csv_path = args.csv,
+        out_dir = args.out,
+        models_dir = args.models_dir,
+        seed = args.seed,
+        models = models,
+        jobs = args.jobs,
+        test_size = args.test_size,
+        params = {"cnn": {"epochs": args.cnn_epochs}},
+        features = args.features,
+        logger = print
+    )
+    print(f"Artefatos gravados em {out_dir} ({manifest['training_seconds']}s)")
+
+
+if __name__ == "__main__":
+    main()
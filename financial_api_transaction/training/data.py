@@ -0,0 +1,91 @@
+"""
+Leitura do conjunto de treino em colunas .npy (dataset/models/modelo.py --formato npy).
+
+O diretório tem um meta.json e um .npy por coluna (data, descricao, categoria, valor).
+Descrição e categoria são códigos dos dicionários do meta.json: as colunas são abertas
+com mmap_mode e só os valores distintos viram str, sem o parse do CSV.
+
+Conversão do CSV atual (a partir da pasta financial_api_transaction):
+    python -m training.data ../dataset/models/transacoes_completas.csv ../dataset/models/transacoes_completas
+"""
+import argparse
+import csv
+import json
+import os
+
+import numpy as np
+
+META_FILE = 'meta.json'
+COLUMNS = {'data': 'datetime64[D]', 'descricao': 'int32', 'categoria': 'int8', 'valor': 'float64'}
+ENCODED = ('descricao', 'categoria')
+CSV_HEADER = {'data': 'data', 'descricao': 'descricao', 'categoria': 'categoria', 'Valor': 'valor'}
+
+
+def is_columnar(path):
+    return os.path.isfile(os.path.join(path, META_FILE))
+
+
+def read_meta(path):
+    with open(os.path.join(path, META_FILE), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def columnar_files(path, columns=ENCODED):
+    """meta.json e os .npy das colunas (para o sha1 do conjunto)"""
+    meta = read_meta(path)
+    return [os.path.join(path, META_FILE)] + [os.path.join(path, meta['colunas'][name]) for name in columns]
+
+
+def load_columns(path, columns=ENCODED, mmap_mode='r'):
+    """Só as colunas pedidas, memory-mapped; retorna (colunas, dicionários)"""
+    meta = read_meta(path)
+    arrays = {name: np.load(os.path.join(path, meta['colunas'][name]), mmap_mode=mmap_mode) for name in columns}
+    return arrays, meta['dicionarios']
+
+
+def decode(codes, dictionary):
+    """Códigos -> list de str (cada valor distinto é criado uma vez e reaproveitado)"""
+    return np.asarray(dictionary, dtype=object)[codes].tolist()
+
+
+def load_dataset(path, limit=None):
+    """Descrições e categorias, no mesmo formato de training.pipeline.load_dataset"""
+    columns, dictionaries = load_columns(path)
+    return tuple(decode(columns[name][:limit], dictionaries[name]) for name in ENCODED)
+
+
+def from_csv(csv_path, out_dir):
+    """Converte um CSV do gerador (data;descricao;categoria;Valor) para o formato em colunas"""
+    with open(csv_path, encoding='utf-8') as arquivo:
+        reader = csv.DictReader(arquivo, delimiter=';')
+        rows = list(reader)
+        present = {CSV_HEADER[field]: field for field in reader.fieldnames if field in CSV_HEADER}
+    dictionaries = {name: list(dict.fromkeys(row[present[name]] for row in rows)) for name in ENCODED}
+    arrays = {}
+    for name, field in present.items():
+        if name in dictionaries:
+            codes = {value: i for i, value in enumerate(dictionaries[name])}
+            values = [codes[row[field]] for row in rows]
+        else:
+            values = [row[field] for row in rows]
+        arrays[name] = np.array(values, dtype=COLUMNS[name])
+    os.makedirs(out_dir, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), array)
+    with open(os.path.join(out_dir, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump({'origem': os.path.basename(csv_path), 'linhas': len(rows),
+                   'colunas': {name: f"{name}.npy" for name in arrays}, 'dicionarios': dictionaries},
+                  f, ensure_ascii=False, indent=2)
+    return out_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Converte o CSV de transações para colunas .npy")
+    parser.add_argument("csv", help="CSV gerado por dataset/models/modelo.py")
+    parser.add_argument("out", help="Diretório de saída")
+    args = parser.parse_args()
+    print(f"Colunas gravadas em {from_csv(args.csv, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
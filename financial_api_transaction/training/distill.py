@@ -0,0 +1,193 @@
+"""
+Destilação do ensemble (LR + RF + NB + CNN) em um único modelo linear, o aluno.
+
+As descrições distintas do conjunto são rotuladas uma vez pela votação do serviço
+(app.vote_category_batch_full, com a versão ativa) e o aluno aprende a reproduzir essa votação,
+inclusive o CND, com o peso de cada descrição igual à sua frequência no conjunto.
+
+O relatório traz a concordância com o ensemble em descrições fora do treino do aluno,
+a cobertura e a concordância por limiar de confiança e a latência de uma predição de cada um.
+Com CLASSIFIER_VOTE_MODE=student o aluno responde primeiro e o ensemble só vota as
+descrições abaixo de CLASSIFIER_STUDENT_CONFIDENCE.
+"""
+import json
+import os
+import time
+
+from collections import Counter
+
+import joblib
+import numpy as np
+
+from training.models import portable
+from training.pipeline import CSV_PATH, file_sha1, inherit_artifacts, load_dataset, next_version_dir
+from training.search import LATENCY_ROWS, call_latency
+
+STUDENT_MODEL = 'student_model.pkl'
+DISTILL_REPORT = 'distill_report.json'
+
+# Aluno: TF-IDF de palavras e bigramas + regressão logística (predict_proba é a confiança)
+STUDENT_TFIDF = dict(strip_accents='unicode', ngram_range=(1, 2), sublinear_tf=True)
+STUDENT_C = 10.0
+
+# Limiares de confiança avaliados e concordância mínima para o limiar recomendado
+THRESHOLDS = (0.5, 0.6, 0.7, 0.8, 0.9, 0.95)
+TARGET_AGREEMENT = 0.98
+
+# Descrições rotuladas por chamada da votação em lote
+LABEL_BATCH = 1000
+
+
+def ensemble_teacher():
+    """
+    (votação em lote, votação de uma descrição, diretório das versões de modelos) do serviço.
+    Sempre a votação completa, qualquer que seja CLASSIFIER_VOTE_MODE.
+    """
+    import app
+
+    def batch(descriptions):
+        with app.model_versions.pinned():
+            return app.vote_category_batch_full(descriptions)
+
+    def single(description):
+        with app.model_versions.pinned(), app.feature_extractor.scope([description]):
+            return app.vote_category_full(description)
+
+    return batch, single, app.model_versions.models_dir
+
+
+def build_student(seed=42):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+
+    return Pipeline([
+        ('tfidf', TfidfVectorizer(**STUDENT_TFIDF)),
+        ('clf', LogisticRegression(C=STUDENT_C, max_iter=2000, random_state=seed))
+    ])
+
+
+def fit_student(descriptions, labels, weights, seed=42):
+    student = build_student(seed)
+    student.fit(descriptions, labels, clf__sample_weight=weights)
+    portable(student[0])
+    return student
+
+
+def label_corpus(descriptions, teacher, batch_size=LABEL_BATCH):
+    """Rótulos do ensemble para as descrições, em lotes"""
+    labels = []
+    for start in range(0, len(descriptions), batch_size):
+        labels += [str(label) for label in teacher(descriptions[start:start + batch_size])]
+    return labels
+
+
+def confidence_table(confidence, agree, weights, thresholds=THRESHOLDS):
+    """
+    Para cada limiar: fração do tráfego respondida pelo aluno (coverage), concordância nessa
+    fração e concordância do modo student (o restante é votado pelo próprio ensemble)
+    """
+    table = []
+    total = float(weights.sum())
+    for threshold in thresholds:
+        answered = confidence >= threshold
+        answered_weight = float(weights[answered].sum())
+        agreed = float(weights[answered & agree].sum())
+        table.append({
+            'threshold': threshold,
+            'coverage': round(answered_weight / total, 4),
+            'agreement': round(agreed / answered_weight, 4) if answered_weight else None,
+            'served_agreement': round((agreed + total - answered_weight) / total, 4)
+        })
+    return table
+
+
+def recommend_threshold(table, target=TARGET_AGREEMENT):
+    """Menor limiar em que o aluno concorda com o ensemble em pelo menos target das respostas"""
+    return next((row['threshold'] for row in table if row['agreement'] is not None and row['agreement'] >= target), None)
+
+
+def distill(csv_path=CSV_PATH, out_dir=None, models_dir=None, teacher=None, teacher_single=None, seed=42,
+            test_size=0.2, thresholds=THRESHOLDS, latency_rows=LATENCY_ROWS, logger=None):
+    """
+    Rotula o conjunto com o ensemble, avalia o aluno em descrições separadas (test_size) e grava
+    o aluno treinado com todas as descrições em out_dir com o relatório. Sem out_dir, o aluno vai
+    para uma nova versão vN de models_dir com os demais artefatos da versão ativa (a versão ativa
+    não é alterada); ela é ativada como as demais, por POST /admin/models/activate.
+    teacher: votação em lote (list -> list); padrão: a votação do serviço (importa app).
+    """
+    from sklearn.model_selection import train_test_split
+
+    start = time.perf_counter()
+    if teacher is None:
+        teacher, default_single, default_models_dir = ensemble_teacher()
+        teacher_single = teacher_single or default_single
+        models_dir = models_dir or default_models_dir
+    if out_dir is None and models_dir is None:
+        raise ValueError("Informe out_dir ou models_dir para um teacher externo")
+    teacher_single = teacher_single or (lambda description: teacher([description])[0])
+
+    # Cada descrição distinta é votada uma vez; a frequência vira o peso no treino e nas métricas
+    counts = Counter(load_dataset(csv_path)[0])
+    descriptions = list(counts)
+    weights = np.array([counts[d] for d in descriptions], dtype=np.float64)
+    label_start = time.perf_counter()
+    labels = np.array(label_corpus(descriptions, teacher), dtype=object)
+    label_seconds = time.perf_counter() - label_start
+    if logger:
+        logger(f"{len(descriptions)} descrições distintas ({int(weights.sum())} linhas) rotuladas "
+               f"pelo ensemble em {label_seconds:.1f}s")
+
+    # Avaliação com descrições que o aluno não viu
+    rows = np.arange(len(descriptions))
+    train_rows, val_rows = train_test_split(rows, test_size=test_size, random_state=seed)
+    texts = np.array(descriptions, dtype=object)
+    student = fit_student(texts[train_rows].tolist(), labels[train_rows], weights[train_rows], seed)
+    proba = student.predict_proba(texts[val_rows].tolist())
+    predicted = student.classes_[proba.argmax(axis=1)]
+    agree = predicted == labels[val_rows]
+    table = confidence_table(proba.max(axis=1), agree, weights[val_rows], thresholds)
+
+    # Aluno final: todas as descrições
+    student = fit_student(descriptions, labels, weights, seed)
+    corpus_agree = student.predict(descriptions) == labels
+
+    latency_texts = texts[val_rows][:latency_rows].tolist()
+    latency = {
+        'student': call_latency(lambda text: student.predict_proba([text]), latency_texts),
+        'ensemble': call_latency(teacher_single, latency_texts)
+    }
+
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'dataset': {'path': csv_path, 'sha1': file_sha1(csv_path), 'rows': int(weights.sum()),
+                    'descriptions': len(descriptions)},
+        'seed': seed,
+        'student': {'tfidf': {k: list(v) if isinstance(v, tuple) else v for k, v in STUDENT_TFIDF.items()},
+                    'C': STUDENT_C},
+        'labels': dict(Counter(labels.tolist()).most_common()),
+        'holdout': {
+            'descriptions': len(val_rows),
+            'agreement': round(float(agree.mean()), 4),
+            'weighted_agreement': round(float(np.average(agree, weights=weights[val_rows])), 4),
+            'thresholds': table
+        },
+        'corpus_agreement': round(float(np.average(corpus_agree, weights=weights)), 4),
+        'recommended_confidence': recommend_threshold(table),
+        'latency': latency,
+        'speedup_p50': round(latency['ensemble']['p50_ms'] / latency['student']['p50_ms'], 1)
+                       if latency['student']['p50_ms'] else None,
+        'label_seconds': round(label_seconds, 3),
+        'distill_seconds': round(time.perf_counter() - start, 3)
+    }
+
+    new_version = out_dir is None
+    out_dir = out_dir or next_version_dir(models_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    joblib.dump(student, os.path.join(out_dir, STUDENT_MODEL))
+    if new_version:
+        # O aluno da versão ativa (se houver) não é copiado: o novo já está gravado
+        report['inherited'] = inherit_artifacts(models_dir, out_dir)
+    with open(os.path.join(out_dir, DISTILL_REPORT), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return out_dir, report
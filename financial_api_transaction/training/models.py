@@ -0,0 +1,180 @@
+"""
+Treinamento de cada modelo do classificador.
+
+Cada função recebe os dados já divididos, grava os artefatos em out_dir com
+os nomes lidos pelo app.py e retorna as métricas de validação.
+"""
+import os
+import pickle
+
+import joblib
+import numpy as np
+
+# Parâmetros do TF-IDF em produção (compartilhado entre regressão logística e Randon Forest)
+TFIDF_PARAMS = dict(strip_accents='unicode', min_df=10, max_df=0.8, max_features=1000)
+
+# Feature hashing (--features hashing) para a regressão logística e o Naive Bayes: largura fixa,
+# sem vocabulário e sem passagem de fit. Os n-gramas de caracteres dentro das palavras toleram
+# descrições truncadas ou coladas ("rshop-aut post s")
+HASHING_PARAMS = dict(analyzer='char_wb', ngram_range=(3, 5), n_features=2 ** 15,
+                      strip_accents='unicode', alternate_sign=False)
+HASHING_LR_PARAMS = {'C': 10.0, 'solver': 'saga'}
+HASHING_NB_PARAMS = {'alpha': 0.1}
+# Descrições transformadas por vez (cada bloco é independente dos demais)
+HASHING_CHUNK = 10000
+
+# Tokenizer e entrada da CNN
+CNN_NUM_WORDS = 1000
+CNN_OOV_TOKEN = '<OOV>'
+CNN_MAXLEN = 100
+
+
+def portable(vectorizer):
+    """
+    Remove do vectorizer atributos que mudam a cada processo (id() das stop words e o
+    conjunto stop_words_, só informativo): o mesmo seed gera o mesmo arquivo.
+    """
+    for attr in ('_stop_words_id', 'stop_words_'):
+        vectorizer.__dict__.pop(attr, None)
+    return vectorizer
+
+
+def accuracy(y_true, y_pred):
+    return float(np.mean(np.asarray(y_true) == np.asarray(y_pred)))
+
+
+def hashing_vectorizer(norm='l2'):
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    return HashingVectorizer(norm=norm, **HASHING_PARAMS)
+
+
+def hash_chunks(vectorizer, texts, labels=None, chunk=HASHING_CHUNK):
+    """(matriz, rótulos) de cada bloco de descrições: o conjunto não precisa caber em uma matriz"""
+    for start in range(0, len(texts), chunk):
+        yield vectorizer.transform(texts[start:start + chunk]), labels[start:start + chunk] if labels is not None else None
+
+
+def hash_transform(vectorizer, texts, chunk=HASHING_CHUNK):
+    from scipy import sparse
+
+    return sparse.vstack([X for X, _ in hash_chunks(vectorizer, texts, chunk=chunk)], format='csr')
+
+
+def train_logistic_regression(data, out_dir, seed, n_jobs=1, params=None):
+    from sklearn.linear_model import LogisticRegression
+
+    artifacts = ['logistic_regression_model.pkl']
+    if data.get('features') == 'hashing':
+        # Sem fit do vectorizer: as matrizes são montadas bloco a bloco
+        params = dict({'max_iter': 1000, 'random_state': seed}, **HASHING_LR_PARAMS, **(params or {}))
+        vectorizer = hashing_vectorizer()
+        train_x, val_x = hash_transform(vectorizer, data['train_x']), hash_transform(vectorizer, data['val_x'])
+        joblib.dump(vectorizer, os.path.join(out_dir, 'logistic_regression_vectorizer.pkl'))
+        artifacts.append('logistic_regression_vectorizer.pkl')
+    else:
+        params = dict({'max_iter': 1000, 'random_state': seed}, **(params or {}))
+        train_x, val_x = data['tfidf_train'], data['tfidf_val']
+    modelo = LogisticRegression(**params).fit(train_x, data['train_y'])
+    joblib.dump(modelo, os.path.join(out_dir, 'logistic_regression_model.pkl'))
+    return {
+        'accuracy': accuracy(data['val_y'], modelo.predict(val_x)),
+        'params': params,
+        'features': data.get('features', 'vocabulary'),
+        'artifacts': artifacts
+    }
+
+
+def train_random_forest(data, out_dir, seed, n_jobs=1, params=None):
+    from sklearn.ensemble import RandomForestClassifier
+
+    params = dict({'n_estimators': 100, 'random_state': seed}, **(params or {}))
+    modelo = RandomForestClassifier(n_jobs=n_jobs, **params).fit(data['tfidf_train'], data['train_y'])
+    # n_jobs só vale para o treinamento; a predição de uma linha é mais rápida sem threads
+    modelo.set_params(n_jobs=None)
+    joblib.dump(modelo, os.path.join(out_dir, 'random_forest_model.pkl'))
+    return {
+        'accuracy': accuracy(data['val_y'], modelo.predict(data['tfidf_val'])),
+        'params': params,
+        'artifacts': ['random_forest_model.pkl']
+    }
+
+
+def train_naive_bayes(data, out_dir, seed, n_jobs=1, params=None):
+    from sklearn.feature_extraction.text import CountVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.pipeline import Pipeline
+
+    if data.get('features') == 'hashing':
+        # Contagens (norm=None) por hashing; o treino é feito bloco a bloco com partial_fit
+        params = dict(HASHING_NB_PARAMS, **(params or {}))
+        vectorizer, classifier = hashing_vectorizer(norm=None), MultinomialNB(**params)
+        for X, y in hash_chunks(vectorizer, data['train_x'], data['train_y']):
+            classifier.partial_fit(X, y, classes=data['labels'])
+        modelo = Pipeline([('hash', vectorizer), ('clf', classifier)])
+    else:
+        params = dict(params or {})
+        modelo = Pipeline([('bow', CountVectorizer()), ('clf', MultinomialNB(**params))])
+        modelo.fit(data['train_x'], data['train_y'])
+        portable(modelo.named_steps['bow'])
+    accuracy_val = accuracy(data['val_y'], modelo.predict(data['val_x']))
+    joblib.dump(modelo, os.path.join(out_dir, 'naive_bayes_model.pkl'))
+    joblib.dump(modelo.steps[0][1], os.path.join(out_dir, 'naive_bayes_vectorizer.pkl'))
+    return {
+        'accuracy': accuracy_val,
+        'params': params,
+        'features': data.get('features', 'vocabulary'),
+        'artifacts': ['naive_bayes_model.pkl', 'naive_bayes_vectorizer.pkl']
+    }
+
+
+def train_cnn(data, out_dir, seed, n_jobs=1, params=None):
+    import keras
+    import tensorflow as tf
+    from sklearn.preprocessing import LabelEncoder
+
+    from classifier.tokenizer import Tokenizer, encode_sequences
+
+    params = dict({'epochs': 10, 'batch_size': 32}, **(params or {}))
+    keras.utils.set_random_seed(seed)
+    tf.config.experimental.enable_op_determinism()
+    tf.config.threading.set_inter_op_parallelism_threads(n_jobs)
+    tf.config.threading.set_intra_op_parallelism_threads(n_jobs)
+
+    tokenizer = Tokenizer(num_words=CNN_NUM_WORDS, oov_token=CNN_OOV_TOKEN)
+    tokenizer.fit_on_texts(data['train_x'])
+    encoder = LabelEncoder().fit(data['labels'])
+    X_train = np.array(encode_sequences(tokenizer, data['train_x'], maxlen=CNN_MAXLEN))
+    X_val = np.array(encode_sequences(tokenizer, data['val_x'], maxlen=CNN_MAXLEN))
+    y_train = keras.utils.to_categorical(encoder.transform(data['train_y']), num_classes=len(encoder.classes_))
+
+    modelo = keras.Sequential([
+        keras.Input(shape=(CNN_MAXLEN,)),
+        keras.layers.Embedding(CNN_NUM_WORDS, 50),
+        keras.layers.Conv1D(64, 3, activation='relu'),
+        keras.layers.GlobalMaxPooling1D(),
+        keras.layers.Dense(64, activation='relu'),
+        keras.layers.Dense(len(encoder.classes_), activation='softmax')
+    ])
+    modelo.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+    modelo.fit(X_train, y_train, epochs=params['epochs'], batch_size=params['batch_size'], shuffle=True, verbose=0)
+
+    pred = encoder.inverse_transform(np.argmax(modelo.predict(X_val, verbose=0), axis=1))
+    modelo.save(os.path.join(out_dir, 'cnn_model.h5'))
+    with open(os.path.join(out_dir, 'cnn_tokenizer.pkl'), 'wb') as f:
+        pickle.dump(tokenizer, f)
+    with open(os.path.join(out_dir, 'cnn_label_encoder.pkl'), 'wb') as f:
+        pickle.dump(encoder, f)
+    return {
+        'accuracy': accuracy(data['val_y'], pred),
+        'params': params,
+        'artifacts': ['cnn_model.h5', 'cnn_tokenizer.pkl', 'cnn_label_encoder.pkl']
+    }
+
+
+TRAINERS = {
+    'lr': train_logistic_regression,
+    'rf': train_random_forest,
+    'nb': train_naive_bayes,
+    'cnn': train_cnn
+}
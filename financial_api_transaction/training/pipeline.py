@@ -0,0 +1,190 @@
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import platform
+import random
+import re
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+
+from training.data import columnar_files, is_columnar, load_dataset as load_columnar
+from training.models import TRAINERS, TFIDF_PARAMS, portable
+
+CSV_PATH = '../dataset/models/transacoes_completas.csv'
+MODEL_NAMES = ('lr', 'rf', 'nb', 'cnn')
+# Atributos da regressão logística e do Naive Bayes: vectorizers com vocabulário ou feature hashing
+FEATURES = ('vocabulary', 'hashing')
+TRAINING_MANIFEST = 'training_manifest.json'
+
+
+def dataset_files(csv_path):
+    """O CSV informado ou, para um diretório, as colunas .npy ou os shards .csv gerados por modelo.py"""
+    if is_columnar(csv_path):
+        return columnar_files(csv_path)
+    if os.path.isdir(csv_path):
+        return [os.path.join(csv_path, name) for name in sorted(os.listdir(csv_path)) if name.endswith('.csv')]
+    return [csv_path]
+
+
+def load_dataset(csv_path=CSV_PATH):
+    """Lê descrições e categorias do CSV (ou dos shards ou das colunas .npy) gerado por dataset/models/modelo.py"""
+    if is_columnar(csv_path):
+        return load_columnar(csv_path)
+    descriptions, labels = [], []
+    for path in dataset_files(csv_path):
+        with open(path, encoding='utf-8') as arquivo:
+            for row in csv.DictReader(arquivo, delimiter=';'):
+                descriptions.append(row['descricao'])
+                labels.append(row['categoria'])
+    return descriptions, labels
+
+
+def file_sha1(path):
+    """sha1 do arquivo ou, para um diretório de shards, do conteúdo de todos em ordem"""
+    digest = hashlib.sha1()
+    for name in dataset_files(path):
+        with open(name, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def split_dataset(descriptions, labels, test_size=0.2, seed=42):
+    """Divisão treino/validação estratificada (quando possível) e reproduzível"""
+    from sklearn.model_selection import train_test_split
+
+    counts = {label: labels.count(label) for label in set(labels)}
+    stratify = labels if min(counts.values()) >= 2 else None
+    train_x, val_x, train_y, val_y = train_test_split(
+        descriptions, labels, test_size=test_size, random_state=seed, stratify=stratify)
+    return {'train_x': train_x, 'train_y': train_y, 'val_x': val_x, 'val_y': val_y, 'labels': sorted(counts)}
+
+
+def next_version_dir(models_dir):
+    """Próximo diretório de versão livre: models/v1, models/v2, ..."""
+    numbers = [int(m.group(1)) for m in (re.fullmatch(r'v(\d+)', name) for name in os.listdir(models_dir)) if m]
+    return os.path.join(models_dir, f"v{max(numbers, default=0) + 1}")
+
+
+def inherit_artifacts(models_dir, out_dir):
+    """
+    Completa uma versão treinada só com parte dos modelos: copia da versão ativa
+    (models/manifest.json) os artefatos que não foram gravados em out_dir
+    """
+    from classifier.online import link_or_copy
+    from classifier.versions import BASE_VERSION, MANIFEST_FILE
+
+    try:
+        with open(os.path.join(models_dir, MANIFEST_FILE), encoding='utf-8') as f:
+            active = json.load(f).get('active') or BASE_VERSION
+    except (OSError, ValueError):
+        active = BASE_VERSION
+    source = models_dir if active == BASE_VERSION else os.path.join(models_dir, active)
+    inherited = []
+    for name in sorted(os.listdir(source)):
+        if (name.endswith(('.pkl', '.h5')) and os.path.isfile(os.path.join(source, name))
+                and not os.path.exists(os.path.join(out_dir, name))):
+            link_or_copy(os.path.join(source, name), os.path.join(out_dir, name))
+            inherited.append(name)
+    return {'version': active, 'files': inherited}
+
+
+def fit_tfidf(data, out_dir, models=('lr', 'rf')):
+    """Ajusta o TF-IDF uma única vez e grava o mesmo vectorizer para LR e RF"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    vectorizer = TfidfVectorizer(**TFIDF_PARAMS).fit(data['train_x'])
+    data['tfidf_train'] = vectorizer.transform(data['train_x'])
+    data['tfidf_val'] = vectorizer.transform(data['val_x'])
+    portable(vectorizer)
+    names = {'lr': 'logistic_regression_vectorizer.pkl', 'rf': 'random_forest_vectorizer.pkl'}
+    for name in models:
+        joblib.dump(vectorizer, os.path.join(out_dir, names[name]))
+    return vectorizer
+
+
+def run_trainer(name, data, out_dir, seed, n_jobs, params=None):
+    """Treina um modelo (executado em um processo próprio)"""
+    random.seed(seed)
+    np.random.seed(seed)
+    start = time.perf_counter()
+    metrics = TRAINERS[name](data, out_dir, seed, n_jobs=n_jobs, params=params)
+    metrics['train_seconds'] = round(time.perf_counter() - start, 3)
+    return metrics
+
+
+def train_all(csv_path=CSV_PATH, out_dir=None, models_dir='./models', seed=42, models=MODEL_NAMES,
+              jobs=None, test_size=0.2, params=None, features='vocabulary', logger=None):
+    """
+    Treina os modelos em processos separados e grava os artefatos e o
+    training_manifest.json (métricas, tempos e parâmetros) em out_dir.
+    Com features='hashing' a regressão logística e o Naive Bayes usam feature hashing.
+    Sem out_dir, uma nova versão vN treinada só com parte dos modelos recebe os demais
+    artefatos da versão ativa, para passar no teste de fumaça da ativação.
+    """
+    start = time.perf_counter()
+    unknown = set(models) - set(TRAINERS)
+    if unknown:
+        raise ValueError(f"Modelos desconhecidos: {', '.join(sorted(unknown))}")
+    if features not in FEATURES:
+        raise ValueError(f"Atributos desconhecidos: {features}")
+    new_version = not out_dir
+    out_dir = out_dir or next_version_dir(models_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    params = params or {}
+
+    descriptions, labels = load_dataset(csv_path)
+    data = split_dataset(descriptions, labels, test_size=test_size, seed=seed)
+    data['features'] = features
+    tfidf_models = [name for name in ('lr', 'rf') if name in models and not (name == 'lr' and features == 'hashing')]
+    if tfidf_models:
+        fit_tfidf(data, out_dir, tfidf_models)
+
+    # Um processo por modelo; os núcleos restantes vão para o Randon Forest
+    jobs = jobs or os.cpu_count() or 1
+    workers = max(1, min(jobs, len(models)))
+    n_jobs = {name: max(1, jobs - workers + 1) if name == 'rf' else 1 for name in models}
+
+    if workers == 1:
+        results = {name: run_trainer(name, data, out_dir, seed, n_jobs[name], params.get(name)) for name in models}
+    else:
+        # spawn: o TensorFlow não é seguro após fork
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = {name: pool.submit(run_trainer, name, data, out_dir, seed, n_jobs[name], params.get(name))
+                       for name in models}
+            results = {name: future.result() for name, future in futures.items()}
+
+    for name, metrics in results.items():
+        if logger:
+            logger(f"{name}: acurácia {metrics['accuracy']:.4f} em {metrics['train_seconds']}s")
+
+    inherited = None
+    if new_version and set(models) != set(MODEL_NAMES):
+        inherited = inherit_artifacts(models_dir, out_dir)
+        if logger:
+            logger(f"Artefatos copiados da versão {inherited['version']}: {', '.join(inherited['files']) or 'nenhum'}")
+
+    import sklearn
+
+    manifest = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'seed': seed,
+        'dataset': {'path': csv_path, 'rows': len(descriptions), 'sha1': file_sha1(csv_path)},
+        'split': {'test_size': test_size, 'train': len(data['train_x']), 'validation': len(data['val_x'])},
+        'features': features,
+        'jobs': jobs,
+        'models': results,
+        'inherited': inherited,
+        'training_seconds': round(time.perf_counter() - start, 3),
+        'environment': {'python': platform.python_version(), 'scikit-learn': sklearn.__version__}
+    }
+    with open(os.path.join(out_dir, TRAINING_MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return out_dir, manifest
@@ -0,0 +1,262 @@
+"""
+Busca de hiperparâmetros da regressão logística, do Randon Forest e do Naive Bayes.
+
+As matrizes vetorizadas de treino/validação são calculadas uma única vez e gravadas em
+cache_dir (a chave inclui o sha1 do CSV, a divisão e os parâmetros dos vectorizers):
+os processos da busca leem as matrizes do disco em vez de ajustar o TF-IDF de novo.
+
+Cada candidato é avaliado por acurácia de validação e latência de uma predição
+(transform + predict de uma descrição), para escolher modelos pelos dois critérios.
+"""
+import hashlib
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import statistics
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+
+from training.models import TFIDF_PARAMS, accuracy, portable
+from training.pipeline import CSV_PATH, file_sha1, load_dataset, split_dataset
+
+CACHE_DIR = './models/.cache'
+SEARCH_RESULTS = 'search_results.json'
+
+# Grades padrão (os demais parâmetros seguem training/models.py)
+GRIDS = {
+    'lr': {'C': [0.1, 1.0, 10.0], 'class_weight': [None, 'balanced']},
+    'rf': {'n_estimators': [50, 100, 200], 'max_depth': [None, 30]},
+    'nb': {'alpha': [0.05, 0.1, 0.5, 1.0]}
+}
+
+# Matriz usada por cada modelo: TF-IDF (LR e RF) ou contagem de palavras (NB)
+FEATURES = {'lr': 'tfidf', 'rf': 'tfidf', 'nb': 'bow'}
+
+# Parada antecipada: frações do treino em cada rodada; só a melhor metade segue para a próxima
+ROUNDS = (0.25, 1.0)
+KEEP = 0.5
+
+# Descrições da validação usadas para medir a latência de uma predição
+LATENCY_ROWS = 200
+
+# Matrizes já lidas neste processo (os workers reaproveitam entre candidatos)
+_loaded = {}
+
+
+# Cache das matrizes ---------------------------------------------------------------------------
+def cache_key(csv_path, test_size, seed):
+    import sklearn
+
+    key = {
+        'dataset': file_sha1(csv_path),
+        'test_size': test_size,
+        'seed': seed,
+        'tfidf': TFIDF_PARAMS,
+        'scikit-learn': sklearn.__version__
+    }
+    return hashlib.sha1(json.dumps(key, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def prepare_features(csv_path=CSV_PATH, cache_dir=CACHE_DIR, test_size=0.2, seed=42):
+    """
+    Retorna (diretório, True se veio do cache). Na primeira vez divide o CSV, ajusta o
+    TF-IDF e o CountVectorizer e grava as matrizes (.npz), os vectorizers e os rótulos.
+    """
+    from scipy import sparse
+    from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+
+    path = os.path.join(cache_dir, cache_key(csv_path, test_size, seed))
+    if os.path.isdir(path):
+        return path, True
+
+    # Grava em um diretório temporário e renomeia: outro processo nunca lê um cache incompleto
+    tmp = f"{path}.tmp-{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+    descriptions, labels = load_dataset(csv_path)
+    data = split_dataset(descriptions, labels, test_size=test_size, seed=seed)
+    vectorizers = {'tfidf': TfidfVectorizer(**TFIDF_PARAMS), 'bow': CountVectorizer()}
+    for kind, vectorizer in vectorizers.items():
+        sparse.save_npz(os.path.join(tmp, f"{kind}_train.npz"), vectorizer.fit_transform(data['train_x']))
+        sparse.save_npz(os.path.join(tmp, f"{kind}_val.npz"), vectorizer.transform(data['val_x']))
+        joblib.dump(portable(vectorizer), os.path.join(tmp, f"{kind}_vectorizer.pkl"))
+    with open(os.path.join(tmp, 'labels.json'), 'w', encoding='utf-8') as f:
+        json.dump({'train_y': data['train_y'], 'val_y': data['val_y'],
+                   'latency_x': data['val_x'][:LATENCY_ROWS]}, f)
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return path, False
+
+
+def load_features(path, kind):
+    """Matrizes, rótulos e vectorizer de um tipo de feature (lidos uma vez por processo)"""
+    if (path, kind) not in _loaded:
+        from scipy import sparse
+
+        with open(os.path.join(path, 'labels.json'), encoding='utf-8') as f:
+            labels = json.load(f)
+        _loaded[(path, kind)] = {
+            'train_x': sparse.load_npz(os.path.join(path, f"{kind}_train.npz")),
+            'val_x': sparse.load_npz(os.path.join(path, f"{kind}_val.npz")),
+            'train_y': np.asarray(labels['train_y'], dtype=object),
+            'val_y': labels['val_y'],
+            'latency_x': labels['latency_x'],
+            'vectorizer': joblib.load(os.path.join(path, f"{kind}_vectorizer.pkl"))
+        }
+    return _loaded[(path, kind)]
+
+
+# Candidatos -----------------------------------------------------------------------------------
+def expand_grid(grid):
+    """{'C': [1, 10], 'x': [a]} -> [{'C': 1, 'x': a}, {'C': 10, 'x': a}]"""
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def build_model(name, params, seed):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.naive_bayes import MultinomialNB
+
+    if name == 'lr':
+        return LogisticRegression(**dict({'max_iter': 1000, 'random_state': seed}, **params))
+    if name == 'rf':
+        return RandomForestClassifier(**dict({'random_state': seed}, **params))
+    return MultinomialNB(**params)
+
+
+def evaluate(name, params, path, fraction, seed):
+    """
+    Treina um candidato com uma fração do treino e mede a acurácia de validação.
+    Na rodada final (fraction == 1) o modelo treinado é devolvido para a medição de latência.
+    """
+    data = load_features(path, FEATURES[name])
+    train_x, train_y = data['train_x'], data['train_y']
+    if fraction < 1:
+        rows = np.sort(np.random.RandomState(seed).permutation(train_x.shape[0])[:max(1, int(train_x.shape[0] * fraction))])
+        train_x, train_y = train_x[rows], train_y[rows]
+    start = time.perf_counter()
+    modelo = build_model(name, params, seed).fit(train_x, train_y)
+    result = {
+        'model': name,
+        'params': params,
+        'fraction': fraction,
+        'accuracy': accuracy(data['val_y'], modelo.predict(data['val_x'])),
+        'train_seconds': round(time.perf_counter() - start, 3)
+    }
+    return result, modelo if fraction >= 1 else None
+
+
+def single_row_latency(vectorizer, modelo, texts):
+    """Latência de uma predição (transform + predict de uma descrição), em ms: p50 e p95"""
+    return call_latency(lambda text: modelo.predict(vectorizer.transform([text])), texts)
+
+
+def call_latency(predict, texts):
+    """Latência de predict(descrição) para cada texto, em ms: p50 e p95 (a primeira chamada aquece)"""
+    predict(texts[0])
+    tempos = []
+    for text in texts:
+        inicio = time.perf_counter()
+        predict(text)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {'p50_ms': round(statistics.median(tempos), 3),
+            'p95_ms': round(tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))], 3)}
+
+
+def pareto_front(results):
+    """Candidatos não dominados: nenhum outro é mais preciso e mais rápido ao mesmo tempo"""
+    front = []
+    for result in results:
+        dominated = any(
+            other['accuracy'] >= result['accuracy'] and other['latency']['p50_ms'] <= result['latency']['p50_ms']
+            and (other['accuracy'] > result['accuracy'] or other['latency']['p50_ms'] < result['latency']['p50_ms'])
+            for other in results)
+        if not dominated:
+            front.append(result)
+    return front
+
+
+def choose(results, max_latency_ms=None):
+    """Mais preciso dentro do limite de latência (p50); empate: o mais rápido"""
+    allowed = [r for r in results if max_latency_ms is None or r['latency']['p50_ms'] <= max_latency_ms]
+    return max(allowed, key=lambda r: (r['accuracy'], -r['latency']['p50_ms']), default=None)
+
+
+# Busca ----------------------------------------------------------------------------------------
+def search(csv_path=CSV_PATH, cache_dir=CACHE_DIR, out_dir=None, models=('lr', 'rf', 'nb'), grids=None,
+           jobs=None, seed=42, test_size=0.2, rounds=ROUNDS, keep=KEEP, max_latency_ms=None, logger=None):
+    """
+    Avalia as grades em um pool de processos. A cada rodada os candidatos são treinados com
+    uma fração maior do treino e só a melhor parte (keep) de cada modelo segue (parada antecipada).
+    A latência é medida depois, no processo principal e um candidato por vez, sem disputa por CPU.
+    """
+    start = time.perf_counter()
+    grids = dict(GRIDS, **(grids or {}))
+    unknown = set(models) - set(FEATURES)
+    if unknown:
+        raise ValueError(f"Modelos sem busca: {', '.join(sorted(unknown))}")
+    if not rounds or rounds[-1] < 1:
+        raise ValueError("A última rodada deve usar todo o treino (fração 1.0)")
+
+    path, cached = prepare_features(csv_path, cache_dir, test_size, seed)
+    if logger:
+        logger(f"Matrizes {'lidas do cache' if cached else 'gravadas'} em {path}")
+
+    candidates = [(name, params) for name in models for params in expand_grid(grids[name])]
+    pruned = []
+    jobs = jobs or os.cpu_count() or 1
+    workers = max(1, min(jobs, len(candidates)))
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) if workers > 1 else None
+    try:
+        for fraction in rounds:
+            args = [(name, params, path, fraction, seed) for name, params in candidates]
+            outcomes = list(pool.map(evaluate, *zip(*args))) if pool else [evaluate(*a) for a in args]
+            if fraction >= 1:
+                break
+            candidates = []
+            for name in models:
+                ranked = sorted((r for r, _ in outcomes if r['model'] == name), key=lambda r: -r['accuracy'])
+                survivors = max(1, math.ceil(len(ranked) * keep))
+                candidates += [(r['model'], r['params']) for r in ranked[:survivors]]
+                pruned += ranked[survivors:]
+    finally:
+        if pool:
+            pool.shutdown()
+
+    results = []
+    for result, modelo in outcomes:
+        data = load_features(path, FEATURES[result['model']])
+        result['latency'] = single_row_latency(data['vectorizer'], modelo, data['latency_x'])
+        results.append(result)
+        if logger:
+            logger(f"{result['model']} {result['params']}: acurácia {result['accuracy']:.4f}, "
+                   f"p50 {result['latency']['p50_ms']} ms")
+
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'seed': seed,
+        'features': path,
+        'cached': cached,
+        'rounds': list(rounds),
+        'max_latency_ms': max_latency_ms,
+        'results': results,
+        'pruned': pruned,
+        'pareto': {name: [r['params'] for r in pareto_front([r for r in results if r['model'] == name])] for name in models},
+        'best': {name: choose([r for r in results if r['model'] == name], max_latency_ms) for name in models},
+        'search_seconds': round(time.perf_counter() - start, 3)
+    }
+    out_dir = out_dir or path
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, SEARCH_RESULTS), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    return report
@@ -3,6 +3,7 @@
 ****************************************************************************************/ 
 const API_BASE_URL = 'http://localhost:5000';
 const CACHE_EXPIRATION = 60000;
+const RECENT_TRANSACTIONS = 10; // Transações recentes na Home
 
 // Mapeamento de endpoints para tabelas
 const ENDPOINT_MAPPINGS = [
@@ -45,6 +46,7 @@ const elements = {
 ****************************************************************************************/
 const apiCache = {
     lastUpdated: {},
+    cursors: {}, // Listagens paginadas: { url, cursor } da próxima página (cursor null na última)
     data: {        
         home: null,
         categories: null,
@@ -238,6 +240,17 @@ async function fetchData(url, method = 'GET', body = null) {
     }
 }
 
+// Uma página da listagem (after_id = next_cursor da anterior); listagens sem paginação retornam cursor null
+async function fetchPage(url, key, cursor = null) {
+    const separator = url.includes('?') ? '&' : '?';
+    const data = await fetchData(cursor === null ? url : `${url}${separator}after_id=${cursor}`);
+    const page = data.detalhes || data;
+    return {
+        items: Array.isArray(page) ? page : page[key] || [],
+        cursor: page.next_cursor ?? null
+    };
+}
+
 async function fetchWithRetry(url, options, retries = 3) {
     try {
         return await fetchData(url, options.method, options.body);
@@ -580,13 +593,18 @@ async function loadData(url) {
         if (apiCache.data[cacheKey] && 
             Date.now() - (apiCache.lastUpdated[cacheKey] || 0) < CACHE_EXPIRATION) {
             processData(apiCache.data[cacheKey], cacheKey, tableId);
+            updateLoadMore(cacheKey);
             return;
         }
 
-        const data = await fetchData(url);
+        // Apenas a primeira página; as seguintes vêm pelo botão "Carregar mais"
+        const page = await fetchPage(url, cacheKey);
+        const data = { [cacheKey]: page.items };
         apiCache.data[cacheKey] = data;
+        apiCache.cursors[cacheKey] = { url, cursor: page.cursor };
         apiCache.lastUpdated[cacheKey] = Date.now();
         processData(data, cacheKey, tableId);
+        updateLoadMore(cacheKey);
     } catch (error) {
         if (table) {
             const tbody = table.querySelector('tbody');
@@ -598,6 +616,38 @@ async function loadData(url) {
     }
 }
 
+// Próxima página de uma listagem paginada, acrescentada à tabela
+async function loadMore(cacheKey) {
+    const state = apiCache.cursors[cacheKey];
+    const match = ENDPOINT_MAPPINGS.find(mapping => mapping.cacheKey === cacheKey);
+    if (!state || state.cursor === null || !apiCache.data[cacheKey] || !match) return;
+
+    try {
+        const page = await fetchPage(state.url, cacheKey, state.cursor);
+        const items = apiCache.data[cacheKey][cacheKey];
+        items.push(...page.items);
+        state.cursor = page.cursor;
+
+        // Linhas ainda não exibidas (inclusive as da página anterior) entram no fim da tabela
+        const tbody = document.querySelector(`#${match.tableId} tbody`);
+        if (tbody) {
+            const fragment = document.createDocumentFragment();
+            items.slice(tbody.querySelectorAll('tr').length).forEach(item => {
+                fragment.appendChild(createTableRow(item, cacheKey));
+            });
+            tbody.appendChild(fragment);
+        }
+    } catch (error) {
+        showMessage(`Falha ao carregar mais dados: ${error.message}`, 'error');
+    }
+    updateLoadMore(cacheKey);
+}
+
+function updateLoadMore(cacheKey) {
+    const button = document.querySelector(`[data-action="load-more"][data-cache-key="${cacheKey}"]`);
+    if (button) button.hidden = (apiCache.cursors[cacheKey]?.cursor ?? null) === null;
+}
+
 function processData(data, cacheKey, tableId) {
     const items = Array.isArray(data) ? data : data[cacheKey] || data.detalhes?.[cacheKey] || [];
     
@@ -658,50 +708,52 @@ async function loadHomeData() {
     const currentDate = new Date();
     const currentMonth = currentDate.getMonth() + 1;
     const currentYear = currentDate.getFullYear();
+    const monthKey = `${currentYear}-${String(currentMonth).padStart(2, '0')}`;
+    const lastDay = new Date(currentYear, currentMonth, 0).getDate();
     
-    // Carregar transações do mês atual
-    //const transactions = await fetchData(`${API_BASE_URL}/transactions?month=${currentMonth}&year=${currentYear}`);
+    // Totais do ano agrupados no servidor (mês, categoria e tipo) e só a página das transações mais recentes do mês
+    const [summary, transactions] = await Promise.all([
+      fetchData(`${API_BASE_URL}/transaction/summary?year=${currentYear}`),
+      fetchData(`${API_BASE_URL}/transaction?transaction_date_from=${monthKey}-01&transaction_date_to=${monthKey}-${lastDay}` +
+                `&limit=${RECENT_TRANSACTIONS}&order=desc`)
+    ]);
     
     // Processar os dados
-    //processHomeData(transactions);
+    processHomeData(summary.detalhes?.summary || [], transactions.transaction || [], monthKey);
   } catch (error) {
     showMessage(`Falha ao carregar dados da home: ${error.message}`, 'error');
   }
 }
 
-function processHomeData(transactions) {
-  if (!transactions || transactions.length === 0) {
+function processHomeData(summary, transactions, monthKey) {
+  const monthSummary = summary.filter(row => row.month === monthKey);
+  if (monthSummary.length === 0) {
     showMessage('Nenhuma transação encontrada para o mês atual', 'info');
     return;
   }
 
-  // Agrupar transações por categoria
+  // Totais por categoria do mês atual (C: receita, D: despesa)
   const categoriesSummary = {};
   let totalIncome = 0;
   let totalExpenses = 0;
 
-  transactions.forEach(transaction => {
-    const category = transaction.category_id || 'Sem Categoria';
-    const amount = parseFloat(transaction.transaction_value);
-    const type = transaction.transaction_type;
+  monthSummary.forEach(row => {
+    const category = row.category_id || 'Sem Categoria';
 
     if (!categoriesSummary[category]) {
       categoriesSummary[category] = {
         income: 0,
-        expenses: 0,
-        transactions: []
+        expenses: 0
       };
     }
 
-    if (type === 'income') {
-      categoriesSummary[category].income += amount;
-      totalIncome += amount;
+    if (row.transaction_type === 'C') {
+      categoriesSummary[category].income += row.total;
+      totalIncome += row.total;
     } else {
-      categoriesSummary[category].expenses += amount;
-      totalExpenses += amount;
+      categoriesSummary[category].expenses += row.total;
+      totalExpenses += row.total;
     }
-
-    categoriesSummary[category].transactions.push(transaction);
   });
 
   // Atualizar os cards de resumo
@@ -712,8 +764,8 @@ function processHomeData(transactions) {
   // Criar gráfico de categorias
   renderCategoriesChart(categoriesSummary);
 
-  // Criar gráfico de evolução mensal (simplificado)
-  renderMonthlyTrendChart(transactions);
+  // Criar gráfico de evolução mensal
+  renderMonthlyTrendChart(summary);
 
   // Preencher tabela de transações recentes
   renderRecentTransactions(transactions);
@@ -765,34 +817,30 @@ function renderCategoriesChart(categoriesData) {
   });
 }
 
-function renderMonthlyTrendChart(transactions) {
+function renderMonthlyTrendChart(summary) {
   const ctx = document.getElementById('monthly-trend-chart').getContext('2d');
   
-  // Agrupar por dia (simplificado)
-  const dailySummary = {};
-  transactions.forEach(transaction => {
-    const date = new Date(transaction.transaction_date);
-    const day = date.getDate();
-    
-    if (!dailySummary[day]) {
-      dailySummary[day] = {
+  // Somar as categorias de cada mês
+  const monthlySummary = {};
+  summary.forEach(row => {
+    if (!monthlySummary[row.month]) {
+      monthlySummary[row.month] = {
         income: 0,
         expenses: 0
       };
     }
     
-    const amount = parseFloat(transaction.transaction_value);
-    if (transaction.transaction_type === 'income') {
-      dailySummary[day].income += amount;
+    if (row.transaction_type === 'C') {
+      monthlySummary[row.month].income += row.total;
     } else {
-      dailySummary[day].expenses += amount;
+      monthlySummary[row.month].expenses += row.total;
     }
   });
   
   // Preparar dados
-  const days = Object.keys(dailySummary).sort();
-  const incomeTrend = days.map(day => dailySummary[day].income);
-  const expensesTrend = days.map(day => dailySummary[day].expenses);
+  const months = Object.keys(monthlySummary).sort();
+  const incomeTrend = months.map(month => monthlySummary[month].income);
+  const expensesTrend = months.map(month => monthlySummary[month].expenses);
 
   // Destruir gráfico anterior se existir
   if (window.monthlyTrendChart) {
@@ -802,7 +850,7 @@ function renderMonthlyTrendChart(transactions) {
   window.monthlyTrendChart = new Chart(ctx, {
     type: 'line',
     data: {
-      labels: days.map(day => `Dia ${day}`),
+      labels: months.map(month => month.split('-').reverse().join('/')),
       datasets: [
         {
           label: 'Receitas',
@@ -835,7 +883,7 @@ function renderMonthlyTrendChart(transactions) {
 }
 
 function renderRecentTransactions(transactions) {
-  const tbody = document.querySelector('#recent-transactions tbody');
+  const tbody = document.querySelector('#home-items-table tbody');
   tbody.innerHTML = '';
 
   // Ordenar por data (mais recente primeiro)
@@ -843,8 +891,8 @@ function renderRecentTransactions(transactions) {
     new Date(b.transaction_date) - new Date(a.transaction_date)
   );
 
-  // Mostrar apenas as 10 mais recentes
-  const recentTransactions = sortedTransactions.slice(0, 10);
+  // Mostrar apenas as mais recentes
+  const recentTransactions = sortedTransactions.slice(0, RECENT_TRANSACTIONS);
 
   recentTransactions.forEach(transaction => {
     const row = document.createElement('tr');
@@ -866,11 +914,11 @@ function renderRecentTransactions(transactions) {
     const value = parseFloat(transaction.transaction_value).toFixed(2);
     valueCell.textContent = `R$ ${value}`;
     valueCell.classList.add('align-right');
-    valueCell.classList.add(transaction.transaction_type === 'income' ? 'positive-value' : 'negative-value');
+    valueCell.classList.add(transaction.transaction_type === 'C' ? 'positive-value' : 'negative-value');
     row.appendChild(valueCell);
     
     const typeCell = document.createElement('td');
-    typeCell.textContent = transaction.transaction_type === 'income' ? 'Receita' : 'Despesa';
+    typeCell.textContent = transaction.transaction_type === 'C' ? 'Receita' : 'Despesa';
     typeCell.classList.add('align-center');
     row.appendChild(typeCell);
     
@@ -983,6 +1031,13 @@ function handleDocumentClick(e) {
         return;
     }
 
+    // Próxima página da listagem
+    if (e.target.dataset.action === 'load-more') {
+        e.preventDefault();
+        loadMore(e.target.dataset.cacheKey);
+        return;
+    }
+
     // Botão de pesquisa
     if (e.target.classList.contains('btn-search')) {
         e.preventDefault();